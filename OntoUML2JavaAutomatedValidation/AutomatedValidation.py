@@ -1,57 +1,530 @@
 #  Copyright (c) 2024.
+import argparse
 import datetime
+import glob
+import hashlib
 import json
+import multiprocessing
 import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import pandas as pd
 
+from OntoUML2JavaAutomatedValidation.ResultJournal import ResultJournal
+from OntoUML2JavaAutomatedValidation.ResultsStore import RESULTS_STORE_PATH, RUN_KIND_INCREMENTAL, RUN_KIND_TEST_RUN, \
+    ResultsStore
+from OntoUML2JavaTransformationExecution.BatchCompiler import BatchCompiler, CompileBatch
+from OntoUML2JavaTransformationExecution.IncrementalCompiler import IncrementalCompiler
+from OntoUML2JavaTransformationExecution.PipelineScheduler import PipelineScheduler
+from OntoUML2JavaTransformationExecution.ScratchWorkspace import ScratchWorkspace
+from OntoUML2JavaTransformationExecution.StageCache import StageCache
 from OntoUML2JavaTransformationExecution.TransformationExecutor import TransformationExecutor
+from OntoUML2JavaTransformationExecution.TransformationStage import StageTimeLimit, TransformationStage
+from OntoUmlJsonSchemaTests.SchemaValidator import SchemaValidator
 
+FOLDER_WITH_ONTOLOGIES = 'modelJsons-relationStereotypesRenamed'
+RESULTS_FOLDER = 'results'
+SCHEMA_CACHE_PATH = os.path.join(RESULTS_FOLDER, 'schema_validation_cache.json')
+
+# Per worker process: the isolated code generation project and output sub-folder it uses (see 'run_parallel')
+_worker_context = {}
 
-if __name__ == '__main__':
 
-    # Get the number of classes per model
+def load_num_classes_per_ontology():
+    """
+    Get the number of classes per model from the statistics of the model catalogue scraper.
+    :return: Dict with model name -> number of classes.
+    """
     with open('../OntoUmlModelCatalogueScraper/repo_stats.json') as f:
         stats: dict = json.load(f)
-        num_classes_per_ontology = {model_name: sum(stat['Class'].values()) for model_name, stat in stats.items()}
+        return {model_name: sum(stat['Class'].values()) for model_name, stat in stats.items()}
 
 
-    folder_with_ontologies = 'modelJsons-relationStereotypesRenamed'
-    models_to_transform = os.listdir(folder_with_ontologies)
+def hash_model_file(json_path):
+    """
+    Hash of the contents of an OntoUML JSON file, used to detect changed models between runs.
+    :param json_path: Path to the OntoUML JSON file.
+    :return: Hex digest of the SHA-256 hash.
+    """
+    with open(json_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
 
-    # To test the automated validation for a smaller subset of models.
-    # models_to_transform = ['buridan-ontology2021.json']
 
-    count_transformed = 0
+def get_latest_results_file():
+    """
+    :return: Path of the most recently written results CSV in the results folder, or None if there is none.
+    """
+    results_files = glob.glob(os.path.join(RESULTS_FOLDER, 'transformation_results *.csv'))
+    return max(results_files, key=os.path.getmtime, default=None)
+
+
+def select_models_to_revalidate(json_paths, previous_results: pd.DataFrame):
+    """
+    Determines which models have to be transformed again given the results of a previous run. These are the models that
+    are new, have changed (by content hash), or for which the transformation or compilation failed previously.
+    :param json_paths: Paths of the OntoUML JSON files of all models to be validated.
+    :param previous_results: Results of a previous run, with a 'model' column (and a 'model_hash' column if available).
+        If a model has multiple rows, its last row is used.
+    :return: A 2-tuple of the paths of the models to transform and the previous results that are still valid.
+    """
+    previous_results = previous_results.drop_duplicates('model', keep='last').set_index('model', drop=False)
+    to_transform = []
+    still_valid = []
+
+    for json_path in json_paths:
+        model_name = os.path.splitext(os.path.basename(json_path))[0]
+        if model_name not in previous_results.index:
+            print(f"{model_name}: new model")
+            to_transform.append(json_path)
+            continue
+
+        previous = previous_results.loc[model_name]
+        if 'model_hash' not in previous or previous['model_hash'] != hash_model_file(json_path):
+            print(f"{model_name}: changed model")
+            to_transform.append(json_path)
+        elif not (previous['transformation_successful'] == True and previous['generated_code_compiles'] == True):
+            print(f"{model_name}: failed previously")
+            to_transform.append(json_path)
+        else:
+            still_valid.append(model_name)
+
+    return to_transform, previous_results.loc[still_valid].reset_index(drop=True)
+
+
+def transform_model(json_path, num_classes_per_ontology, **executor_options):
+    """
+    Executes the entire transformation chain (including the compile check) for a single model.
+    :param json_path: Path to the OntoUML JSON file of the model.
+    :param num_classes_per_ontology: Dict with model name -> number of classes, added to the results.
+    :param executor_options: Further keyword arguments for the TransformationExecutor, e.g. 'java_generation_location'.
+    :return: Dict with the results of the transformation.
+    """
+    # Initialize Tranformation chain object
+    transformation_executor = TransformationExecutor(json_path, test_generated_code=True, **executor_options)
+    transformation_executor.execute_entire_transformation_chain()
+    return get_model_results(transformation_executor, num_classes_per_ontology)
+
+
+def get_model_results(transformation_executor: TransformationExecutor, num_classes_per_ontology):
+    """
+    Gets the results of an executed transformation, extended with information on the model.
+    :param transformation_executor: Executor that executed the transformation chain.
+    :param num_classes_per_ontology: Dict with model name -> number of classes, added to the results.
+    :return: Dict with the results of the transformation.
+    """
+    # Get the results of the transformation
+    transformation_result_dict = transformation_executor.finalize_and_get_results()
+
+    # Add the number of classes to the results
+    model_name = transformation_result_dict['model']
+    transformation_result_dict['n_classes'] = num_classes_per_ontology[model_name]
+    transformation_result_dict['model_hash'] = hash_model_file(transformation_executor.ontoUML_json_path)
+    # Stored in a separate table, see 'split_compile_diagnostics'
+    transformation_result_dict['compile_diagnostics'] = \
+        transformation_executor.transformation_result.get_compile_diagnostics()
+    return transformation_result_dict
+
+
+def split_compile_diagnostics(results) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Separates the diagnostics of the compile checks from the results of the models.
+    :param results: Iterable over the result dicts of the models (e.g. from the journal).
+    :return: A 2-tuple of a DataFrame with a row per model, and a DataFrame with a row per diagnostic of the compile
+        check of a model (see CompileLogParser), keyed by its 'run_id' and 'model'.
+    """
+    model_rows = []
+    diagnostic_rows = []
+    for result in results:
+        result = dict(result)
+        diagnostics = result.pop('compile_diagnostics', None) or []
+        diagnostic_rows.extend({'run_id': result.get('run_id')} | diagnostic for diagnostic in diagnostics)
+        model_rows.append(result)
+    diagnostics_df = pd.DataFrame(diagnostic_rows, columns=['run_id', 'model', 'file', 'line', 'kind', 'message',
+                                                            'category', 'detail'])
+    return pd.DataFrame(model_rows), diagnostics_df
 
-    transformation_results = []
+
+def apply_schema_gate(json_paths, schema_validator: SchemaValidator, num_classes_per_ontology, result_sink,
+                      n_workers=None):
+    """
+    Validates the models against the OntoUML JSON Schema before they are transformed. The models that do not pass are
+    reported immediately, with their first errors, and passed to the result sink as failed at the 'schema_validation'
+    stage, so no JVM time is spent on them.
+    :param json_paths: Paths of the OntoUML JSON files of the models to be transformed.
+    :param schema_validator: Validator with the (cached) verdicts of the schema validation.
+    :param num_classes_per_ontology: Dict with model name -> number of classes, added to the results.
+    :param result_sink: Function called with the results of each model that does not pass.
+    :param n_workers: Number of models validated in parallel, by default the number of CPUs.
+    :return: A 2-tuple of the paths of the models that pass, and a DataFrame with a row per validation error of the
+        other models (columns 'model', 'path', 'message', 'validator' and 'schema_path').
+    """
+    errors_per_path = schema_validator.validate_files(json_paths, n_workers)
+    schema_validator.save_cache()
+
+    error_rows = []
+    for json_path, errors in errors_per_path.items():
+        if not errors:
+            continue
+        model_name = os.path.splitext(os.path.basename(json_path))[0]
+        print(f"{model_name}: does not pass the schema validation ({len(errors)} errors, e.g. "
+              f"{errors[0]['path']}: {errors[0]['message']})")
+        error_rows.extend({'model': model_name} | error for error in errors)
+        result_sink({'model': model_name, 'transformation_successful': False, 'generated_code_compiles': False,
+                     'transformation_failed_at_stage': 'schema_validation', 'n_schema_errors': len(errors),
+                     'n_classes': num_classes_per_ontology.get(model_name), 'model_hash': hash_model_file(json_path)})
+
+    passed = [json_path for json_path, errors in errors_per_path.items() if not errors]
+    print(f"{len(passed)} of {len(json_paths)} models pass the schema validation")
+    return passed, pd.DataFrame(error_rows, columns=['model', 'path', 'message', 'validator', 'schema_path'])
+
+
+def compile_batch(batch_compiler: BatchCompiler, num_classes_per_ontology, result_sink, batch: CompileBatch = None):
+    """
+    Compile checks the generated code of the models in a batch, and passes their results to the result sink.
+    :param batch_compiler: Batch with the executors of transformed models.
+    :param num_classes_per_ontology: Dict with model name -> number of classes, added to the results.
+    :param result_sink: Function called with the results of each model of the batch.
+    :param batch: Batch taken from the batch compiler (see BatchCompiler.take_batch). If None, the current batch of the
+        batch compiler is compiled.
+    :return: A 2-tuple of the number of models in the batch and the list of models for which an exception occurred.
+    """
+    if batch is None:
+        batch = batch_compiler.take_batch()
+    executors = list(batch.executors)
+    try:
+        batch_compiler.compile(batch)
+    except Exception as e:
+        print(e)
+        return 0, [os.path.basename(executor.ontoUML_json_path) for executor in executors]
+
+    for transformation_executor in executors:
+        result_sink(get_model_results(transformation_executor, num_classes_per_ontology))
+    return len(executors), []
+
+
+def run_sequential(json_paths, num_classes_per_ontology, result_sink, batch_compiler: BatchCompiler = None,
+                   **executor_options):
+    """
+    Transforms the models one after another, using the projects of the Eclipse workspace.
+    :param result_sink: Function called with the results of each model as soon as they are available.
+    :param batch_compiler: If given, the generated code is not compiled per model, but per batch of models. The results
+        of the models in a batch are available once the batch is compiled.
+    :param executor_options: Keyword arguments for the TransformationExecutor of every model.
+    :return: A 2-tuple of the number of transformed models and the list of models for which an exception occurred.
+    """
+    count_transformed = 0
     exceptions = []
 
-    for json_file in models_to_transform:
+    for json_path in json_paths:
         try:
-            full_path = os.path.abspath(os.path.join(folder_with_ontologies, json_file))
+            if batch_compiler is None:
+                result_sink(transform_model(json_path, num_classes_per_ontology, **executor_options))
+                count_transformed += 1
+                continue
 
-            # Initialize Tranformation chain object
-            transformation_executor = TransformationExecutor(full_path, test_generated_code=True)
+            transformation_executor = TransformationExecutor(json_path, test_generated_code=False, **executor_options)
             transformation_executor.execute_entire_transformation_chain()
+            batch_compiler.add(transformation_executor)
+        except Exception as e:
+            print(e)
+            exceptions.append(os.path.basename(json_path))
 
-            # Get the results of the transformation
-            transformation_result_dict = transformation_executor.finalize_and_get_results()
+        if batch_compiler is not None and batch_compiler.is_full():
+            count_batch, batch_exceptions = compile_batch(batch_compiler, num_classes_per_ontology, result_sink)
+            count_transformed += count_batch
+            exceptions += batch_exceptions
 
-            # Add the number of classes to the results
-            model_name = transformation_result_dict['model']
-            transformation_result_dict['n_classes'] = num_classes_per_ontology[model_name]
+    if batch_compiler is not None and len(batch_compiler) > 0:
+        count_batch, batch_exceptions = compile_batch(batch_compiler, num_classes_per_ontology, result_sink)
+        count_transformed += count_batch
+        exceptions += batch_exceptions
+    return count_transformed, exceptions
 
-            transformation_results.append(transformation_result_dict)
 
-            count_transformed += 1
+def _init_worker(worker_slots, num_classes_per_ontology, executor_options):
+    """
+    Initializer of a worker process. Claims one of the prepared isolated code generation projects.
+    """
+    slot_index, project_path = worker_slots.get()
+    _worker_context['num_classes_per_ontology'] = num_classes_per_ontology
+    _worker_context['executor_options'] = executor_options | {'java_generation_location': project_path,
+                                                              'output_subfolder': f"worker-{slot_index}"}
 
-        except Exception as e:
-            print(e)
-            exceptions.append(json_file)
 
-    print(f"Done with {count_transformed} models")
-    print(f"Exceptions for models {exceptions}")
+def _transform_model_in_worker(json_path):
+    return transform_model(json_path, _worker_context['num_classes_per_ontology'], **_worker_context['executor_options'])
+
+
+def run_parallel(json_paths, num_classes_per_ontology, result_sink, n_workers, **executor_options):
+    """
+    Transforms the models using a pool of worker processes. Each worker generates code in its own copy of the
+    'TestCodeGeneration' project and stores its intermediate models in its own sub-folder, so the ANT tasks of different
+    workers do not interfere.
+    :param result_sink: Function called with the results of each model as soon as they are available.
+    :param n_workers: Number of models that are transformed at the same time.
+    :param executor_options: Keyword arguments for the TransformationExecutor of every model.
+    :return: A 2-tuple of the number of transformed models and the list of models for which an exception occurred.
+    """
+    count_transformed = 0
+    exceptions = []
+
+    worker_slots = multiprocessing.Queue()
+    project_paths = []
+    for slot_index in range(n_workers):
+        project_path = TransformationExecutor.create_isolated_code_generation_project(
+            f"{TransformationExecutor.GENERATED_CODE_PROJECT}-worker-{slot_index}")
+        project_paths.append(project_path)
+        worker_slots.put((slot_index, project_path))
+
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(worker_slots, num_classes_per_ontology, executor_options)) as pool:
+            futures = {pool.submit(_transform_model_in_worker, json_path): json_path for json_path in json_paths}
+            for future in as_completed(futures):
+                try:
+                    result_sink(future.result())
+                    count_transformed += 1
+                except Exception as e:
+                    print(e)
+                    exceptions.append(os.path.basename(futures[future]))
+    finally:
+        for project_path in project_paths:
+            TransformationExecutor.remove_isolated_code_generation_project(project_path)
+
+    return count_transformed, exceptions
+
+
+def run_pipelined(json_paths, num_classes_per_ontology, result_sink, stage_concurrency,
+                  batch_compiler: BatchCompiler = None, **executor_options):
+    """
+    Transforms the models with a pipeline in which every stage has its own limit on the number of models processed at
+    the same time (see PipelineScheduler).
+    :param result_sink: Function called with the results of each model as soon as they are available.
+    :param stage_concurrency: Dict with TransformationStage -> maximum number of concurrent executions.
+    :param batch_compiler: If given, the generated code is not compiled in the pipeline, but per batch of models. Full
+        batches are compiled one after another by a separate thread, while the pipeline continues. The results of the
+        models in a batch are available once the batch is compiled.
+    :param executor_options: Keyword arguments for the TransformationExecutor of every model.
+    :return: A 2-tuple of the number of transformed models and the list of models for which an exception occurred.
+    """
+    transformed = []
+    exceptions = []
+    # Guards 'transformed' and 'exceptions', which the batch compile thread extends as well
+    results_lock = threading.Lock()
+    full_batches = queue.Queue()
+
+    def compile_full_batches():
+        while (batch := full_batches.get()) is not None:
+            batch_models = [transformation_executor.model_name for transformation_executor in batch.executors]
+            count_batch, batch_exceptions = compile_batch(batch_compiler, num_classes_per_ontology, result_sink, batch)
+            with results_lock:
+                if count_batch > 0:
+                    transformed.extend(batch_models)
+                exceptions.extend(batch_exceptions)
+
+    def on_finished(transformation_executor):
+        if batch_compiler is not None:
+            # Called before the code generation project of the model is released, so its sources can still be copied.
+            # The full batch is only handed off: compiling it here would block the callbacks of all stages.
+            batch_compiler.add(transformation_executor)
+            if batch_compiler.is_full():
+                full_batches.put(batch_compiler.take_batch())
+            return
+        result_sink(get_model_results(transformation_executor, num_classes_per_ontology))
+        with results_lock:
+            transformed.append(transformation_executor.model_name)
+
+    def on_error(transformation_executor, e):
+        print(e)
+        with results_lock:
+            exceptions.append(os.path.basename(transformation_executor.ontoUML_json_path))
+
+    compile_thread = None
+    if batch_compiler is not None:
+        compile_thread = threading.Thread(target=compile_full_batches, name='batch-compile', daemon=True)
+        compile_thread.start()
+    executors = (TransformationExecutor(json_path, test_generated_code=batch_compiler is None, **executor_options)
+                 for json_path in json_paths)
+    try:
+        PipelineScheduler(stage_concurrency).run(executors, on_finished, on_error)
+    finally:
+        if compile_thread is not None:
+            if len(batch_compiler) > 0:
+                full_batches.put(batch_compiler.take_batch())
+            full_batches.put(None)
+            compile_thread.join()
+    return len(transformed), exceptions
+
+
+def parse_stage_limit(stage_limit: str):
+    """
+    Parses a stage limit argument of the form STAGE=N, e.g. ATL=4.
+    :return: A 2-tuple of the TransformationStage and the limit.
+    """
+    stage_name, limit = stage_limit.split('=')
+    return TransformationStage[stage_name.strip().upper()], int(limit)
+
+
+def parse_time_limit(time_limit: str):
+    """
+    Parses a time limit argument of the form STAGE=SECONDS or STAGE=SECONDS+SECONDS_PER_MB, e.g. ATL=600+120 for 600
+    seconds plus 120 seconds per MB of OntoUML JSON.
+    :return: A 2-tuple of the TransformationStage and the StageTimeLimit.
+    """
+    stage_name, limit = time_limit.split('=')
+    seconds, _, seconds_per_mb = limit.partition('+')
+    return TransformationStage[stage_name.strip().upper()], StageTimeLimit(float(seconds), float(seconds_per_mb or 0))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Automated validation of the OntoUML2Java transformation.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of models transformed in parallel. 1 (default) transforms the models one after "
+                             "another in the projects of the Eclipse workspace.")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Transform the models in a pipeline in which every stage has its own concurrency limit.")
+    parser.add_argument('--stage-limit', type=parse_stage_limit, action='append', default=[], metavar='STAGE=N',
+                        help="Concurrency limit of a stage in pipeline mode, e.g. ATL=4 or COMPILE_CHECK=2. Can be given "
+                             "multiple times.")
+    parser.add_argument('--time-limit', type=parse_time_limit, action='append', default=[],
+                        metavar='STAGE=SECONDS[+SECONDS_PER_MB]',
+                        help="Time limit of a stage, e.g. ATL=600+120 for 600 seconds plus 120 seconds per MB of OntoUML "
+                             "JSON. A stage exceeding its limit is killed and recorded as timed out. Can be given "
+                             "multiple times.")
+    parser.add_argument('--stage-cache', metavar='FOLDER',
+                        help="Folder of a cache from which the outputs of the READ_ONTOUML, ATL and ACCELEO stages are "
+                             "restored when neither the stage input nor its Eclipse project changed.")
+    parser.add_argument('--batch-compile', type=int, metavar='N',
+                        help="Compile the generated code of N models at a time in a single ANT run, instead of per "
+                             "model. Not available in combination with --workers.")
+    parser.add_argument('--incremental-compile', metavar='FOLDER',
+                        help="Keep the generated code and class files of every model in FOLDER, and only recompile the "
+                             "files that changed since the previous run (plus the files depending on them).")
+    parser.add_argument('--verify-compile', action='store_true',
+                        help="With --incremental-compile, check every compilation against a clean build (recorded in "
+                             "the 'compile_verified' column): the verdict against a 'clean' and 'build-project' of the "
+                             "code generation project (with --scratch, against a javac compilation from scratch), and "
+                             "the class files against a javac compilation from scratch.")
+    parser.add_argument('--scratch', action='store_true',
+                        help="Store the intermediate models, generated code and class files in a scratch folder (by "
+                             "default in RAM at /dev/shm) instead of in the Eclipse projects.")
+    parser.add_argument('--scratch-location', metavar='FOLDER',
+                        help="Folder in which the scratch folder of --scratch is created.")
+    parser.add_argument('--keep-artifact', choices=ScratchWorkspace.ARTIFACTS, action='append', default=[],
+                        help="With --scratch, copy this artifact of every model to 'results/artifacts <timestamp>'. Can "
+                             "be given multiple times.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only transform the models that are new, changed or failed according to the latest "
+                             "results file, and merge their results with the other results of that file.")
+    parser.add_argument('--results-store', default=RESULTS_STORE_PATH, metavar='DATABASE',
+                        help="SQLite results store in which the results of the run are stored (see ResultsStore.py).")
+    parser.add_argument('--schema-gate', action='store_true',
+                        help="Validate the models against the OntoUML JSON Schema first, and only transform the models "
+                             f"that pass. The verdicts are cached in {SCHEMA_CACHE_PATH}.")
+    parser.add_argument('--resume', metavar='JOURNAL',
+                        help="Continue an interrupted run from its journal (results/*.jsonl), skipping the models of "
+                             "which the results are already in the journal.")
+    args = parser.parse_args()
+    if args.batch_compile is not None and args.workers > 1 and not args.pipeline:
+        parser.error("--batch-compile cannot be combined with --workers")
+    if args.keep_artifact and not args.scratch:
+        parser.error("--keep-artifact requires --scratch")
+    if args.batch_compile is not None and args.incremental_compile is not None:
+        parser.error("--batch-compile cannot be combined with --incremental-compile")
 
-    df: pd.DataFrame = pd.DataFrame(transformation_results)
     current_date_time = datetime.datetime.now().strftime('%Y-%m-%d %H-%M-%S')
-    df.to_csv(f'results/transformation_results {current_date_time} test run.csv')
\ No newline at end of file
+
+    executor_options = {'stage_time_limits': dict(args.time_limit)}
+    if args.stage_cache is not None:
+        executor_options['stage_cache'] = StageCache(args.stage_cache)
+    if args.incremental_compile is not None:
+        executor_options['incremental_compiler'] = IncrementalCompiler(args.incremental_compile,
+                                                                       verify=args.verify_compile)
+
+    if args.scratch:
+        executor_options['scratch_workspace'] = ScratchWorkspace(
+            args.scratch_location, os.path.join(RESULTS_FOLDER, f'artifacts {current_date_time}'), args.keep_artifact)
+
+    batch_compiler = BatchCompiler(args.batch_compile) if args.batch_compile is not None else None
+
+    num_classes_per_ontology = load_num_classes_per_ontology()
+
+    models_to_transform = os.listdir(FOLDER_WITH_ONTOLOGIES)
+
+    # To test the automated validation for a smaller subset of models.
+    # models_to_transform = ['buridan-ontology2021.json']
+
+    json_paths = [os.path.abspath(os.path.join(FOLDER_WITH_ONTOLOGIES, json_file)) for json_file in models_to_transform]
+
+    previous_results = None
+    previous_df = None
+    if args.incremental:
+        with ResultsStore(args.results_store) as results_store:
+            if (previous_run_id := results_store.get_latest_run_id()) is not None:
+                print(f"Incremental validation based on run '{previous_run_id}' of {args.results_store}")
+                previous_df = results_store.get_results(previous_run_id)
+        # Results from before the results store was used
+        if previous_df is None and (previous_results_file := get_latest_results_file()) is not None:
+            print(f"Incremental validation based on {previous_results_file}")
+            previous_df = pd.read_csv(previous_results_file, index_col=0)
+            if 'run_id' not in previous_df:
+                # Results from before the run id was recorded; the file name identifies the run instead
+                previous_df['run_id'] = os.path.splitext(os.path.basename(previous_results_file))[0]
+    if previous_df is not None:
+        json_paths, previous_results = select_models_to_revalidate(json_paths, previous_df)
+        print(f"Transforming {len(json_paths)} models, reusing the results of {len(previous_results)} models")
+
+    # Every result is written to the journal immediately, the CSV is created from the journal once all models are done
+    journal_path = args.resume or os.path.join(RESULTS_FOLDER, f'transformation_results {current_date_time}.jsonl')
+    # The run id records which run produced each row
+    with ResultJournal(journal_path, run_id=current_date_time) as journal:
+        if args.resume:
+            journaled_models = journal.get_journaled_models()
+            json_paths = [json_path for json_path in json_paths
+                          if os.path.splitext(os.path.basename(json_path))[0] not in journaled_models]
+            print(f"Resuming {journal_path}: {len(journaled_models)} models done, {len(json_paths)} to go")
+
+        schema_errors = None
+        if args.schema_gate:
+            json_paths, schema_errors = apply_schema_gate(json_paths, SchemaValidator(cache_path=SCHEMA_CACHE_PATH),
+                                                          num_classes_per_ontology, journal.append,
+                                                          args.workers if args.workers > 1 else None)
+
+        try:
+            if args.pipeline:
+                count_transformed, exceptions = run_pipelined(json_paths, num_classes_per_ontology, journal.append,
+                                                              dict(args.stage_limit), batch_compiler,
+                                                              **executor_options)
+            elif args.workers > 1:
+                count_transformed, exceptions = run_parallel(json_paths, num_classes_per_ontology, journal.append,
+                                                             args.workers, **executor_options)
+            else:
+                count_transformed, exceptions = run_sequential(json_paths, num_classes_per_ontology, journal.append,
+                                                               batch_compiler, **executor_options)
+        finally:
+            if batch_compiler is not None:
+                batch_compiler.close()
+            if 'scratch_workspace' in executor_options:
+                executor_options['scratch_workspace'].close()
+
+        print(f"Done with {count_transformed} models")
+        print(f"Exceptions for models {exceptions}")
+
+        df, compile_diagnostics = split_compile_diagnostics(journal.read_results())
+
+    if previous_results is not None:
+        df = pd.concat([previous_results, df], ignore_index=True)
+    if not df.empty:
+        df = df.sort_values('model', ignore_index=True)
+
+    run_kind = RUN_KIND_INCREMENTAL if previous_results is not None else RUN_KIND_TEST_RUN
+    results_name = f'transformation_results {current_date_time} {run_kind}'
+    df.to_csv(os.path.join(RESULTS_FOLDER, f'{results_name}.csv'))
+    compile_diagnostics.to_csv(os.path.join(RESULTS_FOLDER, f'{results_name} compile diagnostics.csv'), index=False)
+    with ResultsStore(args.results_store) as results_store:
+        results_store.store_run(current_date_time, df, compile_diagnostics, run_kind)
+    print(f"Stored the results as run '{current_date_time}' in {args.results_store}")
+    if schema_errors is not None:
+        schema_errors.to_csv(os.path.join(RESULTS_FOLDER, f'{results_name} schema errors.csv'), index=False)
@@ -0,0 +1,269 @@
+#  Copyright (c) 2024.
+"""
+Cost models of the stages of the transformation: for every stage and size feature of the models, a linear fit
+(time = c + a * size) and a power-law fit (time = c + a * size^k) of the measured stage times. The constant c captures the
+fixed cost of a stage (e.g. starting ANT and Eclipse), and the exponent k of the power-law fit shows whether the rest
+scales super-linearly (k > 1) with a size feature.
+
+The best fitting cost model of every stage is used to extrapolate the stage time to larger models, and to flag models of
+which the measured time deviates strongly from the predicted time.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from OntoUML2JavaAutomatedValidation.ResultsStore import RESULTS_STORE_PATH, ResultsStore, is_results_csv, \
+    load_results
+from OntoUmlModelCatalogueScraper.util import iter_contents_elements
+
+FOLDER_WITH_ONTOLOGIES = 'modelJsons-relationStereotypesRenamed'
+
+STAGE_COLUMNS = ['read_ontouml_time_s', 'atl_time_s', 'acceleo_time_s', 'compile_check_time_s',
+                 'transformation_time_s']
+SIZE_FEATURES = ['n_classes', 'n_relations', 'n_generalizations', 'json_bytes']
+
+LINEAR = 'linear'
+POWER_LAW = 'power-law'
+MIN_EXPONENT = 0.25
+MAX_EXPONENT = 3.0
+
+
+def get_size_features(json_path):
+    """
+    :param json_path: OntoUML JSON file of a model.
+    :return: Dict with the size features (see SIZE_FEATURES) of the model, counting the elements in all packages.
+    """
+    with open(json_path, encoding='utf-8') as f:
+        ontology = json.load(f)
+
+    counts = {'Class': 0, 'Relation': 0, 'Generalization': 0}
+    for element in iter_contents_elements(ontology['model']['contents']):
+        if element['type'] in counts:
+            counts[element['type']] += 1
+
+    return {'n_classes': counts['Class'], 'n_relations': counts['Relation'],
+            'n_generalizations': counts['Generalization'], 'json_bytes': os.path.getsize(json_path)}
+
+
+def load_size_features(models_folder=FOLDER_WITH_ONTOLOGIES):
+    """
+    :param models_folder: Folder with the OntoUML JSON files of the models.
+    :return: DataFrame with the size features, indexed by model name.
+    """
+    return pd.DataFrame.from_dict({os.path.splitext(file_name)[0]: get_size_features(os.path.join(models_folder, file_name))
+                                   for file_name in sorted(os.listdir(models_folder)) if file_name.endswith('.json')},
+                                  orient='index').rename_axis('model')
+
+
+def load_timings(results_source, size_features: pd.DataFrame, store_path=RESULTS_STORE_PATH):
+    """
+    Joins the stage times of the results of the automated validation with the size features of the models.
+    :param results_source: Run id in the results store, or CSV file with the results of the automated validation (see
+        ResultsStore.load_results).
+    :param size_features: See load_size_features.
+    :param store_path: Location of the results store.
+    :return: DataFrame indexed by model name, with the stage times that are present in the results (times of stages
+        that were not executed are NaN) and the size features.
+    """
+    df = load_results(results_source, store_path)
+    stage_columns = [column for column in STAGE_COLUMNS if column in df.columns]
+    timings = df.drop_duplicates('model', keep='last').set_index('model')[stage_columns].apply(pd.to_numeric,
+                                                                                                errors='coerce')
+    # Stages that were not executed have time -1
+    timings = timings.where(timings >= 0)
+    # The total time is only meaningful for models that were transformed completely
+    if 'transformation_time_s' in timings.columns:
+        successful = df.drop_duplicates('model', keep='last').set_index('model')['transformation_successful']
+        timings.loc[~successful.astype(bool), 'transformation_time_s'] = np.nan
+    return timings.join(size_features, how='inner')
+
+
+def get_r_squared(y, y_predicted):
+    total_sum_of_squares = np.sum((y - np.mean(y)) ** 2)
+    if total_sum_of_squares == 0:
+        return np.nan
+    return 1 - np.sum((y - y_predicted) ** 2) / total_sum_of_squares
+
+
+def fit_cost_model(x, y, kind):
+    """
+    Fits a cost model time = intercept + coefficient * size^exponent of a stage time y to a size feature x.
+    :param kind: LINEAR (exponent 1) or POWER_LAW (exponent fitted as well, between MIN_EXPONENT and MAX_EXPONENT).
+    :return: Tuple of the exponent, coefficient, intercept and the R² of the fit.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if kind == LINEAR:
+        exponents = [1.0]
+    else:
+        # For a given exponent the fit is linear in x^exponent, so the exponent is found by a grid search
+        exponents = np.arange(MIN_EXPONENT, MAX_EXPONENT + 0.001, 0.05)
+    best_fit = None
+    for exponent in exponents:
+        coefficient, intercept = np.polyfit(x ** exponent, y, 1)
+        sum_of_squares = np.sum((y - (intercept + coefficient * x ** exponent)) ** 2)
+        if best_fit is None or sum_of_squares < best_fit[0]:
+            best_fit = (sum_of_squares, exponent, coefficient, intercept)
+    _, exponent, coefficient, intercept = best_fit
+    return exponent, coefficient, intercept, get_r_squared(y, predict(x, exponent, coefficient, intercept))
+
+
+def predict(x, exponent, coefficient, intercept):
+    """
+    :return: The stage time predicted by a cost model (see fit_cost_model) for size feature x.
+    """
+    return intercept + coefficient * np.asarray(x, dtype=float) ** exponent
+
+
+def fit_cost_models(timings: pd.DataFrame, min_models=5):
+    """
+    Fits a linear and a power-law cost model for every combination of stage and size feature.
+    :param timings: See load_timings.
+    :param min_models: Minimal number of models with a time for a stage to fit a cost model.
+    :return: DataFrame with per stage, feature and kind of cost model: the exponent, coefficient, intercept, R² and
+        number of models.
+    """
+    rows = []
+    for stage in [column for column in STAGE_COLUMNS if column in timings.columns]:
+        for feature in SIZE_FEATURES:
+            data = timings[[feature, stage]].dropna()
+            if len(data) < min_models or data[feature].nunique() < 2:
+                continue
+            for kind in [LINEAR, POWER_LAW]:
+                exponent, coefficient, intercept, r_squared = fit_cost_model(data[feature], data[stage], kind)
+                rows.append({'stage': stage, 'feature': feature, 'kind': kind, 'exponent': exponent,
+                             'coefficient': coefficient, 'intercept': intercept, 'r_squared': r_squared,
+                             'n_models': len(data)})
+    return pd.DataFrame(rows, columns=['stage', 'feature', 'kind', 'exponent', 'coefficient', 'intercept', 'r_squared',
+                                       'n_models'])
+
+
+def get_best_cost_models(cost_models: pd.DataFrame):
+    """
+    :param cost_models: See fit_cost_models.
+    :return: The cost model with the highest R² for every stage, indexed by stage.
+    """
+    return cost_models.sort_values('r_squared', ascending=False).drop_duplicates('stage').set_index('stage') \
+        .reindex([stage for stage in STAGE_COLUMNS if stage in set(cost_models['stage'])])
+
+
+def extrapolate(best_cost_models: pd.DataFrame, timings: pd.DataFrame, scale_factors=(2, 5, 10)):
+    """
+    Predicts the stage times of models that are larger than the largest measured model.
+    :param best_cost_models: See get_best_cost_models.
+    :param timings: See load_timings.
+    :param scale_factors: Multiples of the largest measured size feature to predict the stage times for.
+    :return: DataFrame with per stage the feature of its cost model, and per scale factor the feature value and the
+        predicted stage time.
+    """
+    rows = []
+    for stage, cost_model in best_cost_models.iterrows():
+        largest = timings[cost_model['feature']].max()
+        for scale_factor in scale_factors:
+            rows.append({'stage': stage, 'feature': cost_model['feature'], 'kind': cost_model['kind'],
+                         'scale_factor': scale_factor, 'feature_value': largest * scale_factor,
+                         'predicted_time_s': float(predict(largest * scale_factor, cost_model['exponent'],
+                                                           cost_model['coefficient'], cost_model['intercept']))})
+    return pd.DataFrame(rows)
+
+
+def find_outliers(best_cost_models: pd.DataFrame, timings: pd.DataFrame, threshold=3.5, min_deviation_s=0.5):
+    """
+    Flags models of which a stage time deviates strongly from the time predicted by the cost model of the stage. The
+    deviation is the robust z-score of the residual (based on the median absolute deviation), so the outliers themselves
+    hardly affect what is considered normal.
+    :param best_cost_models: See get_best_cost_models.
+    :param timings: See load_timings.
+    :param threshold: Minimal absolute robust z-score of an outlier.
+    :param min_deviation_s: Minimal absolute difference between the measured and predicted time of an outlier, so
+        stages that are predicted almost perfectly do not flag small (e.g. scheduling) differences.
+    :return: DataFrame with per outlier the model, stage, measured and predicted time and its robust z-score, ordered by
+        decreasing absolute z-score.
+    """
+    rows = []
+    for stage, cost_model in best_cost_models.iterrows():
+        data = timings[[cost_model['feature'], stage]].dropna()
+        predicted = pd.Series(predict(data[cost_model['feature']], cost_model['exponent'], cost_model['coefficient'],
+                                      cost_model['intercept']), index=data.index)
+        residuals = data[stage] - predicted
+        median_absolute_deviation = np.median(np.abs(residuals - np.median(residuals)))
+        if median_absolute_deviation == 0:
+            continue
+        # 0.6745 makes the MAD-based z-score comparable to a standard z-score for normally distributed residuals
+        z_scores = 0.6745 * (residuals - np.median(residuals)) / median_absolute_deviation
+        for model in z_scores[(np.abs(z_scores) > threshold) & (np.abs(residuals) >= min_deviation_s)].index:
+            rows.append({'model': model, 'stage': stage, 'time_s': data.loc[model, stage],
+                         'predicted_time_s': predicted[model], 'z_score': z_scores[model]})
+    outliers = pd.DataFrame(rows, columns=['model', 'stage', 'time_s', 'predicted_time_s', 'z_score'])
+    return outliers.reindex(outliers['z_score'].abs().sort_values(ascending=False).index)
+
+
+def analyse_cost_models(results_source, models_folder=FOLDER_WITH_ONTOLOGIES, threshold=3.5, min_deviation_s=0.5,
+                        scale_factors=(2, 5, 10), store_path=RESULTS_STORE_PATH):
+    """
+    Fits the cost models of the stages for the results of a run of the automated validation, prints the best cost
+    models, the extrapolated stage times and the outliers, and writes all cost models and the outliers to CSV files
+    next to the results (next to the results store for a run in the store).
+    :param results_source: Run id in the results store, or CSV file with the results of the automated validation.
+    :param models_folder: Folder with the OntoUML JSON files of the models.
+    :param threshold: See find_outliers.
+    :param min_deviation_s: See find_outliers.
+    :param scale_factors: See extrapolate.
+    :param store_path: Location of the results store.
+    """
+    if results_source is None:
+        with ResultsStore(store_path) as store:
+            results_source = store.get_latest_run_id()
+    timings = load_timings(results_source, load_size_features(models_folder), store_path)
+    cost_models = fit_cost_models(timings)
+    best_cost_models = get_best_cost_models(cost_models)
+
+    if is_results_csv(results_source):
+        output_prefix = results_source[:-4]
+    else:
+        output_prefix = os.path.join(os.path.dirname(store_path), f"run {results_source}")
+    print(f"Cost models for {results_source} ({len(timings)} models)")
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print("\nPer stage, R² of the linear and power-law fits per size feature:")
+        print(cost_models.pivot_table(index=['stage', 'kind'], columns='feature', values='r_squared', sort=False)
+              .round(3))
+        print("\nPer stage, fitted exponent of the power-law fit per size feature (> 1 is super-linear):")
+        print(cost_models[cost_models['kind'] == POWER_LAW].pivot_table(index='stage', columns='feature',
+                                                                        values='exponent', sort=False).round(2))
+        print("\nBest cost model per stage:")
+        print(best_cost_models.round(4))
+        print("\nExtrapolated stage times:")
+        print(extrapolate(best_cost_models, timings, scale_factors).round(2).to_string(index=False))
+
+        outliers = find_outliers(best_cost_models, timings, threshold, min_deviation_s)
+        print(f"\n{len(outliers)} stage times deviate from their prediction (|robust z-score| > {threshold} and at "
+              f"least {min_deviation_s} s):")
+        if len(outliers) > 0:
+            print(outliers.round(2).to_string(index=False))
+
+    cost_models.to_csv(output_prefix + ' cost models.csv', index=False)
+    outliers.to_csv(output_prefix + ' timing outliers.csv', index=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Fit cost models of the transformation stages to the size of the "
+                                                 "models, and flag models with deviating stage times.")
+    parser.add_argument('results', nargs='?', default='automated_validation_results.csv',
+                        help="Run id in the results store, or CSV file with the results of the automated validation.")
+    parser.add_argument('--latest', action='store_true', help="Use the latest run in the results store.")
+    parser.add_argument('--results-store', default=RESULTS_STORE_PATH, help="Location of the results store.")
+    parser.add_argument('--models-folder', default=FOLDER_WITH_ONTOLOGIES,
+                        help="Folder with the OntoUML JSON files of the models.")
+    parser.add_argument('--threshold', type=float, default=3.5,
+                        help="Minimal absolute robust z-score of the residual of an outlier.")
+    parser.add_argument('--min-deviation', type=float, default=0.5,
+                        help="Minimal difference in seconds between the measured and predicted time of an outlier.")
+    parser.add_argument('--scale-factor', type=float, action='append', dest='scale_factors',
+                        help="Multiple of the largest measured model to extrapolate the stage times to (repeatable, "
+                             "default 2, 5 and 10).")
+    args = parser.parse_args()
+    analyse_cost_models(None if args.latest else args.results, args.models_folder, args.threshold, args.min_deviation,
+                        args.scale_factors or (2, 5, 10), args.results_store)
@@ -1,11 +1,18 @@
 #  Copyright (c) 2024.
 import pandas as pd
 import os
+import sys
+
+from OntoUML2JavaAutomatedValidation.ResultsStore import ResultsStore
 
 
 store_location = r'C:\Users\64guu\Documents\UT - Computer Science\Thesis lokaal\Validation\for_latex'
 
-df_overall = pd.read_csv(r'results/transformation_results 2024-10-21 12-57-22 Special Letters allowed.csv')
+# Run id in the results store, by default the latest run
+run_id = sys.argv[1] if len(sys.argv) > 1 else None
+
+results_store = ResultsStore()
+df_overall = results_store.get_results(run_id)
 
 # df_overall_success = df_overall[df_overall['transformation_successful']]
 # df_overall_success = df_overall_success[['model', 'n_classes', 'transformation_time_s', 'atl_warnings_present', 'generated_code_compiles']]
@@ -16,9 +23,11 @@ df_overall = pd.read_csv(r'results/transformation_results 2024-10-21 12-57-22 Sp
 
 
 
-df_fault_modes = pd.read_csv(
-    r'results/transformation_results 2024-10-21 12-57-22 Special Letters allowed fault modes analysed.csv')
+# Stored by ValidationAnalysis.analyse_fault_modes
+df_fault_modes = results_store.get_fault_modes(df_overall.attrs['run_id'])
+results_store.close()
 
+df_fault_modes = df_fault_modes[df_fault_modes['compile_error_category'].notna()]
 df_fault_modes = df_fault_modes[['model', 'compile_error_category', 'compile_error_category_detail']]
 print(df_fault_modes)
 
@@ -0,0 +1,69 @@
+#  Copyright (c) 2024.
+import json
+import os
+
+
+class ResultJournal:
+    """
+    Append-only journal (JSON Lines) of the results of the automated validation.
+    Each result is written to disk as soon as it is available, so the results of a run that crashes or is interrupted
+    are kept and the run can be resumed.
+    """
+
+    def __init__(self, path, run_id=None):
+        """
+        Opens a journal. An existing journal is continued.
+        :param path: Location of the journal file.
+        :param run_id: Identifier of the current run, added to every appended result as 'run_id'.
+        """
+        self.path = path
+        self.run_id = run_id
+        self.__remove_incomplete_last_line()
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def __remove_incomplete_last_line(self):
+        """
+        A crash while appending may leave a partially written last line, which is removed.
+        """
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            content = f.read()
+            if content and not content.endswith(b'\n'):
+                f.truncate(content.rfind(b'\n') + 1)
+
+    def append(self, result: dict):
+        """
+        Appends the result of a single model and forces it to disk.
+        :param result: Dict with the results of the transformation of a model.
+        """
+        if self.run_id is not None:
+            result = result | {'run_id': self.run_id}
+        # Values that are not JSON serializable (e.g. the set of ATL warnings) are stored as their string
+        # representation, which is how they end up in the results CSV as well.
+        self.file.write(json.dumps(result, default=str) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def read_results(self):
+        """
+        :return: Generator over the results in the journal.
+        """
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def get_journaled_models(self) -> set:
+        """
+        :return: Names of the models of which the results are in the journal.
+        """
+        return {result['model'] for result in self.read_results()}
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
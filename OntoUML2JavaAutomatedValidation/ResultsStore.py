@@ -0,0 +1,414 @@
+#  Copyright (c) 2024.
+"""
+SQLite store of the results of the automated validation, keyed by run id and model, so the analysis scripts query a
+run (or the results of a model over many runs) instead of parsing the timestamped results CSV files.
+
+Tables:
+- runs: a row per run (run id, start time, kind and the file it was imported from, if any);
+- results: the results of every model of a run. For an incremental run these include the results reused from the
+  previous run; 'source_run_id' records the run that actually transformed the model;
+- compile_diagnostics: the diagnostics of the compile check of a model (see CompileLogParser), keyed by the run that
+  transformed the model;
+- fault_modes: the ATL warnings and compile error category of every model of a run (see ValidationAnalysis).
+"""
+import argparse
+import datetime
+import os
+import re
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+RESULTS_STORE_PATH = os.path.join(os.path.dirname(__file__), 'results', 'transformation_results.sqlite')
+
+RUN_KIND_TEST_RUN = 'test run'
+RUN_KIND_INCREMENTAL = 'incremental'
+RUN_KIND_IMPORTED = 'imported'
+
+# Declared type of the columns that are stored as booleans (SQLite stores them as 0 and 1)
+BOOLEAN = 'BOOLEAN'
+
+# Columns of the results that are always present, with their type. Other columns of the results (e.g. the resources
+# per ANT target) are added to the table when they first occur, with a type derived from their values.
+RESULT_COLUMNS = {
+    'transformation_successful': BOOLEAN,
+    'generated_code_compiles': BOOLEAN,
+    'transformation_failed_at_stage': 'TEXT',
+    'transformation_time_s': 'REAL',
+    'ontouml_read_errors': 'TEXT',
+    'atl_warnings': 'TEXT',
+    'acceleo_warnings': 'TEXT',
+    'compilation_errors': 'TEXT',
+    'read_ontouml_time_s': 'REAL',
+    'atl_time_s': 'REAL',
+    'acceleo_time_s': 'REAL',
+    'compile_check_time_s': 'REAL',
+    'n_classes': 'INTEGER',
+    'model_hash': 'TEXT',
+}
+
+DIAGNOSTIC_COLUMNS = ['run_id', 'model', 'file', 'line', 'kind', 'message', 'category', 'detail']
+FAULT_MODE_COLUMNS = ['model', 'atl_warnings_present', 'compile_error_category', 'compile_error_category_detail']
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    source_file TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_started_at ON runs (started_at);
+
+CREATE TABLE IF NOT EXISTS results (
+    run_id TEXT NOT NULL REFERENCES runs (run_id),
+    model TEXT NOT NULL,
+    source_run_id TEXT NOT NULL REFERENCES runs (run_id),
+    {', '.join(f'{column} {column_type}' for column, column_type in RESULT_COLUMNS.items())},
+    PRIMARY KEY (run_id, model)
+);
+CREATE INDEX IF NOT EXISTS results_model ON results (model, source_run_id);
+
+CREATE TABLE IF NOT EXISTS compile_diagnostics (
+    run_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    file TEXT,
+    line INTEGER,
+    kind TEXT,
+    message TEXT,
+    category TEXT,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS compile_diagnostics_model ON compile_diagnostics (run_id, model);
+CREATE INDEX IF NOT EXISTS compile_diagnostics_category ON compile_diagnostics (category);
+
+CREATE TABLE IF NOT EXISTS fault_modes (
+    run_id TEXT NOT NULL REFERENCES runs (run_id),
+    model TEXT NOT NULL,
+    atl_warnings_present TEXT,
+    compile_error_category TEXT,
+    compile_error_category_detail TEXT,
+    PRIMARY KEY (run_id, model)
+);
+"""
+
+# Run ids and file names of the results contain the start time of the run, e.g. '2024-10-21 12-57-22'
+RUN_TIMESTAMP_REGEX = re.compile(r"(\d{4}-\d{2}-\d{2}) (\d{2})-(\d{2})-(\d{2})")
+
+
+def get_run_start(name: str):
+    """
+    :param name: Run id or name of a results file.
+    :return: The start time of the run contained in the name (as 'YYYY-MM-DD HH:MM:SS'), or None if there is none.
+    """
+    if match := RUN_TIMESTAMP_REGEX.search(name):
+        return f"{match.group(1)} {match.group(2)}:{match.group(3)}:{match.group(4)}"
+    return None
+
+
+def is_results_csv(source) -> bool:
+    """
+    :param source: Run id in the results store, or path of a results CSV file.
+    :return: Whether the source is a results CSV file.
+    """
+    return source is not None and str(source).endswith('.csv')
+
+
+def _quote(column) -> str:
+    """
+    :return: The column name as an SQL identifier.
+    """
+    return '"' + str(column).replace('"', '""') + '"'
+
+
+def _get_column_type(values: pd.Series) -> str:
+    """
+    :return: SQLite type of a column with the given values.
+    """
+    if pd.api.types.is_bool_dtype(values):
+        return BOOLEAN
+    if pd.api.types.is_integer_dtype(values):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(values):
+        return 'REAL'
+    present = values.dropna()
+    if len(present) > 0 and present.map(lambda value: isinstance(value, (bool, np.bool_))).all():
+        return BOOLEAN
+    return 'TEXT'
+
+
+def _to_sql_value(value):
+    """
+    :return: The value as a type supported by sqlite3. Missing values (None or NaN) become NULL, and values such as the
+        set of ATL warnings are stored as their string representation (as in the results CSV).
+    """
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return int(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, (int, float, str)):
+        return value
+    return str(value)
+
+
+class ResultsStore:
+    """
+    SQLite database with the results of the runs of the automated validation, see the module documentation.
+    """
+
+    def __init__(self, path=RESULTS_STORE_PATH):
+        """
+        Opens the store, and creates it if it does not exist yet.
+        :param path: Location of the SQLite database file.
+        """
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def __get_table_columns(self, table) -> dict:
+        """
+        :return: Dict with the columns of the table -> their declared type, in the order of the table.
+        """
+        return {row[1]: row[2] for row in self.connection.execute(f'PRAGMA table_info("{table}")')}
+
+    def __add_run(self, run_id, started_at, kind, source_file=None):
+        self.connection.execute("INSERT OR REPLACE INTO runs (run_id, started_at, kind, source_file) VALUES "
+                                "(?, ?, ?, ?)", (run_id, started_at, kind, source_file))
+
+    def store_run(self, run_id, results: pd.DataFrame, compile_diagnostics: pd.DataFrame = None,
+                  kind=RUN_KIND_TEST_RUN, started_at=None, source_file=None):
+        """
+        Stores the results of a run, replacing the results stored earlier for the same run id.
+        :param run_id: Id of the run.
+        :param results: DataFrame with a row per model (the columns of the results CSV). A 'run_id' column records the
+            run that transformed the model, e.g. when the results of a previous run are reused in an incremental run.
+        :param compile_diagnostics: DataFrame with a row per diagnostic of a compile check (with the columns of
+            DIAGNOSTIC_COLUMNS), or None.
+        :param kind: One of the RUN_KIND_* constants.
+        :param started_at: Start time of the run ('YYYY-MM-DD HH:MM:SS'), by default the time in the run id or now.
+        :param source_file: File the results are imported from, if any.
+        """
+        started_at = started_at or get_run_start(run_id) or datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        results = results.drop(columns=[column for column in results.columns if str(column).startswith('Unnamed: ')])
+        if 'run_id' in results.columns:
+            source_run_ids = results['run_id'].where(results['run_id'].notna(), run_id).astype(str)
+        else:
+            source_run_ids = pd.Series(run_id, index=results.index)
+        results = results.drop(columns=['run_id'], errors='ignore')
+
+        with self.connection:
+            self.__add_run(run_id, started_at, kind, source_file)
+            # Runs of which results are reused, but that are not stored themselves (e.g. an interrupted run that was
+            # resumed), so the results of a model can be ordered by the start of the run that transformed it
+            for source_run_id in source_run_ids.unique():
+                self.connection.execute("INSERT OR IGNORE INTO runs (run_id, started_at, kind) VALUES (?, ?, ?)",
+                                        (source_run_id, get_run_start(source_run_id) or started_at, kind))
+
+            table_columns = self.__get_table_columns('results')
+            for column in results.columns:
+                if column not in table_columns:
+                    self.connection.execute(f"ALTER TABLE results ADD COLUMN {_quote(column)} "
+                                            f"{_get_column_type(results[column])}")
+            self.connection.execute("DELETE FROM results WHERE run_id = ?", (run_id,))
+            columns = ['run_id', 'source_run_id'] + list(results.columns)
+            rows = ([run_id, source_run_id] + [_to_sql_value(value) for value in values]
+                    for source_run_id, values in zip(source_run_ids, results.itertuples(index=False)))
+            self.connection.executemany(
+                f"INSERT INTO results ({', '.join(_quote(column) for column in columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))})", rows)
+
+            if compile_diagnostics is not None:
+                self.store_compile_diagnostics(compile_diagnostics, run_id)
+
+    def store_compile_diagnostics(self, compile_diagnostics: pd.DataFrame, default_run_id=None):
+        """
+        Stores the diagnostics of compile checks, replacing the diagnostics stored earlier for the same run and model.
+        :param compile_diagnostics: DataFrame with the columns of DIAGNOSTIC_COLUMNS.
+        :param default_run_id: Run id of diagnostics without one.
+        """
+        run_ids = compile_diagnostics['run_id'].where(compile_diagnostics['run_id'].notna(), default_run_id)
+        with self.connection:
+            self.connection.executemany("DELETE FROM compile_diagnostics WHERE run_id = ? AND model = ?",
+                                        set(zip(run_ids, compile_diagnostics['model'])))
+            rows = ([run_id] + [_to_sql_value(value) for value in values] for run_id, values in
+                    zip(run_ids, compile_diagnostics[DIAGNOSTIC_COLUMNS[1:]].itertuples(index=False)))
+            self.connection.executemany(f"INSERT INTO compile_diagnostics ({', '.join(DIAGNOSTIC_COLUMNS)}) "
+                                        f"VALUES ({', '.join('?' * len(DIAGNOSTIC_COLUMNS))})", rows)
+
+    def store_fault_modes(self, run_id, fault_modes: pd.DataFrame):
+        """
+        Stores the fault modes of the models of a run, replacing the fault modes stored earlier for the run.
+        :param run_id: Id of a stored run.
+        :param fault_modes: DataFrame with the columns of FAULT_MODE_COLUMNS.
+        """
+        with self.connection:
+            self.connection.execute("DELETE FROM fault_modes WHERE run_id = ?", (run_id,))
+            self.connection.executemany(
+                f"INSERT INTO fault_modes (run_id, {', '.join(FAULT_MODE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(FAULT_MODE_COLUMNS) + 1))})",
+                ([run_id] + [_to_sql_value(value) for value in values]
+                 for values in fault_modes[FAULT_MODE_COLUMNS].itertuples(index=False)))
+
+    def import_csv(self, csv_path, run_id=None) -> str:
+        """
+        Imports a results CSV file (and the '... compile diagnostics.csv' file next to it, if present) as a run.
+        :param csv_path: Location of the results CSV file.
+        :param run_id: Id of the run, by default the name of the file without extension.
+        :return: The id of the run.
+        """
+        run_id = run_id or os.path.splitext(os.path.basename(csv_path))[0]
+        started_at = get_run_start(os.path.basename(csv_path)) or \
+            datetime.datetime.fromtimestamp(os.path.getmtime(csv_path)).strftime('%Y-%m-%d %H:%M:%S')
+        diagnostics_path = csv_path[:-4] + ' compile diagnostics.csv'
+        compile_diagnostics = pd.read_csv(diagnostics_path) if os.path.isfile(diagnostics_path) else None
+        self.store_run(run_id, pd.read_csv(csv_path, index_col=0), compile_diagnostics, RUN_KIND_IMPORTED,
+                       started_at, os.path.abspath(csv_path))
+        return run_id
+
+    def get_runs(self) -> pd.DataFrame:
+        """
+        :return: DataFrame with a row per run (latest first), with its start time, kind, source file and number of
+            models.
+        """
+        return pd.read_sql_query("SELECT runs.*, COUNT(results.model) AS n_models FROM runs "
+                                 "LEFT JOIN results ON results.run_id = runs.run_id GROUP BY runs.run_id "
+                                 "ORDER BY runs.started_at DESC, runs.run_id DESC", self.connection)
+
+    def get_latest_run_id(self):
+        """
+        :return: Id of the last started run of which results are stored, or None if there is none.
+        """
+        row = self.connection.execute("SELECT run_id FROM runs WHERE run_id IN (SELECT run_id FROM results) "
+                                      "ORDER BY started_at DESC, run_id DESC LIMIT 1").fetchone()
+        return row[0] if row is not None else None
+
+    def __restore_booleans(self, df: pd.DataFrame, table) -> pd.DataFrame:
+        """
+        Converts the columns with declared type BOOLEAN from 0 and 1 back to booleans (object columns with None for
+        missing values, as in the results CSV).
+        """
+        for column, column_type in self.__get_table_columns(table).items():
+            if column_type == BOOLEAN and column in df.columns:
+                if df[column].notna().all():
+                    df[column] = df[column].astype(bool)
+                else:
+                    df[column] = df[column].map({1: True, 0: False}).astype(object)
+                    df[column] = df[column].where(df[column].notna(), None)
+        return df
+
+    def get_results(self, run_id=None) -> pd.DataFrame:
+        """
+        :param run_id: Id of the run, by default the latest run.
+        :return: DataFrame with the results of the models of the run, sorted by model, with the columns of the results
+            CSV. As in the CSV, the 'run_id' column is the run that transformed the model. The id of the run is in
+            df.attrs['run_id'].
+        """
+        run_id = run_id or self.get_latest_run_id()
+        if run_id is None:
+            raise ValueError(f"No results in {self.path}")
+        df = pd.read_sql_query("SELECT * FROM results WHERE run_id = ? ORDER BY model", self.connection,
+                               params=(run_id,))
+        if df.empty:
+            raise ValueError(f"No results of run '{run_id}' in {self.path}")
+        df = df.drop(columns=['run_id']).rename(columns={'source_run_id': 'run_id'})
+        df = self.__restore_booleans(df, 'results')
+        df.attrs['run_id'] = run_id
+        return df
+
+    def get_compile_diagnostics(self, run_id=None, model=None) -> pd.DataFrame:
+        """
+        :param run_id: Id of the run, by default the latest run.
+        :param model: Name of a model to get the diagnostics of, by default all models.
+        :return: DataFrame with the diagnostics of the compile checks of the models of the run (including those of
+            results reused from previous runs), with the columns of DIAGNOSTIC_COLUMNS.
+        """
+        run_id = run_id or self.get_latest_run_id()
+        query = ("SELECT compile_diagnostics.* FROM results JOIN compile_diagnostics "
+                 "ON compile_diagnostics.run_id = results.source_run_id AND compile_diagnostics.model = results.model "
+                 "WHERE results.run_id = ?")
+        params = [run_id]
+        if model is not None:
+            query += " AND results.model = ?"
+            params.append(model)
+        return pd.read_sql_query(query + " ORDER BY compile_diagnostics.rowid", self.connection, params=params)
+
+    def get_fault_modes(self, run_id=None) -> pd.DataFrame:
+        """
+        :param run_id: Id of the run, by default the latest run.
+        :return: DataFrame with the fault modes of the models of the run (see ValidationAnalysis.analyse_fault_modes),
+            with the columns of FAULT_MODE_COLUMNS. Empty if the fault modes of the run have not been analysed.
+        """
+        run_id = run_id or self.get_latest_run_id()
+        return pd.read_sql_query(f"SELECT {', '.join(FAULT_MODE_COLUMNS)} FROM fault_modes WHERE run_id = ? "
+                                 f"ORDER BY model", self.connection, params=(run_id,))
+
+    def get_model_history(self, model, column='transformation_time_s', last_n=20) -> pd.DataFrame:
+        """
+        Gets a result of a model over the runs that transformed it, e.g. its transformation time over the last 20 runs.
+        Results reused by incremental runs are counted once, for the run that transformed the model.
+        :param model: Name of the model.
+        :param column: Column of the results.
+        :param last_n: Number of runs, None for all runs.
+        :return: DataFrame with per run (latest first) its 'run_id', 'started_at' and the value of the column.
+        """
+        column_type = self.__get_table_columns('results').get(column)
+        if column_type is None:
+            raise ValueError(f"Unknown results column '{column}'")
+        df = pd.read_sql_query(
+            f'SELECT DISTINCT results.source_run_id AS run_id, runs.started_at, results.{_quote(column)} FROM results '
+            f'JOIN runs ON runs.run_id = results.source_run_id WHERE results.model = ? '
+            f'ORDER BY runs.started_at DESC, results.source_run_id DESC LIMIT ?',
+            self.connection, params=(model, -1 if last_n is None else last_n))
+        return self.__restore_booleans(df, 'results')
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def load_results(source=None, store_path=RESULTS_STORE_PATH) -> pd.DataFrame:
+    """
+    Loads the results of the automated validation, for the analysis scripts.
+    :param source: Run id in the results store, or path of a results CSV file. By default the latest run in the store.
+    :param store_path: Location of the results store.
+    :return: DataFrame with a row per model, see ResultsStore.get_results.
+    """
+    if is_results_csv(source):
+        return pd.read_csv(source, index_col=0)
+    with ResultsStore(store_path) as store:
+        return store.get_results(source)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Store of the results of the automated validation.")
+    parser.add_argument('--store', default=RESULTS_STORE_PATH, help="Location of the results store.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    import_parser = subparsers.add_parser('import', help="Import results CSV files as runs.")
+    import_parser.add_argument('csv_files', nargs='+', metavar='CSV')
+    subparsers.add_parser('runs', help="List the stored runs.")
+    history_parser = subparsers.add_parser('history', help="Show a result of a model over the last runs.")
+    history_parser.add_argument('model')
+    history_parser.add_argument('--column', default='transformation_time_s')
+    history_parser.add_argument('--last', type=int, default=20, help="Number of runs.")
+    args = parser.parse_args()
+
+    with ResultsStore(args.store) as results_store, pd.option_context('display.width', 200,
+                                                                       'display.max_rows', None):
+        if args.command == 'import':
+            for csv_file in args.csv_files:
+                print(f"Imported {csv_file} as run '{results_store.import_csv(csv_file)}'")
+        elif args.command == 'runs':
+            print(results_store.get_runs().to_string(index=False))
+        else:
+            print(results_store.get_model_history(args.model, args.column, args.last).to_string(index=False))
@@ -4,10 +4,15 @@ import pandas as pd
 import scienceplots
 plt.style.use(['science', 'scatter'])
 import numpy as np
+import sys
 
-file_path = r'results/transformation_results 2024-10-21 12-57-22 Special Letters allowed.csv'
+from OntoUML2JavaAutomatedValidation.ResultsStore import load_results
 
-df = pd.read_csv(file_path)
+# Run id in the results store or a results CSV file (e.g. 'results/transformation_results <timestamp>.csv'), by default
+# the latest run in the results store
+source = sys.argv[1] if len(sys.argv) > 1 else None
+
+df = load_results(source)
 
 # filter for successful transformation
 df = df[df['transformation_successful']]
@@ -1,18 +1,26 @@
 #  Copyright (c) 2024.
-import pandas as pd
+import argparse
 import re
 
+import pandas as pd
+
+from OntoUML2JavaAutomatedValidation.ResultsStore import RESULTS_STORE_PATH, ResultsStore, is_results_csv, \
+    load_results
+# The compile error categories are shared with the parser of the complete compile output
+from OntoUML2JavaTransformationExecution.CompileLogParser import COMPILE_ERROR_CANNOT_OVERRIDE_FROM_SUPER, \
+    COMPILE_ERROR_MULTIPLE_INHERITENCE, COMPILE_ERROR_PATTERNS, COMPILE_ERROR_RESERVED_KEYWORD_NAME, \
+    COMPILE_ERROR_VARIABLE_ALREADY_DEFINED, NON_RESOLVED_COMPILE_ERROR_CATEGORY, classify_compile_error
+
 WARNING_GENERALISATION_SET = "Contains GeneralizationSet"
 WARNING_PROPERTY_WITHOUT_TYPE = "Contains property without type"
 WARNING_EMPTY_STRING = "Contains empty string"
 
-COMPILE_ERROR_MULTIPLE_INHERITENCE = "Multiple class inheritance present"
-COMPILE_ERROR_VARIABLE_ALREADY_DEFINED = "Duplicate variable definition"
-COMPILE_ERROR_CANNOT_OVERRIDE_FROM_SUPER = "Cannot override from super"
-COMPILE_ERROR_RESERVED_KEYWORD_NAME = "Reserved keyword name"
-NON_RESOLVED_COMPILE_ERROR_CATEGORY = 'Could not extract'
-
-java_name_regex = r"[a-zA-Z_$][a-zA-Z_$0-9]*"
+# ATL warning -> message of the warning in the output of the ATL transformation
+ATL_WARNING_MESSAGES = {
+    WARNING_GENERALISATION_SET: "Warning: OntoUML model contains GeneralizationSets",
+    WARNING_PROPERTY_WITHOUT_TYPE: "Warning: Property without type found in OntoUML model",
+    WARNING_EMPTY_STRING: "Warning: Empty string found",
+}
 
 pd.options.mode.copy_on_write = True
 
@@ -23,91 +31,115 @@ def extract_compile_error(error_str: str):
     :param error_str: String of the console output of a failed Java build.
     :return: A 2-tuple of an error category and detail field with the corresponding class/variable name(s)
     """
+    return classify_compile_error(error_str)
+
+
+def _is_str(series: pd.Series) -> pd.Series:
+    """
+    :return: Boolean series with whether each value is a string, i.e. not empty (NaN) in the CSV file.
+    """
+    return series.map(lambda value: isinstance(value, str)).astype(bool)
+
+
+def get_atl_warning_flags(atl_warnings: pd.Series) -> pd.DataFrame:
+    """
+    :param atl_warnings: Series with the ATL warnings of each model (column 'atl_warnings' of the results).
+    :return: DataFrame with the same index and a boolean column per ATL warning (see ATL_WARNING_MESSAGES), whether
+    the warnings of the model contain it.
+    """
+    is_str = _is_str(atl_warnings)
+    return pd.DataFrame({warning: atl_warnings.str.contains(message, regex=False) & is_str
+                         for warning, message in ATL_WARNING_MESSAGES.items()},
+                        index=atl_warnings.index).astype(bool)
+
+
+def get_atl_warnings_present(atl_warning_flags: pd.DataFrame) -> pd.Series:
+    """
+    :param atl_warning_flags: See get_atl_warning_flags.
+    :return: Series with per model the ATL warnings it contains, separated by commas, or None if it contains none.
+    """
+    warnings_present = pd.Series('', index=atl_warning_flags.index, dtype=object)
+    for warning in atl_warning_flags.columns:
+        warnings_present += atl_warning_flags[warning].map({True: warning + ', ', False: ''})
+    # Remove the last comma
+    return warnings_present.str[:-2].where(warnings_present != '', None)
 
-    # Multiple inheritence
-    if match := re.compile(f"public class ({java_name_regex}) extends {java_name_regex}, {java_name_regex}").search(error_str):
-        return (COMPILE_ERROR_MULTIPLE_INHERITENCE, match.group(1))
-    # Variable already defined
-    if match := re.compile(f"error: (variable|method) ({java_name_regex})(\\(\\))? is already defined in {java_name_regex} ({java_name_regex})").search(error_str):
-        return (COMPILE_ERROR_VARIABLE_ALREADY_DEFINED, f"variable {match.group(2)} in {match.group(4)}")
-    # Usage of reserved name
-    if match := re.compile("(" + java_name_regex + r")\.java.{0,10} error: <identifier> expected").search(error_str):
-        return (COMPILE_ERROR_RESERVED_KEYWORD_NAME, match.group(1))
-    # Cannot override
-    if match := re.compile(f"error: ({java_name_regex})(\\(\\))? in ({java_name_regex}) cannot override {java_name_regex}(\\(\\))? in ({java_name_regex})").search(error_str):
-        return COMPILE_ERROR_CANNOT_OVERRIDE_FROM_SUPER, f"attribute {match.group(1)} in classes {match.group(3)} and {match.group(5)}"
-    return (NON_RESOLVED_COMPILE_ERROR_CATEGORY, None)
+
+def _expand_detail_template(groups: pd.DataFrame, detail_template: str) -> pd.Series:
+    """
+    Column-wise version of re.Match.expand for templates with group references only.
+    :param groups: The groups of the matches, as returned by Series.str.extract.
+    :param detail_template: Template with references to groups (a backslash followed by the group number).
+    """
+    detail = pd.Series('', index=groups.index, dtype=object)
+    # Literal text and group numbers alternate
+    for position, part in enumerate(re.split(r'\\(\d+)', detail_template)):
+        detail += groups[int(part) - 1].fillna('') if position % 2 else part
+    return detail
 
 
-def analyse_fault_modes(file_path, print_ontologies_with_warning_or_error=None):
+def classify_compile_errors(compilation_errors: pd.Series) -> pd.DataFrame:
+    """
+    Column-wise version of extract_compile_error.
+    :param compilation_errors: Series with the console output of the Java build of each model (column
+    'compilation_errors' of the results).
+    :return: DataFrame with the same index and columns 'compile_error_category' and 'compile_error_category_detail',
+    which are None for models without compilation errors.
     """
-    For a csv file with the results of the executed automated validation, extracts the fault modes.
+    has_errors = _is_str(compilation_errors)
+    category = pd.Series([None] * len(compilation_errors), index=compilation_errors.index, dtype=object)
+    detail = pd.Series([None] * len(compilation_errors), index=compilation_errors.index, dtype=object)
+    category[has_errors] = NON_RESOLVED_COMPILE_ERROR_CATEGORY
+
+    unresolved = compilation_errors[has_errors]
+    for compile_error_category, (pattern, detail_template) in COMPILE_ERROR_PATTERNS.items():
+        groups = unresolved.str.extract(pattern)
+        matches = groups[0].notna()
+        category[matches.index[matches]] = compile_error_category
+        detail[matches.index[matches]] = _expand_detail_template(groups[matches], detail_template)
+        unresolved = unresolved[~matches]
+    return pd.DataFrame({'compile_error_category': category, 'compile_error_category_detail': detail})
+
+
+def analyse_fault_modes(source=None, print_ontologies_with_warning_or_error=None, store_path=RESULTS_STORE_PATH):
+    """
+    For the results of the executed automated validation, extracts the fault modes.
     Including the type of ATL warnings and the category of compilation error.
 
-    For projects that do not yield valid Java code, a separate CSV is created that contains these compilation
-    error categories.
+    The fault modes of all models are stored in the results store. For a results CSV file, a separate CSV is created
+    instead that contains the compilation error categories of the projects that do not yield valid Java code; the
+    results CSV itself is not modified.
 
-    :param file_path: location of CSV file with the results of the automated performed validation.
+    :param source: Run id in the results store, or location of a CSV file with the results of the automated performed
+    validation. By default the latest run in the results store.
     :param print_ontologies_with_warning_or_error: For a specific ATL warning or Compile error category, list the models
     that contain such a warning/error. (I.e., one of the constants defined at the top of this file.
-    :return:
+    :param store_path: Location of the results store.
+    :return: DataFrame with the fault modes per model (see ResultsStore.FAULT_MODE_COLUMNS).
     """
-    df: pd.DataFrame = pd.read_csv(file_path, index_col=0)
-    df['atl_warnings_present'] = None
+    df: pd.DataFrame = load_results(source, store_path)
+    atl_warning_flags = get_atl_warning_flags(df['atl_warnings'])
+    df['atl_warnings_present'] = get_atl_warnings_present(atl_warning_flags)
 
-    not_compiled = df[df['transformation_successful'] & ~df['generated_code_compiles']]
+    not_compiled = df[df['transformation_successful'] & (df['generated_code_compiles'] != True)]
 
-    print(f"Fault mode analysis for {file_path}")
+    print(f"Fault mode analysis for {source if is_results_csv(source) else 'run ' + df.attrs['run_id']}")
     print(f"{len(not_compiled)} models yield code that is not compilable")
 
-    not_compiled['compile_error_category'] = None
-    not_compiled['compile_error_category_detail'] = None
+    compile_errors = classify_compile_errors(df['compilation_errors'])
+    not_compiled = not_compiled.join(compile_errors.loc[not_compiled.index])
 
-    ATL_warnings_occurrence = {
-        WARNING_GENERALISATION_SET: [],
-        WARNING_PROPERTY_WITHOUT_TYPE: [],
-        WARNING_EMPTY_STRING: []
-    }
+    ATL_warnings_occurrence = {warning: df.loc[atl_warning_flags[warning], 'model'].to_list()
+                               for warning in ATL_WARNING_MESSAGES}
 
     compile_error_categories_occurences = {
-        COMPILE_ERROR_CANNOT_OVERRIDE_FROM_SUPER: [],
-        COMPILE_ERROR_RESERVED_KEYWORD_NAME: [],
-        COMPILE_ERROR_VARIABLE_ALREADY_DEFINED: [],
-        COMPILE_ERROR_MULTIPLE_INHERITENCE: [],
-        NON_RESOLVED_COMPILE_ERROR_CATEGORY: []
+        compile_error_category: df.loc[compile_errors['compile_error_category'] == compile_error_category,
+                                       'model'].to_list()
+        for compile_error_category in [COMPILE_ERROR_CANNOT_OVERRIDE_FROM_SUPER, COMPILE_ERROR_RESERVED_KEYWORD_NAME,
+                                       COMPILE_ERROR_VARIABLE_ALREADY_DEFINED, COMPILE_ERROR_MULTIPLE_INHERITENCE,
+                                       NON_RESOLVED_COMPILE_ERROR_CATEGORY]
     }
 
-    for index, row in df.iterrows():
-        # ATL Warnings
-        warnings_str = row['atl_warnings']
-        model_name = row['model']
-        if isinstance(warnings_str, str):
-            new_warning_str = '' # With unique warnings
-            if "Warning: OntoUML model contains GeneralizationSets" in warnings_str:
-                ATL_warnings_occurrence[WARNING_GENERALISATION_SET].append(model_name)
-                new_warning_str += WARNING_GENERALISATION_SET + ', '
-            if "Warning: Property without type found in OntoUML model" in warnings_str:
-                ATL_warnings_occurrence[WARNING_PROPERTY_WITHOUT_TYPE].append(model_name)
-                new_warning_str += WARNING_PROPERTY_WITHOUT_TYPE + ', '
-            if "Warning: Empty string found" in warnings_str:
-                ATL_warnings_occurrence[WARNING_EMPTY_STRING].append(model_name)
-                new_warning_str += WARNING_EMPTY_STRING + ', '
-
-            if new_warning_str.endswith(', '):
-                # I.e., contains warning
-                df.loc[index, 'atl_warnings_present'] = new_warning_str[:-2] # and remove last comma
-                if index in not_compiled.index:
-                    not_compiled.loc[index, 'atl_warnings_present'] = new_warning_str[:-2]  # and remove last comma
-
-        # Compilation errors
-        compile_error_string = row['compilation_errors']
-
-        if isinstance(compile_error_string, str): # so not empty or none
-            compile_error_category, compile_error_details = extract_compile_error(compile_error_string)
-            compile_error_categories_occurences[compile_error_category].append(model_name)
-            not_compiled.loc[index, 'compile_error_category'] = compile_error_category
-            not_compiled.loc[index, 'compile_error_category_detail'] = compile_error_details
-
     print("ATL Warnings present in all projects:")
     print({k: len(v) for k, v in ATL_warnings_occurrence.items()})
 
@@ -121,23 +153,30 @@ def analyse_fault_modes(file_path, print_ontologies_with_warning_or_error=None):
         elif print_ontologies_with_warning_or_error in compile_error_categories_occurences:
             print(compile_error_categories_occurences[print_ontologies_with_warning_or_error])
 
-    not_compiled.to_csv(file_path[:-4] + ' fault modes analysed.csv')
-    df.to_csv(file_path)
+    fault_modes = df[['model', 'atl_warnings_present']].join(compile_errors)
+    if is_results_csv(source):
+        not_compiled.to_csv(source[:-4] + ' fault modes analysed.csv')
+    else:
+        with ResultsStore(store_path) as store:
+            store.store_fault_modes(df.attrs['run_id'], fault_modes)
     print("\n\n\n")
+    return fault_modes
 
 
-def analyse_csv(file_path):
+def analyse_csv(source=None, store_path=RESULTS_STORE_PATH):
     """
-    Prints some stats for a CSV file containing the results of the automated performed validation.
-    :param file_path: location of CSV file with the results of the automated performed validation.
+    Prints some stats for the results of the automated performed validation.
+    :param source: Run id in the results store, or location of a CSV file with the results of the automated performed
+    validation. By default the latest run in the results store.
+    :param store_path: Location of the results store.
     :return:
     """
-    df: pd.DataFrame = pd.read_csv(file_path, index_col=0)
-    print(f"Analysis for {file_path}")
+    df: pd.DataFrame = load_results(source, store_path)
+    print(f"Analysis for {source if is_results_csv(source) else 'run ' + df.attrs['run_id']}")
     n_successful_transformation = df['transformation_successful'].sum()
     print(f"Successful transformation = {n_successful_transformation}")
 
-    n_compiled_successful = (df['generated_code_compiles'] & df['transformation_successful']).sum()
+    n_compiled_successful = ((df['generated_code_compiles'] == True) & df['transformation_successful']).sum()
     print(f"Successful compilation = {n_compiled_successful}")
 
     completed_transformations = df[df['transformation_successful']]
@@ -151,8 +190,14 @@ def analyse_csv(file_path):
 
 
 if __name__ == '__main__':
-    analyse_csv(r'automated_validation_results.csv')
-    analyse_fault_modes(r'automated_validation_results.csv')
-
-
-
+    parser = argparse.ArgumentParser(description="Analyse the results and fault modes of the automated validation.")
+    parser.add_argument('source', nargs='?', default=r'automated_validation_results.csv',
+                        help="Run id in the results store, or results CSV file (default "
+                             "automated_validation_results.csv). Use --latest for the latest run in the store.")
+    parser.add_argument('--latest', action='store_true', help="Analyse the latest run in the results store.")
+    parser.add_argument('--results-store', default=RESULTS_STORE_PATH, help="Location of the results store.")
+    args = parser.parse_args()
+    results_source = None if args.latest else args.source
+
+    analyse_csv(results_source, args.results_store)
+    analyse_fault_modes(results_source, store_path=args.results_store)
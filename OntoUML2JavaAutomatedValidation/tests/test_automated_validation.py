@@ -0,0 +1,56 @@
+#  Copyright (c) 2024.
+import pandas as pd
+import pytest
+
+from OntoUML2JavaAutomatedValidation.AutomatedValidation import hash_model_file, select_models_to_revalidate
+
+
+class TestSelectModelsToRevalidate:
+
+    @pytest.fixture
+    def json_paths(self, tmp_path):
+        json_paths = {}
+        for model_name in ['unchanged', 'changed', 'failed', 'new']:
+            json_paths[model_name] = tmp_path / f"{model_name}.json"
+            json_paths[model_name].write_text(f'{{"name": "{model_name}"}}')
+        return {model_name: str(json_path) for model_name, json_path in json_paths.items()}
+
+    @staticmethod
+    def get_previous_result(model_name, model_hash, compiles=True):
+        return {'model': model_name, 'transformation_successful': True, 'generated_code_compiles': compiles,
+                'model_hash': model_hash}
+
+    def test_new_changed_and_failed_models(self, json_paths):
+        previous_results = pd.DataFrame([
+            self.get_previous_result('unchanged', hash_model_file(json_paths['unchanged'])),
+            self.get_previous_result('changed', 'hash of the previous contents'),
+            self.get_previous_result('failed', hash_model_file(json_paths['failed']), compiles=False)
+        ])
+
+        to_transform, still_valid = select_models_to_revalidate(list(json_paths.values()), previous_results)
+
+        assert to_transform == [json_paths['changed'], json_paths['failed'], json_paths['new']]
+        assert still_valid['model'].to_list() == ['unchanged']
+
+    def test_results_without_model_hash(self, json_paths):
+        previous_results = pd.DataFrame([self.get_previous_result('unchanged', None)]).drop(columns=['model_hash'])
+
+        to_transform, still_valid = select_models_to_revalidate([json_paths['unchanged']], previous_results)
+
+        # Whether the model changed is unknown
+        assert to_transform == [json_paths['unchanged']]
+        assert still_valid.empty
+
+    def test_last_of_repeated_rows_is_used(self, json_paths):
+        unchanged_hash = hash_model_file(json_paths['unchanged'])
+        failed_hash = hash_model_file(json_paths['failed'])
+        previous_results = pd.DataFrame([self.get_previous_result('unchanged', unchanged_hash, compiles=False),
+                                         self.get_previous_result('unchanged', unchanged_hash),
+                                         self.get_previous_result('failed', failed_hash),
+                                         self.get_previous_result('failed', failed_hash, compiles=False)])
+
+        to_transform, still_valid = select_models_to_revalidate([json_paths['unchanged'], json_paths['failed']],
+                                                                previous_results)
+
+        assert to_transform == [json_paths['failed']]
+        assert still_valid['model'].to_list() == ['unchanged']
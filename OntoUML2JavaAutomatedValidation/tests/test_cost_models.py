@@ -0,0 +1,37 @@
+#  Copyright (c) 2024.
+import numpy as np
+import pandas as pd
+
+from OntoUML2JavaAutomatedValidation.CostModels import LINEAR, POWER_LAW, find_outliers, fit_cost_models, \
+    get_best_cost_models
+
+
+class TestCostModels:
+
+    @staticmethod
+    def create_timings():
+        n_classes = np.arange(10, 210, 10)
+        timings = pd.DataFrame({'atl_time_s': 5 + 0.001 * n_classes ** 2, 'acceleo_time_s': 3 + 0.02 * n_classes,
+                                'n_classes': n_classes, 'n_relations': n_classes // 2,
+                                'n_generalizations': n_classes // 3, 'json_bytes': n_classes * 1000},
+                               index=[f"model{i}" for i in range(len(n_classes))])
+        # Some noise, so the robust z-scores of the residuals are defined
+        timings['acceleo_time_s'] += np.tile([0.01, -0.01], len(n_classes) // 2)
+        return timings
+
+    def test_fit_finds_fixed_cost_and_exponent(self):
+        cost_models = fit_cost_models(self.create_timings()).set_index(['stage', 'feature', 'kind'])
+
+        atl_power_law = cost_models.loc[('atl_time_s', 'n_classes', POWER_LAW)]
+        assert np.isclose(atl_power_law['exponent'], 2.0)
+        assert np.isclose(atl_power_law['intercept'], 5.0)
+        assert atl_power_law['r_squared'] > cost_models.loc[('atl_time_s', 'n_classes', LINEAR), 'r_squared']
+
+    def test_find_outliers(self):
+        timings = self.create_timings()
+        timings.loc['model5', 'acceleo_time_s'] += 2
+
+        outliers = find_outliers(get_best_cost_models(fit_cost_models(timings)), timings)
+
+        assert list(outliers['model']) == ['model5']
+        assert list(outliers['stage']) == ['acceleo_time_s']
@@ -0,0 +1,31 @@
+from OntoUML2JavaAutomatedValidation.ResultJournal import ResultJournal
+
+
+class TestResultJournal:
+
+    def test_append_and_read(self, tmp_path):
+        path = tmp_path / 'journal.jsonl'
+        with ResultJournal(path, run_id='run-1') as journal:
+            journal.append({'model': 'a', 'atl_warnings': {'Warning: x'}})
+            journal.append({'model': 'b', 'atl_warnings': set()})
+
+            results = list(journal.read_results())
+
+        assert [result['model'] for result in results] == ['a', 'b']
+        assert results[0]['atl_warnings'] == "{'Warning: x'}"
+        assert results[1]['atl_warnings'] == "set()"
+        assert results[1]['run_id'] == 'run-1'
+
+    def test_resume_keeps_results_and_removes_incomplete_line(self, tmp_path):
+        path = tmp_path / 'journal.jsonl'
+        with ResultJournal(path, run_id='run-1') as journal:
+            journal.append({'model': 'a'})
+        with open(path, 'a') as f:
+            f.write('{"model": "b", "transf')  # interrupted while writing
+
+        with ResultJournal(path, run_id='run-2') as journal:
+            assert journal.get_journaled_models() == {'a'}
+            journal.append({'model': 'b'})
+            results = list(journal.read_results())
+
+        assert results == [{'model': 'a', 'run_id': 'run-1'}, {'model': 'b', 'run_id': 'run-2'}]
@@ -0,0 +1,67 @@
+#  Copyright (c) 2024.
+import pandas as pd
+import pytest
+
+from OntoUML2JavaAutomatedValidation.ResultsStore import RUN_KIND_INCREMENTAL, ResultsStore, load_results
+
+
+def get_results(run_id, times, compiles=True):
+    return pd.DataFrame({'model': list(times), 'run_id': run_id, 'transformation_successful': True,
+                         'generated_code_compiles': compiles, 'transformation_time_s': list(times.values()),
+                         'atl_warnings': 'set()', 'n_classes': 3})
+
+
+class TestResultsStore:
+
+    def test_store_and_get_results(self, tmp_path):
+        results = get_results('2024-10-21 12-57-22', {'b': 2.5, 'a': 1.5}, compiles=[True, None])
+        results['compile_mode'] = 'full'
+        diagnostics = pd.DataFrame([{'run_id': '2024-10-21 12-57-22', 'model': 'b', 'file': 'B.java', 'line': 3,
+                                     'kind': 'error', 'message': 'x', 'category': 'Could not extract',
+                                     'detail': None}])
+        with ResultsStore(tmp_path / 'results.sqlite') as store:
+            store.store_run('2024-10-21 12-57-22', results, diagnostics)
+
+        with ResultsStore(tmp_path / 'results.sqlite') as store:
+            stored = store.get_results()
+            assert stored.attrs['run_id'] == '2024-10-21 12-57-22'
+            assert stored['model'].to_list() == ['a', 'b']
+            assert stored['generated_code_compiles'].to_list() == [None, True]
+            assert stored['transformation_successful'].dtype == bool
+            assert stored['transformation_time_s'].to_list() == [1.5, 2.5]
+            assert stored['compile_mode'].to_list() == ['full', 'full']
+            assert store.get_compile_diagnostics(model='b')['file'].to_list() == ['B.java']
+            assert store.get_runs().loc[0, 'started_at'] == '2024-10-21 12:57:22'
+
+    def test_incremental_run_reuses_results(self, tmp_path):
+        with ResultsStore(tmp_path / 'results.sqlite') as store:
+            store.store_run('2024-01-01 00-00-00', get_results('2024-01-01 00-00-00', {'a': 1.0, 'b': 2.0}))
+            reused = store.get_results().iloc[[0]]
+            store.store_run('2024-01-02 00-00-00',
+                            pd.concat([reused, get_results('2024-01-02 00-00-00', {'b': 3.0})], ignore_index=True),
+                            kind=RUN_KIND_INCREMENTAL)
+            store.store_run('2024-01-03 00-00-00', get_results('2024-01-03 00-00-00', {'a': 4.0, 'b': 5.0}))
+
+            assert store.get_results('2024-01-02 00-00-00')['run_id'].to_list() == ['2024-01-01 00-00-00',
+                                                                                   '2024-01-02 00-00-00']
+            # The result of 'a' reused by the incremental run is counted once
+            history = store.get_model_history('a')
+            assert history['run_id'].to_list() == ['2024-01-03 00-00-00', '2024-01-01 00-00-00']
+            assert history['transformation_time_s'].to_list() == [4.0, 1.0]
+            assert store.get_model_history('b', last_n=2)['transformation_time_s'].to_list() == [5.0, 3.0]
+            with pytest.raises(ValueError):
+                store.get_model_history('b', column='unknown')
+
+    def test_fault_modes_and_csv_import(self, tmp_path):
+        csv_path = tmp_path / 'transformation_results 2024-10-21 12-57-22 test run.csv'
+        get_results('2024-10-21 12-57-22', {'a': 1.0}).to_csv(csv_path)
+        with ResultsStore(tmp_path / 'results.sqlite') as store:
+            run_id = store.import_csv(str(csv_path))
+            store.store_fault_modes(run_id, pd.DataFrame({'model': ['a'], 'atl_warnings_present': [None],
+                                                          'compile_error_category': ['Reserved keyword name'],
+                                                          'compile_error_category_detail': ['Class']}))
+            assert store.get_fault_modes()['compile_error_category'].to_list() == ['Reserved keyword name']
+
+        assert run_id == 'transformation_results 2024-10-21 12-57-22 test run'
+        assert load_results(run_id, tmp_path / 'results.sqlite')['transformation_time_s'].to_list() == [1.0]
+        assert load_results(str(csv_path))['model'].to_list() == ['a']
@@ -0,0 +1,45 @@
+#  Copyright (c) 2024.
+import os
+
+import numpy as np
+import pandas as pd
+
+from OntoUML2JavaAutomatedValidation.ValidationAnalysis import COMPILE_ERROR_MULTIPLE_INHERITENCE, \
+    COMPILE_ERROR_VARIABLE_ALREADY_DEFINED, NON_RESOLVED_COMPILE_ERROR_CATEGORY, WARNING_EMPTY_STRING, \
+    WARNING_PROPERTY_WITHOUT_TYPE, classify_compile_errors, extract_compile_error, get_atl_warning_flags, \
+    get_atl_warnings_present
+
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), '..', 'automated_validation_results.csv')
+
+
+class TestValidationAnalysis:
+
+    def test_classify_compile_errors_equals_extract_compile_error(self):
+        compilation_errors = pd.read_csv(RESULTS_PATH, index_col=0)['compilation_errors']
+        compilation_errors = pd.concat([compilation_errors, pd.Series(["no known error", np.nan], index=[1000, 1001])])
+
+        classified = classify_compile_errors(compilation_errors)
+
+        for index, error_str in compilation_errors.items():
+            expected = extract_compile_error(error_str) if isinstance(error_str, str) else (None, None)
+            assert tuple(classified.loc[index]) == expected
+        assert classified.loc[1000, 'compile_error_category'] == NON_RESOLVED_COMPILE_ERROR_CATEGORY
+
+    def test_classify_compile_errors_in_order_of_priority(self):
+        error_str = ("Person.java:3: error: variable name is already defined in class Person\n"
+                     "public class Student extends Person, Employee {")
+
+        classified = classify_compile_errors(pd.Series([error_str]))
+
+        assert tuple(classified.loc[0]) == (COMPILE_ERROR_MULTIPLE_INHERITENCE, "Student")
+        assert extract_compile_error(error_str.split('\n')[0]) == (COMPILE_ERROR_VARIABLE_ALREADY_DEFINED,
+                                                                   "variable name in Person")
+
+    def test_atl_warnings_present(self):
+        atl_warnings = pd.Series(["set()", np.nan, "{'Warning: Empty string found', 'Warning: Property without type "
+                                                   "found in OntoUML model'}"])
+
+        atl_warnings_present = get_atl_warnings_present(get_atl_warning_flags(atl_warnings))
+
+        assert atl_warnings_present.to_list() == [None, None,
+                                                  f"{WARNING_PROPERTY_WITHOUT_TYPE}, {WARNING_EMPTY_STRING}"]
@@ -0,0 +1,225 @@
+#  Copyright (c) 2024.
+"""
+Stand-in for ANT, used by the benchmark to execute the transformation without Eclipse, ATL, Acceleo or a JDK.
+Started by the 'ant' script in the 'fake-ant' folder, and configured by the JSON file given in the environment variable
+FAKE_ANT_CONFIG (see fake_ant_config.json).
+
+For the targets of the transformation projects, it prints the recorded output of the target, sleeps for the modelled
+duration of the target and writes a stand-in for the output of the target, so the next stage has an input. The
+stand-in models carry the name and the size of the OntoUML JSON file they originate from. For other build files (the
+javac build files of the batch, incremental and scratch compilation), the mkdir, javac and echo tasks of the targets are
+executed. A generated source containing COMPILE_ERROR_MARKER does not compile.
+"""
+import json
+import os
+import shutil
+import sys
+import time
+import xml.etree.ElementTree as ElementTree
+
+COMPILE_ERROR_MARKER = 'FAKE-COMPILE-ERROR'
+
+
+def parse_arguments(arguments):
+    """
+    :return: Tuple of the properties (-Dname=value), the build file (-f) or None, and the target.
+    """
+    properties = {}
+    build_file = None
+    target = None
+    arguments = iter(arguments)
+    for argument in arguments:
+        if argument.startswith('-D'):
+            name, _, value = argument[2:].partition('=')
+            properties[name] = value
+        elif argument == '-f':
+            build_file = next(arguments)
+        else:
+            target = argument
+    return properties, build_file, target
+
+
+def write_stand_in_model(path, model_name, model_size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'model': model_name, 'size': model_size}, f)
+
+
+def read_stand_in_model(path):
+    with open(path, encoding='utf-8') as f:
+        stand_in_model = json.load(f)
+    return stand_in_model['model'], stand_in_model['size']
+
+
+def get_modelled_duration(config, target, model_size=0, n_source_files=0):
+    """
+    :return: Seconds a target takes according to the configuration, scaled by its 'time_scale'.
+    """
+    target_config = config['targets'].get(target, {})
+    duration_s = (target_config.get('duration_s', 0.0)
+                  + target_config.get('duration_s_per_mb', 0.0) * model_size / 1_000_000
+                  + target_config.get('duration_s_per_source_file', 0.0) * n_source_files)
+    return duration_s * config.get('time_scale', 1.0)
+
+
+class FakeAnt:
+
+    def __init__(self, config_path):
+        with open(config_path, encoding='utf-8') as f:
+            self.config = json.load(f)
+        self.config_folder = os.path.dirname(os.path.abspath(config_path))
+        self.failed = False
+
+    def get_target_config(self, target):
+        return self.config['targets'].get(target, {})
+
+    def print_recorded_output(self, target):
+        if (recorded_output := self.get_target_config(target).get('stdout')) is not None:
+            with open(os.path.join(self.config_folder, recorded_output), encoding='utf-8') as f:
+                for line in f:
+                    print(line, end='')
+
+    def sleep_modelled_duration(self, target, model_size=0, n_source_files=0):
+        time.sleep(get_modelled_duration(self.config, target, model_size, n_source_files))
+
+    def fails(self, model_name, target):
+        return self.config.get('failures', {}).get(model_name) == target
+
+    def run(self, arguments, cwd):
+        properties, build_file, target = parse_arguments(arguments)
+        build_file = build_file if build_file is not None else os.path.join(cwd, 'build.xml')
+        print(f"Buildfile: {build_file}")
+        start_time = time.monotonic()
+
+        if os.path.isfile(build_file) and os.path.getsize(build_file) > 0:
+            self.execute_build_file(build_file, target, properties)
+        else:
+            print(f"\n{target}:")
+            self.execute_transformation_target(target, properties, cwd)
+
+        print(f"\nBUILD {'FAILED' if self.failed else 'SUCCESSFUL'}")
+        print(f"Total time: {int(time.monotonic() - start_time)} seconds")
+        return 1 if self.failed else 0
+
+    def execute_transformation_target(self, target, properties, cwd):
+        """
+        Executes a target of one of the projects of the transformation (which have no build file in the fake
+        workspace).
+        """
+        self.print_recorded_output(target)
+        if target == 'convertFromModelRepo':
+            model_name = os.path.splitext(os.path.basename(properties['jsonPath']))[0]
+            model_size = os.path.getsize(properties['jsonPath'])
+            self.sleep_modelled_duration(target, model_size)
+            output_path = properties['outputXmiPath']
+        elif target == 'OntoUML2ImplementationModel':
+            model_name, model_size = read_stand_in_model(properties['sourcePath'])
+            self.sleep_modelled_duration(target, model_size)
+            output_path = os.path.join(cwd, properties['targetPath'])
+        elif target == 'Uml2java':
+            model_name, model_size = read_stand_in_model(properties['sourceModel'])
+            self.sleep_modelled_duration(target, model_size)
+            if not self.fails(model_name, target):
+                self.generate_java(properties['targetFolder'], model_name)
+            output_path = None
+        elif target == 'clear-source-files':
+            self.sleep_modelled_duration(target)
+            shutil.rmtree(os.path.join(cwd, 'src'), ignore_errors=True)
+            os.makedirs(os.path.join(cwd, 'src'))
+            return
+        elif target == 'clean':
+            self.sleep_modelled_duration(target)
+            shutil.rmtree(os.path.join(cwd, 'bin'), ignore_errors=True)
+            return
+        elif target == 'build-project':
+            if not self.javac(target, os.path.join(cwd, 'src'), os.path.join(cwd, 'bin')):
+                self.failed = True
+            return
+        else:
+            print(f"Target \"{target}\" does not exist in the project.")
+            self.failed = True
+            return
+
+        if self.fails(model_name, target):
+            self.failed = True
+        elif output_path is not None:
+            write_stand_in_model(output_path, model_name, model_size)
+
+    def generate_java(self, target_folder, model_name):
+        package_folder = os.path.join(target_folder, 'model')
+        os.makedirs(package_folder, exist_ok=True)
+        compile_error = model_name in self.config.get('compile_errors', [])
+        for class_index in range(self.config.get('generated_classes', 5)):
+            with open(os.path.join(package_folder, f"Class{class_index}.java"), 'w', encoding='utf-8') as f:
+                f.write(f"package model;\n// {model_name}\npublic class Class{class_index} {{}}\n")
+                if compile_error and class_index == 0:
+                    f.write(f"// {COMPILE_ERROR_MARKER}\n")
+            print(f"     [java] Generated Class{class_index}.java")
+
+    def javac(self, target, source_path, classes_path):
+        """
+        Compiles the sources of which the class file is missing, like the ANT javac task.
+        """
+        to_compile = []
+        for root, _, files in os.walk(source_path):
+            for file_name in files:
+                relative_path = os.path.relpath(os.path.join(root, file_name), source_path)
+                if file_name.endswith('.java') and not os.path.exists(
+                        os.path.join(classes_path, relative_path.removesuffix('.java') + '.class')):
+                    to_compile.append(relative_path)
+        if not to_compile:
+            return True
+
+        print(f"    [javac] Compiling {len(to_compile)} source files to {classes_path}")
+        self.print_recorded_output(target)
+        self.sleep_modelled_duration(target, n_source_files=len(to_compile))
+        successful = True
+        for relative_path in sorted(to_compile):
+            with open(os.path.join(source_path, relative_path), encoding='utf-8') as f:
+                if COMPILE_ERROR_MARKER in f.read():
+                    print(f"    [javac] {os.path.join(source_path, relative_path)}:4: error: cannot find symbol")
+                    successful = False
+                    continue
+            class_path = os.path.join(classes_path, relative_path.removesuffix('.java') + '.class')
+            os.makedirs(os.path.dirname(class_path), exist_ok=True)
+            open(class_path, 'w').close()
+        if not successful:
+            print("    [javac] 1 error")
+        return successful
+
+    def execute_build_file(self, build_file, target, properties):
+        """
+        Executes a target of a generated build file, including the targets it depends on.
+        """
+        project = ElementTree.parse(build_file).getroot()
+        targets = {element.get('name'): element for element in project.iter('target')}
+
+        def expand(value):
+            for name, property_value in properties.items():
+                value = value.replace(f"${{{name}}}", property_value)
+            return value
+
+        def execute(target_name):
+            element = targets[target_name]
+            for dependency in filter(None, (element.get('depends') or '').split(',')):
+                execute(dependency)
+            print(f"\n{target_name}:")
+            for task in element:
+                if task.tag == 'mkdir':
+                    os.makedirs(expand(task.get('dir')), exist_ok=True)
+                elif task.tag == 'javac':
+                    if not self.javac(target, expand(task.get('srcdir')), expand(task.get('destdir'))):
+                        if task.get('errorproperty') is not None:
+                            properties[task.get('errorproperty')] = 'true'
+                        if task.get('failonerror', 'true') == 'true':
+                            self.failed = True
+                            return
+                elif task.tag == 'echo':
+                    print(f"     [echo] {expand(task.get('message'))}")
+
+        execute(target or project.get('default'))
+
+
+if __name__ == '__main__':
+    sys.stdout.reconfigure(line_buffering=True)
+    sys.exit(FakeAnt(os.environ['FAKE_ANT_CONFIG']).run(sys.argv[1:], os.getcwd()))
@@ -0,0 +1,272 @@
+#  Copyright (c) 2024.
+"""
+Benchmark of the Python side of the automated validation: the TransformationExecutor, the parsing of the stage output by
+TransformationExecResult and the loops of AutomatedValidation. ANT is replaced by a stand-in (see FakeAnt.py) that
+prints recorded output and sleeps for a modelled duration, so the benchmark runs without Eclipse or a JDK.
+
+Transforms the models of the automated validation and reports the throughput, the latency percentiles per stage (and
+the part of it not explained by the modelled duration of the stage) and the peak memory. The report is compared with
+a baseline report to flag regressions.
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from OntoUML2JavaAutomatedValidation import AutomatedValidation
+from OntoUML2JavaBenchmark.FakeAnt import get_modelled_duration
+from OntoUML2JavaTransformationExecution.BatchCompiler import BatchCompiler
+from OntoUML2JavaTransformationExecution.ScratchWorkspace import ScratchWorkspace
+from OntoUML2JavaTransformationExecution.TransformationExecutor import TransformationExecutor
+
+BENCHMARK_FOLDER = os.path.dirname(os.path.abspath(__file__))
+AUTOMATED_VALIDATION_FOLDER = os.path.join(os.path.dirname(BENCHMARK_FOLDER), 'OntoUML2JavaAutomatedValidation')
+MODELS_FOLDER = os.path.join(AUTOMATED_VALIDATION_FOLDER, AutomatedValidation.FOLDER_WITH_ONTOLOGIES)
+
+DEFAULT_CONFIG = os.path.join(BENCHMARK_FOLDER, 'fake_ant_config.json')
+DEFAULT_BASELINE = os.path.join(BENCHMARK_FOLDER, 'baseline.json')
+
+# Per stage: the results column with its time, and the ANT targets executed within that time
+STAGES = {
+    'READ_ONTOUML': ('read_ontouml_time_s', ['convertFromModelRepo']),
+    'ATL': ('atl_time_s', ['OntoUML2ImplementationModel']),
+    'ACCELEO': ('acceleo_time_s', ['Uml2java']),
+    'COMPILE_CHECK': ('compile_check_time_s', None)
+}
+
+# Metrics for which a higher value is better; for all other metrics a lower value is better
+HIGHER_IS_BETTER = {'throughput_models_per_s'}
+
+
+def create_fake_workspace(workspace_path):
+    """
+    Creates an Eclipse workspace with empty projects of the transformation, which the fake ANT executes.
+    """
+    for project in [TransformationExecutor.ECORE_MODEL_PROJECT, TransformationExecutor.ATL_PROJECT,
+                    TransformationExecutor.ACCELEO_PROJECT]:
+        os.makedirs(os.path.join(workspace_path, project))
+    os.makedirs(os.path.join(workspace_path, TransformationExecutor.GENERATED_CODE_PROJECT, 'src'))
+
+
+def set_up_fake_ant(config, work_folder):
+    """
+    Puts the fake ANT on the path and points the executors to a fake workspace.
+    :param config: The fake ANT configuration.
+    :param work_folder: Folder for the workspace and the configuration.
+    """
+    config_path = os.path.join(work_folder, 'fake_ant_config.json')
+    # Paths of the recorded output are relative to the folder of the original configuration
+    config = config | {'targets': {target: target_config | ({'stdout': os.path.join(BENCHMARK_FOLDER, target_config[
+        'stdout'])} if 'stdout' in target_config else {}) for target, target_config in config['targets'].items()}}
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+
+    workspace_path = os.path.join(work_folder, 'workspace')
+    create_fake_workspace(workspace_path)
+
+    os.environ['FAKE_ANT_CONFIG'] = config_path
+    os.environ['FAKE_ANT_PYTHON'] = sys.executable
+    os.environ['PATH'] = os.path.join(BENCHMARK_FOLDER, 'fake-ant') + os.pathsep + os.environ['PATH']
+    os.environ['ECLIPSE_ONTOUML_2_JAVA_WORKSPACE'] = workspace_path
+
+
+def get_percentiles(values):
+    return {'p50_s': float(np.percentile(values, 50)), 'p95_s': float(np.percentile(values, 95)),
+            'max_s': float(np.max(values))}
+
+
+def get_stage_report(results, json_paths, config):
+    """
+    :return: Per stage the latency percentiles and, for stages with a modelled duration, the percentiles of the time
+        not explained by the modelled duration (i.e. starting the fake ANT and the work done in Python).
+    """
+    model_sizes = {os.path.splitext(os.path.basename(json_path))[0]: os.path.getsize(json_path)
+                   for json_path in json_paths}
+    stage_report = {}
+    for stage, (time_column, targets) in STAGES.items():
+        executed = [result for result in results if result.get(time_column, -1) >= 0]
+        if not executed:
+            continue
+        latencies = [result[time_column] for result in executed]
+        stage_report[stage] = get_percentiles(latencies)
+        if targets is not None:
+            overheads = [result[time_column] - sum(get_modelled_duration(config, target, model_sizes[result['model']])
+                                                   for target in targets)
+                         for result in executed]
+            stage_report[stage] |= {f"overhead_{name}": value for name, value in get_percentiles(overheads).items()}
+    return stage_report
+
+
+def get_peak_child_rss_mb(results):
+    """
+    :param results: Results of the transformed models.
+    :return: Peak resident memory in MB of the largest fake ANT process (or process started by it), from the peak
+        memory measured per ANT target (the '<step>_max_rss_mb' columns), or None if it was not measured. The peak memory
+        of the children of this process (RUSAGE_CHILDREN) cannot be used, as it includes the memory of this process.
+    """
+    return max((value for result in results for column, value in result.items()
+                if column.endswith('_max_rss_mb') and value is not None), default=None)
+
+
+def run_benchmark(json_paths, config, mode='sequential', workers=2, batch_compile=None, scratch=False):
+    """
+    Transforms the models with the fake ANT.
+    :param json_paths: OntoUML JSON files of the models.
+    :param config: The fake ANT configuration.
+    :param mode: 'sequential', 'parallel' or 'pipeline', see the run_* functions of AutomatedValidation.
+    :param workers: Number of workers in parallel mode.
+    :param batch_compile: Batch size for compiling the generated code in batches, None to compile per model.
+    :param scratch: Whether to use a scratch workspace.
+    :return: Dict with the benchmark report.
+    """
+    with contextlib.chdir(AUTOMATED_VALIDATION_FOLDER):
+        num_classes_per_ontology = AutomatedValidation.load_num_classes_per_ontology()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='ontouml2java-benchmark-') as work_folder:
+        set_up_fake_ant(config, work_folder)
+        executor_options = {}
+        if scratch:
+            executor_options['scratch_workspace'] = ScratchWorkspace(os.path.join(work_folder, 'scratch'))
+        batch_compiler = BatchCompiler(batch_compile, os.path.join(work_folder, 'batch')) \
+            if batch_compile is not None else None
+
+        rss_before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start_time = time.perf_counter()
+        if mode == 'pipeline':
+            count_transformed, exceptions = AutomatedValidation.run_pipelined(
+                json_paths, num_classes_per_ontology, results.append, {}, batch_compiler, **executor_options)
+        elif mode == 'parallel':
+            count_transformed, exceptions = AutomatedValidation.run_parallel(
+                json_paths, num_classes_per_ontology, results.append, workers, **executor_options)
+        else:
+            count_transformed, exceptions = AutomatedValidation.run_sequential(
+                json_paths, num_classes_per_ontology, results.append, batch_compiler, **executor_options)
+        total_time_s = time.perf_counter() - start_time
+
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        'n_models': len(json_paths),
+        'n_transformed': count_transformed,
+        'n_exceptions': len(exceptions),
+        'n_successful': sum(1 for result in results if result['transformation_successful']),
+        'n_compiling': sum(1 for result in results if result['generated_code_compiles']),
+        'total_time_s': total_time_s,
+        'throughput_models_per_s': len(json_paths) / total_time_s,
+        'stages': get_stage_report(results, json_paths, config),
+        # ru_maxrss is in KB on Linux
+        'peak_rss_mb': self_usage.ru_maxrss / 1024,
+        'rss_growth_mb': (self_usage.ru_maxrss - rss_before_kb) / 1024,
+        'peak_child_rss_mb': get_peak_child_rss_mb(results),
+        'python_cpu_s': self_usage.ru_utime + self_usage.ru_stime
+    }
+
+
+def flatten_metrics(report, prefix=''):
+    """
+    :return: Dict with the numeric metrics of a (nested) report, with keys like 'stages.ATL.p95_s'.
+    """
+    metrics = {}
+    for name, value in report.items():
+        if isinstance(value, dict):
+            metrics |= flatten_metrics(value, f"{prefix}{name}.")
+        elif isinstance(value, (int, float)):
+            metrics[f"{prefix}{name}"] = value
+    return metrics
+
+
+def compare_to_baseline(report, baseline, tolerance=0.25, min_difference_s=0.005):
+    """
+    Compares the metrics of a report with those of a baseline report.
+    :param tolerance: Relative difference for which a metric is considered to have regressed.
+    :param min_difference_s: Differences in time metrics (ending with '_s') smaller than this are ignored, as they are
+        within the noise of the measurement.
+    :return: Descriptions of the regressed metrics.
+    """
+    metrics = flatten_metrics(report)
+    regressions = []
+    for name, baseline_value in flatten_metrics(baseline).items():
+        if name not in metrics or name.startswith('n_') or baseline_value == 0:
+            continue
+        value = metrics[name]
+        relative_change = (value - baseline_value) / abs(baseline_value)
+        if name.split('.')[-1] in HIGHER_IS_BETTER:
+            relative_change = -relative_change
+        if name.endswith('_s') and abs(value - baseline_value) < min_difference_s:
+            continue
+        if relative_change > tolerance:
+            regressions.append(f"{name}: {baseline_value:.4g} -> {value:.4g} ({relative_change:+.0%} worse)")
+    return regressions
+
+
+def print_report(report):
+    print(f"\nTransformed {report['n_models']} models in {report['total_time_s']:.2f} s "
+          f"({report['throughput_models_per_s']:.2f} models/s), {report['n_successful']} successful, "
+          f"{report['n_compiling']} compiling, {report['n_exceptions']} exceptions")
+    for stage, stage_report in report['stages'].items():
+        overhead = f", overhead p50 {stage_report['overhead_p50_s']:.3f} s p95 {stage_report['overhead_p95_s']:.3f} s" \
+            if 'overhead_p50_s' in stage_report else ''
+        print(f"  {stage:<14} p50 {stage_report['p50_s']:.3f} s  p95 {stage_report['p95_s']:.3f} s  "
+              f"max {stage_report['max_s']:.3f} s{overhead}")
+    peak_child_rss = f"{report['peak_child_rss_mb']:.1f} MB" if report['peak_child_rss_mb'] is not None else "unknown"
+    print(f"Peak memory: {report['peak_rss_mb']:.1f} MB (+{report['rss_growth_mb']:.1f} MB during the run), "
+          f"largest fake ANT {peak_child_rss}; Python CPU time {report['python_cpu_s']:.2f} s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark of the automated validation with a fake ANT.")
+    parser.add_argument('--mode', choices=['sequential', 'parallel', 'pipeline'], default='sequential')
+    parser.add_argument('--workers', type=int, default=2, help="Number of workers in parallel mode.")
+    parser.add_argument('--batch-compile', type=int, metavar='N', help="Compile the generated code in batches of N.")
+    parser.add_argument('--scratch', action='store_true', help="Use a scratch workspace.")
+    parser.add_argument('--models', type=int, metavar='N', help="Only transform the first N models.")
+    parser.add_argument('--config', default=DEFAULT_CONFIG, help="Fake ANT configuration.")
+    parser.add_argument('--time-scale', type=float,
+                        help="Factor for the modelled durations of the targets, e.g. 0 to measure the overhead only.")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline report to compare with.")
+    parser.add_argument('--save-baseline', action='store_true', help="Store the report as the baseline.")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Relative difference with the baseline that is reported as a regression.")
+    parser.add_argument('--output', help="File to write the report to (JSON).")
+    args = parser.parse_args()
+    if args.batch_compile is not None and args.mode == 'parallel':
+        parser.error("--batch-compile is not available in parallel mode")
+
+    with open(args.config, encoding='utf-8') as f:
+        fake_ant_config = json.load(f)
+    if args.time_scale is not None:
+        fake_ant_config['time_scale'] = args.time_scale
+
+    model_paths = sorted(os.path.join(MODELS_FOLDER, file_name) for file_name in os.listdir(MODELS_FOLDER))
+    model_paths = model_paths[:args.models]
+
+    benchmark_report = run_benchmark(model_paths, fake_ant_config, args.mode, args.workers, args.batch_compile,
+                                     args.scratch)
+    benchmark_report['settings'] = {'mode': args.mode, 'workers': args.workers, 'batch_compile': args.batch_compile,
+                                    'scratch': args.scratch, 'time_scale': fake_ant_config.get('time_scale', 1.0)}
+    print_report(benchmark_report)
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(benchmark_report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(benchmark_report, f, indent=2)
+        print(f"Stored as baseline in {args.baseline}")
+    elif os.path.isfile(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline_report = json.load(f)
+        if baseline_report.get('settings') != benchmark_report['settings']:
+            print(f"!! Baseline was measured with other settings: {baseline_report.get('settings')}")
+        if regressions := compare_to_baseline(benchmark_report, baseline_report, args.tolerance):
+            print("Regressions compared to the baseline:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("No regressions compared to the baseline")
@@ -0,0 +1,66 @@
+#  Copyright (c) 2024.
+import json
+import os
+
+import pytest
+
+from OntoUML2JavaAutomatedValidation import AutomatedValidation
+from OntoUML2JavaBenchmark.RunBenchmark import DEFAULT_CONFIG, MODELS_FOLDER, compare_to_baseline, run_benchmark
+from OntoUML2JavaTransformationExecution.TransformationExecutor import TransformationExecutor
+
+
+class TestBenchmark:
+
+    def test_compare_to_baseline(self):
+        baseline = {'n_models': 82, 'throughput_models_per_s': 2.0, 'peak_rss_mb': 100.0,
+                    'stages': {'ATL': {'p95_s': 1.0, 'max_s': 0.001}}}
+        report = {'n_models': 10, 'throughput_models_per_s': 1.0, 'peak_rss_mb': 110.0,
+                  'stages': {'ATL': {'p95_s': 2.0, 'max_s': 0.004}}}
+
+        regressions = compare_to_baseline(report, baseline, tolerance=0.25)
+
+        # Lower throughput and higher latencies are worse; small differences in time and counts are ignored
+        assert [regression.split(':')[0] for regression in regressions] == ['throughput_models_per_s',
+                                                                            'stages.ATL.p95_s']
+
+    @pytest.fixture
+    def config(self, monkeypatch):
+        for variable in ['PATH', 'FAKE_ANT_CONFIG', 'FAKE_ANT_PYTHON', 'ECLIPSE_ONTOUML_2_JAVA_WORKSPACE']:
+            monkeypatch.setenv(variable, os.environ.get(variable, ''))
+        with open(DEFAULT_CONFIG, encoding='utf-8') as f:
+            return json.load(f) | {'time_scale': 0}
+
+    def test_run_benchmark(self, config):
+        model_paths = [os.path.join(MODELS_FOLDER, model) for model in ['aguiar2019ooco.json',
+                                                                         'bank-account2013.json']]
+
+        report = run_benchmark(model_paths, config)
+
+        # One model does not compile, the transformation of the other fails (see fake_ant_config.json)
+        assert (report['n_transformed'], report['n_successful'], report['n_compiling']) == (2, 1, 0)
+        assert set(report['stages']) == {'READ_ONTOUML', 'ATL', 'ACCELEO', 'COMPILE_CHECK'}
+        # The fake ANT is measured, not this (larger) process
+        assert 0 < report['peak_child_rss_mb'] < report['peak_rss_mb']
+
+    def test_run_benchmark_in_parallel(self, config, monkeypatch):
+        model_paths = [os.path.join(MODELS_FOLDER, model) for model in ['aguiar2019ooco.json', 'bank-account2013.json',
+                                                                         'bank-model.json']]
+        run_parallel = AutomatedValidation.run_parallel
+        workspace_after_run = []
+
+        def run_parallel_and_list_workspace(*args, **kwargs):
+            try:
+                return run_parallel(*args, **kwargs)
+            finally:
+                workspace_after_run.extend(os.listdir(TransformationExecutor.get_eclipse_workspace_path()))
+
+        monkeypatch.setattr(AutomatedValidation, 'run_parallel', run_parallel_and_list_workspace)
+
+        report = run_benchmark(model_paths, config, mode='parallel', workers=2)
+
+        assert (report['n_transformed'], report['n_exceptions'], report['n_successful'], report['n_compiling']) == \
+               (3, 0, 2, 1)
+        # The copies of the code generation project of the workers are removed
+        assert TransformationExecutor.GENERATED_CODE_PROJECT in workspace_after_run
+        assert not [project for project in workspace_after_run
+                    if project.startswith(f"{TransformationExecutor.GENERATED_CODE_PROJECT}-worker-")]
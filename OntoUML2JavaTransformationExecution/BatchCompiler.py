@@ -0,0 +1,260 @@
+#  Copyright (c) 2024.
+import os
+import re
+import shutil
+import tempfile
+import xml.etree.ElementTree as ElementTree
+
+from OntoUML2JavaTransformationExecution.StageOutput import StageOutput
+from OntoUML2JavaTransformationExecution.StageRunner import StageResult, StageRunner, StageTimeoutError, \
+    SubprocessStageRunner
+from OntoUML2JavaTransformationExecution.TransformationExecutor import TransformationExecutor
+from OntoUML2JavaTransformationExecution.TransformationStage import TransformationStage
+
+
+class CompileBatch:
+    """
+    The models added to a BatchCompiler that are compiled in one ANT run.
+    """
+
+    def __init__(self):
+        self.executors: list[TransformationExecutor] = []
+        # Executors of which the generated code is compiled, by their index in the build file
+        self.compiled_executors: list[TransformationExecutor] = []
+        # Per compiled executor: the folder to which its generated sources are copied
+        self.model_folders: list[str] = []
+
+    def __len__(self):
+        return len(self.executors)
+
+
+class BatchCompiler:
+    """
+    Compile check of the generated code of many models in a single ANT run, instead of a 'clean' and 'build-project' run
+    per model. The JVM and the Java compiler are then started and warmed up once per batch.
+
+    The generated sources of every model are copied to their own source folder, and compiled by their own javac task
+    (with their own output folder) in a generated ANT build file. Models therefore cannot see each other's classes. The
+    console output of each javac task and whether it failed are attributed to the model it compiled, and interpreted as
+    the COMPILE_CHECK stage of that model. Models of which no result appears in the output (e.g. because ANT stopped
+    halfway the batch) fail the COMPILE_CHECK stage, with the exit code and the end of the output of the batch.
+
+    Usage: transform the models with executors that do not compile the generated code ('test_generated_code=False'),
+    'add' every executor once its transformation chain is executed, and call 'compile' whenever 'is_full'. To add models
+    while a batch compiles (e.g. from another thread), 'take_batch' first and compile the taken batch. Batches are not to
+    be compiled concurrently.
+    """
+
+    BUILD_FILE_NAME = 'batch-compile.xml'
+    MODEL_TARGET_PREFIX = 'compile-model-'
+    RESULT_MARKER = 'batch-compile-result'
+
+    MODEL_TARGET_REGEX = re.compile(rf"{MODEL_TARGET_PREFIX}(\d+):\s*$")
+    RESULT_REGEX = re.compile(rf"\[echo\] {RESULT_MARKER} (\d+) (\S+)")
+
+    def __init__(self, batch_size=20, batch_folder=None, stage_runner: StageRunner = None, classpath=()):
+        """
+        :param batch_size: Number of models after which 'is_full' is True.
+        :param batch_folder: Folder in which the sources, classes and build file of a batch are stored. If None, a
+            temporary folder is used, which is removed by 'close'.
+        :param stage_runner: How the ANT build file is executed. Default starts a new ANT process for every batch.
+        :param classpath: Jars or folders with classes the generated code depends on.
+        """
+        self.batch_size = batch_size
+        self.remove_batch_folder = batch_folder is None
+        self.batch_folder = os.path.abspath(batch_folder) if batch_folder is not None \
+            else tempfile.mkdtemp(prefix='batch-compile-')
+        os.makedirs(self.batch_folder, exist_ok=True)
+        self.stage_runner = stage_runner if stage_runner is not None else SubprocessStageRunner()
+        self.classpath = [os.path.abspath(path) for path in classpath]
+
+        self.batch = CompileBatch()
+        # Number of model folders created, so the folders of a batch that is compiling are not reused
+        self.n_model_folders = 0
+
+        # State while the output of the ANT run is consumed
+        self.model_outputs: dict[int, StageOutput] = {}
+        self.model_results: dict[int, StageResult] = {}
+        self.current_model_index = None
+
+    def add(self, executor: TransformationExecutor):
+        """
+        Adds a model of which the transformation chain is executed to the batch. Its generated sources are copied right
+        away, so the code generation project can be used for the next model. Executors of failed transformations are
+        kept in the batch as well, but nothing is compiled for them.
+        :param executor: Executor of the model, which did not compile the generated code itself.
+        """
+        self.batch.executors.append(executor)
+        if executor.transformation_failed:
+            return
+
+        model_folder = os.path.join(self.batch_folder, f"model-{self.n_model_folders}")
+        self.n_model_folders += 1
+        self.batch.compiled_executors.append(executor)
+        self.batch.model_folders.append(model_folder)
+        shutil.rmtree(model_folder, ignore_errors=True)
+        shutil.copytree(executor.get_generated_source_path(), os.path.join(model_folder, 'src'))
+
+    @property
+    def executors(self) -> list[TransformationExecutor]:
+        """
+        :return: The executors in the current batch, in the order in which they were added.
+        """
+        return self.batch.executors
+
+    def is_full(self):
+        """
+        :return: Whether the batch contains 'batch_size' models.
+        """
+        return len(self.batch) >= self.batch_size
+
+    def __len__(self):
+        return len(self.batch)
+
+    def take_batch(self) -> CompileBatch:
+        """
+        Empties the batch, so models can be added to the next batch while the taken batch is compiled.
+        :return: The models in the batch, to be passed to 'compile'.
+        """
+        batch, self.batch = self.batch, CompileBatch()
+        return batch
+
+    def compile(self, batch: CompileBatch = None) -> list[TransformationExecutor]:
+        """
+        Compiles the generated code of all models in a batch and records the COMPILE_CHECK results of each model in its
+        executor.
+        :param batch: Batch from 'take_batch'. If None, the current batch is taken and compiled.
+        :return: The executors in the batch, in the order in which they were added.
+        """
+        if batch is None:
+            batch = self.take_batch()
+        executors, compiled_executors = batch.executors, batch.compiled_executors
+        if not compiled_executors:
+            return executors
+
+        print(f"** Compiling generated code of {len(compiled_executors)} models in one batch")
+        build_file_path = os.path.join(self.batch_folder, self.BUILD_FILE_NAME)
+        self.__write_build_file(build_file_path, batch.model_folders)
+
+        self.model_outputs = {}
+        self.model_results = {}
+        self.current_model_index = None
+        batch_output = StageOutput(line_handlers=[lambda line: self.__route_line(line, compiled_executors)])
+        try:
+            batch_result = self.stage_runner.run(['-f', build_file_path, 'compile-all'], cwd=self.batch_folder,
+                                                 output=batch_output, timeout=self.__get_time_limit(compiled_executors))
+            self.__end_model_section(compiled_executors)
+        except StageTimeoutError as e:
+            self.__end_model_section(compiled_executors)
+            batch_result = None
+            for model_index, executor in enumerate(compiled_executors):
+                if model_index not in self.model_results:
+                    executor.transformation_result.mark_timeout(TransformationStage.COMPILE_CHECK, e.elapsed_s,
+                                                                e.output)
+                    executor.transformation_failed = True
+
+        for model_index, executor in enumerate(compiled_executors):
+            if model_index in self.model_results:
+                result = self.model_results[model_index]
+                executor.transformation_result.interpret_compile_result(result)
+                if result.returncode != 0:
+                    executor.transformation_failed = True
+            elif batch_result is not None:
+                # ANT stopped before the result of the model was printed, e.g. because the build file could not be
+                # parsed or the JVM crashed
+                executor.transformation_result.mark_missing_compile_result(batch_result.returncode,
+                                                                           batch_output.get_tail())
+                executor.transformation_failed = True
+            shutil.rmtree(batch.model_folders[model_index], ignore_errors=True)
+        return executors
+
+    def __get_time_limit(self, compiled_executors: list[TransformationExecutor]):
+        """
+        :return: The sum of the COMPILE_CHECK time limits of the models, or None if a model has no such limit.
+        """
+        time_limit = 0
+        for executor in compiled_executors:
+            if TransformationStage.COMPILE_CHECK not in executor.stage_time_limits:
+                return None
+            time_limit += executor.stage_time_limits[TransformationStage.COMPILE_CHECK].get_limit(
+                executor.ontoUML_json_size)
+        return time_limit
+
+    def __write_build_file(self, build_file_path, model_folders):
+        """
+        Writes an ANT build file with a javac target per model folder, and a 'compile-all' target executing them in
+        order. After its javac task, each target echoes whether the compilation failed.
+        """
+        project = ElementTree.Element('project', name='batch-compile', default='compile-all')
+        classpath = ElementTree.SubElement(project, 'path', id='batch.classpath')
+        for path in self.classpath:
+            ElementTree.SubElement(classpath, 'pathelement', location=path)
+
+        model_targets = []
+        for model_index, model_folder in enumerate(model_folders):
+            target_name = f"{self.MODEL_TARGET_PREFIX}{model_index}"
+            model_targets.append(target_name)
+            error_property = f"compile.failed.{model_index}"
+
+            target = ElementTree.SubElement(project, 'target', name=target_name)
+            ElementTree.SubElement(target, 'mkdir', dir=os.path.join(model_folder, 'bin'))
+            ElementTree.SubElement(target, 'javac', srcdir=os.path.join(model_folder, 'src'),
+                                   destdir=os.path.join(model_folder, 'bin'), classpathref='batch.classpath',
+                                   includeantruntime='false', encoding='UTF-8', failonerror='false',
+                                   errorproperty=error_property)
+            # Prints the literal '${...}' if the property is not set, i.e. the compilation succeeded
+            ElementTree.SubElement(target, 'echo', message=f"{self.RESULT_MARKER} {model_index} ${{{error_property}}}")
+
+        ElementTree.SubElement(project, 'target', name='compile-all', depends=','.join(model_targets))
+        ElementTree.ElementTree(project).write(build_file_path, encoding='utf-8', xml_declaration=True)
+
+    def __route_line(self, line: str, compiled_executors: list[TransformationExecutor]):
+        """
+        Line handler for the output of the batch: attributes each line to the model of the target that printed it.
+        """
+        if match := self.MODEL_TARGET_REGEX.match(line):
+            self.__end_model_section(compiled_executors)
+            self.current_model_index = int(match.group(1))
+            transformation_result = compiled_executors[self.current_model_index].transformation_result
+            transformation_result.mark_start_time()
+            self.model_outputs[self.current_model_index] = transformation_result.create_stage_output(
+                TransformationStage.COMPILE_CHECK)
+            return
+        if StageOutput.ANT_TARGET_REGEX.match(line):
+            # Another target, i.e. 'compile-all' after the last model
+            self.__end_model_section(compiled_executors)
+            return
+
+        if self.current_model_index is None:
+            return
+        if match := self.RESULT_REGEX.search(line):
+            model_index = int(match.group(1))
+            compilation_failed = match.group(2) == 'true'
+            self.model_results[model_index] = StageResult(['javac'], 1 if compilation_failed else 0,
+                                                          self.model_outputs[model_index])
+        else:
+            self.model_outputs[self.current_model_index].feed(line)
+
+    def __end_model_section(self, compiled_executors: list[TransformationExecutor]):
+        """
+        Completes the output and the compile time of the model of which the target was executed last.
+        """
+        if self.current_model_index is None:
+            return
+        self.model_outputs[self.current_model_index].close()
+        compiled_executors[self.current_model_index].transformation_result.mark_end_time(
+            TransformationStage.COMPILE_CHECK)
+        self.current_model_index = None
+
+    def close(self):
+        """
+        Removes the batch folder if it is a temporary folder.
+        """
+        if self.remove_batch_folder:
+            shutil.rmtree(self.batch_folder, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,102 @@
+#  Copyright (c) 2024.
+import re
+
+COMPILE_ERROR_MULTIPLE_INHERITENCE = "Multiple class inheritance present"
+COMPILE_ERROR_VARIABLE_ALREADY_DEFINED = "Duplicate variable definition"
+COMPILE_ERROR_CANNOT_OVERRIDE_FROM_SUPER = "Cannot override from super"
+COMPILE_ERROR_RESERVED_KEYWORD_NAME = "Reserved keyword name"
+NON_RESOLVED_COMPILE_ERROR_CATEGORY = 'Could not extract'
+
+java_name_regex = r"[a-zA-Z_$][a-zA-Z_$0-9]*"
+
+# Compile error category -> pattern and template (with \N for group N) of the detail field, in order of priority. The
+#   first group of every pattern is not optional, so it has a value for every match.
+COMPILE_ERROR_PATTERNS = {
+    # Multiple inheritence
+    COMPILE_ERROR_MULTIPLE_INHERITENCE: (
+        re.compile(f"public class ({java_name_regex}) extends {java_name_regex}, {java_name_regex}"), r"\1"),
+    # Variable already defined
+    COMPILE_ERROR_VARIABLE_ALREADY_DEFINED: (
+        re.compile(f"error: (variable|method) ({java_name_regex})(\\(\\))? is already defined in {java_name_regex} "
+                   f"({java_name_regex})"), r"variable \2 in \4"),
+    # Usage of reserved name
+    COMPILE_ERROR_RESERVED_KEYWORD_NAME: (
+        re.compile("(" + java_name_regex + r")\.java.{0,10} error: <identifier> expected"), r"\1"),
+    # Cannot override
+    COMPILE_ERROR_CANNOT_OVERRIDE_FROM_SUPER: (
+        re.compile(f"error: ({java_name_regex})(\\(\\))? in ({java_name_regex}) cannot override "
+                   f"{java_name_regex}(\\(\\))? in ({java_name_regex})"), r"attribute \1 in classes \3 and \5"),
+}
+
+
+def classify_compile_error(error_str: str):
+    """
+    Identifies the category of a compilation error.
+    :param error_str: Console output of (a part of) a failed Java build.
+    :return: A 2-tuple of the category of the first error found (in order of priority of the categories) and a detail
+        field with the corresponding class/variable name(s), or NON_RESOLVED_COMPILE_ERROR_CATEGORY and None.
+    """
+    for compile_error_category, (pattern, detail_template) in COMPILE_ERROR_PATTERNS.items():
+        if match := pattern.search(error_str):
+            return compile_error_category, match.expand(detail_template)
+    return NON_RESOLVED_COMPILE_ERROR_CATEGORY, None
+
+
+class CompileLogParser:
+    """
+    Line handler (see StageOutput) that parses the javac diagnostics from the complete console output of a compile
+    check, in the same pass in which the output is consumed.
+
+    A diagnostic starts with a line '<file>.java:<line>: error|warning: <message>' (prefixed with '[javac]' when javac
+    is executed by ANT), followed by lines with details such as the source line of the error. Its category is determined
+    from the first lines of the diagnostic only, so the time taken is linear in the size of the output.
+    """
+
+    DIAGNOSTIC_REGEX = re.compile(r"(?P<prefix>\s*(?:\[javac\] )?)(?P<file>\S.*?\.java):(?P<line>\d+): "
+                                  r"(?P<kind>error|warning): (?P<message>.*)")
+    # E.g. '3 errors', printed after the last diagnostic
+    SUMMARY_REGEX = re.compile(r"\s*\d+ (?:error|warning)s?\s*$")
+    # Number of lines following the first line of a diagnostic that are used to determine its category
+    N_DETAIL_LINES = 4
+
+    def __init__(self):
+        self.diagnostics = []
+        # Diagnostic being parsed: its record, prefix of its lines and its lines so far
+        self.current = None
+        self.current_prefix = None
+        self.current_lines = []
+
+    def feed(self, line: str):
+        """
+        Consume the next line of the output.
+        """
+        if match := self.DIAGNOSTIC_REGEX.match(line):
+            self.__end_diagnostic()
+            self.current = {'file': match.group('file'), 'line': int(match.group('line')),
+                            'kind': match.group('kind'), 'message': match.group('message').rstrip()}
+            self.current_prefix = match.group('prefix')
+            self.current_lines = [line[match.start('file'):].rstrip()]
+            return
+        if self.current is None:
+            return
+        # Lines of other ANT tasks (e.g. 'BUILD FAILED') or the summary of javac end the diagnostic
+        if not line.startswith(self.current_prefix) or self.SUMMARY_REGEX.match(line, len(self.current_prefix)):
+            self.__end_diagnostic()
+        elif len(self.current_lines) <= self.N_DETAIL_LINES:
+            self.current_lines.append(line[len(self.current_prefix):].rstrip())
+
+    def __end_diagnostic(self):
+        if self.current is None:
+            return
+        self.current['category'], self.current['detail'] = classify_compile_error('\n'.join(self.current_lines))
+        self.diagnostics.append(self.current)
+        self.current = None
+        self.current_lines = []
+
+    def get_diagnostics(self) -> list[dict]:
+        """
+        :return: A dict per diagnostic in the output consumed so far, with its 'file', 'line', 'kind' ('error' or
+            'warning'), 'message', 'category' (one of the COMPILE_ERROR_* constants) and 'detail'.
+        """
+        self.__end_diagnostic()
+        return self.diagnostics
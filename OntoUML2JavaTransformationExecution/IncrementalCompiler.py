@@ -0,0 +1,281 @@
+#  Copyright (c) 2024.
+import filecmp
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import xml.etree.ElementTree as ElementTree
+from typing import Callable
+
+from OntoUML2JavaTransformationExecution.StageOutput import StageOutput
+from OntoUML2JavaTransformationExecution.StageRunner import StageResult, StageRunner, SubprocessStageRunner, \
+    get_remaining_time
+
+
+class IncrementalCompiler:
+    """
+    Compile check that keeps the generated sources and class files of the previous compilation of every model, and
+    only recompiles the files that changed since then.
+
+    The newly generated sources are compared with the kept sources. Changed and added files are recompiled together
+    with all files that (directly or indirectly) mention the name of a changed class. A full build is done when the
+    dependency picture is unclear: when files were deleted, when the previous compilation failed or is missing, or when a
+    file is not in the folder of its package. A failing incremental compilation is repeated as a full build, so the
+    reported errors are those of a clean build.
+
+    The compilation itself is an ANT javac task, which compiles the sources of which the class file is missing. Only the
+    class files of the files to recompile are therefore removed.
+
+    With 'verify', every compilation is checked against a clean build: the verdict against that of a 'clean' and
+    'build-project' of the project the code was generated in (so differences between the javac settings of this compiler
+    and those of the project are found), and the class files against those of a compilation from scratch with the javac
+    task of this compiler (so stale class files are found).
+    """
+
+    BUILD_FILE_NAME = 'incremental-compile.xml'
+    STATE_FILE_NAME = 'state.json'
+
+    FULL = 'full'
+    INCREMENTAL = 'incremental'
+    UP_TO_DATE = 'up-to-date'
+
+    PACKAGE_REGEX = re.compile(r"^\s*package\s+([\w.]+)\s*;", re.MULTILINE)
+    WORD_REGEX = re.compile(r"\w+")
+
+    def __init__(self, store_location, stage_runner: StageRunner = None, classpath=(), verify=False):
+        """
+        :param store_location: Folder in which the sources and class files of every model are kept between runs.
+        :param stage_runner: How the ANT javac task is executed. Default starts a new ANT process per compilation.
+        :param classpath: Jars or folders with classes the generated code depends on.
+        :param verify: Whether to check every compilation against a clean build of the same sources, see the class
+            documentation.
+        """
+        self.store_location = os.path.abspath(store_location)
+        os.makedirs(self.store_location, exist_ok=True)
+        self.stage_runner = stage_runner if stage_runner is not None else SubprocessStageRunner()
+        self.classpath = [os.path.abspath(path) for path in classpath]
+        self.verify = verify
+
+        self.build_file_path = os.path.join(self.store_location, self.BUILD_FILE_NAME)
+        self.__write_build_file()
+
+        # Per model: how its last compilation was performed (see 'get_outcome')
+        self.outcomes = {}
+
+    def __write_build_file(self):
+        project = ElementTree.Element('project', name='incremental-compile', default='compile')
+        target = ElementTree.SubElement(project, 'target', name='compile')
+        ElementTree.SubElement(target, 'mkdir', dir='${classes.dir}')
+        javac = ElementTree.SubElement(target, 'javac', srcdir='${src.dir}', destdir='${classes.dir}',
+                                       includeantruntime='false', encoding='UTF-8')
+        classpath = ElementTree.SubElement(javac, 'classpath')
+        for path in self.classpath:
+            ElementTree.SubElement(classpath, 'pathelement', location=path)
+        ElementTree.ElementTree(project).write(self.build_file_path, encoding='utf-8', xml_declaration=True)
+
+    def __get_model_folder(self, model_name):
+        return os.path.join(self.store_location, model_name)
+
+    def compile(self, model_name, generated_source_path, create_output: Callable[[], StageOutput] = StageOutput,
+                timeout=None, project_path=None) -> StageResult:
+        """
+        Compile checks the generated code of a model, recompiling only what changed since its previous compilation.
+        :param model_name: Name of the model, identifying its kept sources and class files.
+        :param generated_source_path: Folder with the newly generated sources of the model.
+        :param create_output: Creates the StageOutput consuming the console output of an ANT execution. A failed
+            incremental compilation is followed by a full build with a new output.
+        :param timeout: Time limit in seconds of the compilation, None for no limit. A failed incremental compilation
+            and the full build repeating it together have to finish within the limit. Verifying the compilation (see
+            'verify') is not limited by it.
+        :param project_path: Eclipse project with the ANT build file (targets 'clean' and 'build-project') of which the
+            source folder is 'generated_source_path'. With 'verify', its build gives the verdict of the clean build. If
+            None (e.g. the code is generated in a scratch workspace), the verdict of a compilation from scratch with the
+            javac task of this compiler is used instead.
+        :return: The result of the compilation, equal to that of a clean build.
+        """
+        start_time = time.monotonic()
+        model_folder = self.__get_model_folder(model_name)
+        kept_source_path = os.path.join(model_folder, 'src')
+        classes_path = os.path.join(model_folder, 'classes')
+
+        to_compile = self.__get_files_to_recompile(model_folder, generated_source_path)
+        n_compiled_files = len(to_compile) if to_compile is not None else None
+        # Until the compilation is finished, the kept files are not consistent (e.g. when a time limit is exceeded)
+        self.__write_state(model_folder, None)
+        if to_compile is None:
+            mode = self.FULL
+            result = self.__full_build(model_folder, generated_source_path, create_output(), timeout)
+        elif not to_compile:
+            print("Generated code did not change since its previous (successful) compilation")
+            mode = self.UP_TO_DATE
+            output = create_output()
+            output.close()
+            result = StageResult(['javac'], 0, output)
+        else:
+            print(f"Recompiling {len(to_compile)} changed or dependent files")
+            for relative_path in to_compile:
+                self.__remove_class_files(classes_path, relative_path)
+                os.makedirs(os.path.dirname(os.path.join(kept_source_path, relative_path)), exist_ok=True)
+                shutil.copyfile(os.path.join(generated_source_path, relative_path),
+                                os.path.join(kept_source_path, relative_path))
+            mode = self.INCREMENTAL
+            result = self.__run_javac(kept_source_path, classes_path, create_output(), timeout)
+            if result.returncode != 0:
+                print("Incremental compilation failed, repeating it as a full build")
+                mode = self.FULL
+                result = self.__full_build(model_folder, generated_source_path, create_output(),
+                                           get_remaining_time(timeout, start_time))
+
+        if mode == self.FULL:
+            n_compiled_files = len(self.__list_java_files(kept_source_path))
+        self.__write_state(model_folder, result.returncode)
+        verified = self.__verify(generated_source_path, classes_path, result, project_path, timeout) \
+            if self.verify else None
+        self.outcomes[model_name] = (mode, n_compiled_files, verified)
+        return result
+
+    def get_outcome(self, model_name):
+        """
+        :param model_name: Name of a model compiled with 'compile'.
+        :return: Tuple of how its last compilation was performed ('full', 'incremental' or 'up-to-date'), the number of
+            compiled source files, and whether the outcome equals a clean build (None if not verified).
+        """
+        return self.outcomes[model_name]
+
+    def __get_files_to_recompile(self, model_folder, generated_source_path):
+        """
+        Compares the newly generated sources with the kept sources.
+        :return: Paths (relative to the source folder) of the files to recompile, or None if a full build is needed.
+        """
+        kept_source_path = os.path.join(model_folder, 'src')
+        state_path = os.path.join(model_folder, self.STATE_FILE_NAME)
+        if not os.path.isfile(state_path):
+            return None
+        with open(state_path, encoding='utf-8') as f:
+            if json.load(f)['returncode'] != 0:
+                return None
+
+        kept_files = self.__list_java_files(kept_source_path)
+        generated_files = self.__list_java_files(generated_source_path)
+        if not kept_files <= generated_files:
+            # Deleted files may leave class files that other classes still (wrongly) compile against
+            return None
+
+        changed = {relative_path for relative_path in generated_files
+                   if relative_path not in kept_files
+                   or not filecmp.cmp(os.path.join(kept_source_path, relative_path),
+                                      os.path.join(generated_source_path, relative_path), shallow=False)}
+        if not changed:
+            return set()
+
+        words_per_file = {}
+        for relative_path in generated_files:
+            with open(os.path.join(generated_source_path, relative_path), encoding='utf-8', errors='replace') as f:
+                content = f.read()
+            if not self.__is_in_package_folder(relative_path, content):
+                return None
+            words_per_file[relative_path] = set(self.WORD_REGEX.findall(content))
+
+        # Files mentioning a class to recompile are recompiled as well, until no more files are added
+        to_compile = set(changed)
+        new_class_names = {self.__get_class_name(relative_path) for relative_path in changed}
+        while new_class_names:
+            dependents = {relative_path for relative_path, words in words_per_file.items()
+                          if relative_path not in to_compile and not words.isdisjoint(new_class_names)}
+            to_compile |= dependents
+            new_class_names = {self.__get_class_name(relative_path) for relative_path in dependents}
+        return to_compile
+
+    @staticmethod
+    def __list_java_files(source_path):
+        java_files = set()
+        for root, _, files in os.walk(source_path):
+            for file_name in files:
+                if file_name.endswith('.java'):
+                    java_files.add(os.path.relpath(os.path.join(root, file_name), source_path))
+        return java_files
+
+    @staticmethod
+    def __get_class_name(relative_path):
+        return os.path.splitext(os.path.basename(relative_path))[0]
+
+    def __is_in_package_folder(self, relative_path, content):
+        match = self.PACKAGE_REGEX.search(content)
+        package_folder = match.group(1).replace('.', os.sep) if match is not None else ''
+        return os.path.dirname(relative_path) == package_folder
+
+    def __remove_class_files(self, classes_path, relative_path):
+        """
+        Removes the class files of a source file, including those of its nested classes.
+        """
+        class_folder = os.path.join(classes_path, os.path.dirname(relative_path))
+        class_name = self.__get_class_name(relative_path)
+        if not os.path.isdir(class_folder):
+            return
+        for file_name in os.listdir(class_folder):
+            if file_name == f"{class_name}.class" or (file_name.startswith(f"{class_name}$")
+                                                      and file_name.endswith('.class')):
+                os.remove(os.path.join(class_folder, file_name))
+
+    def __full_build(self, model_folder, generated_source_path, output: StageOutput, timeout) -> StageResult:
+        """
+        Replaces the kept sources by the generated sources and compiles all of them into an empty classes folder.
+        """
+        kept_source_path = os.path.join(model_folder, 'src')
+        classes_path = os.path.join(model_folder, 'classes')
+        shutil.rmtree(kept_source_path, ignore_errors=True)
+        shutil.rmtree(classes_path, ignore_errors=True)
+        shutil.copytree(generated_source_path, kept_source_path)
+        return self.__run_javac(kept_source_path, classes_path, output, timeout)
+
+    def __run_javac(self, source_path, classes_path, output: StageOutput, timeout) -> StageResult:
+        return self.stage_runner.run([f"-Dsrc.dir={source_path}", f"-Dclasses.dir={classes_path}", '-f',
+                                      self.build_file_path, 'compile'], cwd=self.store_location, output=output,
+                                     timeout=timeout)
+
+    def __write_state(self, model_folder, returncode):
+        os.makedirs(model_folder, exist_ok=True)
+        with open(os.path.join(model_folder, self.STATE_FILE_NAME), 'w', encoding='utf-8') as f:
+            json.dump({'returncode': returncode}, f)
+
+    def __verify(self, generated_source_path, classes_path, result: StageResult, project_path, timeout):
+        """
+        Builds the generated sources from scratch and compares the outcome with the result of 'compile'.
+        :return: Whether the verdict equals that of a clean build of the project (see 'compile') and, if the compilation
+            succeeded, a compilation from scratch produced identical class files.
+        """
+        verified = True
+        if project_path is not None:
+            self.stage_runner.run(['clean'], cwd=project_path, output=StageOutput(), timeout=timeout)
+            project_result = self.stage_runner.run(['build-project'], cwd=project_path, output=StageOutput(),
+                                                   timeout=timeout)
+            verified = (project_result.returncode == 0) == (result.returncode == 0)
+
+        if verified and (project_path is None or result.returncode == 0):
+            with tempfile.TemporaryDirectory(prefix='verify-compile-') as verify_folder:
+                verify_source_path = os.path.join(verify_folder, 'src')
+                verify_classes_path = os.path.join(verify_folder, 'classes')
+                shutil.copytree(generated_source_path, verify_source_path)
+                clean_result = self.__run_javac(verify_source_path, verify_classes_path, StageOutput(), timeout)
+
+                verified = (clean_result.returncode == 0) == (result.returncode == 0)
+                if verified and result.returncode == 0:
+                    verified = self.__have_identical_files(classes_path, verify_classes_path)
+        if not verified:
+            print(f"!! Incremental compilation differs from a clean build of {generated_source_path}")
+        return verified
+
+    @staticmethod
+    def __have_identical_files(folder_a, folder_b):
+        files_a = IncrementalCompiler.__list_files(folder_a)
+        if files_a != IncrementalCompiler.__list_files(folder_b):
+            return False
+        return all(filecmp.cmp(os.path.join(folder_a, relative_path), os.path.join(folder_b, relative_path),
+                               shallow=False) for relative_path in files_a)
+
+    @staticmethod
+    def __list_files(folder):
+        return {os.path.relpath(os.path.join(root, file_name), folder)
+                for root, _, files in os.walk(folder) for file_name in files}
@@ -0,0 +1,137 @@
+#  Copyright (c) 2024.
+import queue
+import threading
+from typing import Callable, Iterable
+
+from OntoUML2JavaTransformationExecution.TransformationExecutor import TransformationExecutor
+from OntoUML2JavaTransformationExecution.TransformationStage import TransformationStage
+
+
+class PipelineScheduler:
+    """
+    Executes the transformation chains of many models as a pipeline. Every stage has its own queue and a limited number
+    of worker threads, and a model moves on to the queue of its next stage as soon as its previous stage is finished.
+    This keeps all stages busy, while the number of concurrent executions of memory-hungry stages can be limited
+    separately.
+
+    The ACCELEO and COMPILE_CHECK stages of a model use the same code generation project. A model therefore claims one
+    of a pool of isolated code generation projects (see TransformationExecutor.create_isolated_code_generation_project)
+    from its ACCELEO stage until its last stage is done.
+
+    The stage runner of the executors is used from multiple threads at the same time, which the default
+    SubprocessStageRunner supports.
+    """
+
+    DEFAULT_STAGE_CONCURRENCY = {
+        TransformationStage.READ_ONTOUML: 2,
+        TransformationStage.ATL: 4,
+        TransformationStage.ACCELEO: 2,
+        TransformationStage.COMPILE_CHECK: 2
+    }
+
+    def __init__(self, stage_concurrency: dict[TransformationStage, int] = None):
+        """
+        :param stage_concurrency: Maximum number of models being processed at the same time per stage. Stages that are
+            not provided use the value of DEFAULT_STAGE_CONCURRENCY.
+        """
+        self.stage_concurrency = self.DEFAULT_STAGE_CONCURRENCY | (stage_concurrency or {})
+
+        self.stage_queues = {stage: queue.Queue() for stage in self.stage_concurrency}
+        self.code_generation_projects = queue.Queue()
+        self.code_generation_project_paths = set()
+        self.callback_lock = threading.Lock()
+        self.n_unfinished = 0
+        self.all_finished = threading.Event()
+
+    def run(self, executors: Iterable[TransformationExecutor],
+            on_finished: Callable[[TransformationExecutor], None],
+            on_error: Callable[[TransformationExecutor, Exception], None] = None):
+        """
+        Executes the transformation chain of all executors. Returns once all of them are finished.
+        :param executors: Executors of the models to be transformed.
+        :param on_finished: Called with the executor of a model once all its stages are executed (or a stage failed).
+            Calls are never concurrent.
+        :param on_error: Called with the executor of a model and the exception if a stage raised an exception. The model
+            does not continue to its next stages. Calls are never concurrent. Default prints the exception.
+        """
+        executors = list(executors)
+        if not executors:
+            return
+
+        self.on_finished = on_finished
+        self.on_error = on_error if on_error is not None else lambda executor, e: print(e)
+        self.n_unfinished = len(executors)
+        self.all_finished.clear()
+
+        project_paths = self.__create_code_generation_projects()
+        threads = [threading.Thread(target=self.__stage_worker, args=(stage,), daemon=True,
+                                    name=f"{stage.name}-{worker_index}")
+                   for stage, concurrency in self.stage_concurrency.items() for worker_index in range(concurrency)]
+        try:
+            for thread in threads:
+                thread.start()
+            for executor in executors:
+                self.stage_queues[executor.get_stages()[0]].put(executor)
+            self.all_finished.wait()
+        finally:
+            for stage, concurrency in self.stage_concurrency.items():
+                for _ in range(concurrency):
+                    self.stage_queues[stage].put(None)
+            for thread in threads:
+                thread.join()
+            for project_path in project_paths:
+                TransformationExecutor.remove_isolated_code_generation_project(project_path)
+
+    def __create_code_generation_projects(self):
+        """
+        Creates enough code generation projects to keep both the ACCELEO and COMPILE_CHECK stages busy.
+        :return: Paths of the created projects.
+        """
+        n_projects = (self.stage_concurrency[TransformationStage.ACCELEO]
+                      + self.stage_concurrency[TransformationStage.COMPILE_CHECK])
+        project_paths = []
+        for project_index in range(n_projects):
+            project_path = TransformationExecutor.create_isolated_code_generation_project(
+                f"{TransformationExecutor.GENERATED_CODE_PROJECT}-pipeline-{project_index}")
+            project_paths.append(project_path)
+            self.code_generation_projects.put(project_path)
+        self.code_generation_project_paths = set(project_paths)
+        return project_paths
+
+    def __stage_worker(self, stage: TransformationStage):
+        """
+        Worker thread of a stage: executes the stage for models from the queue of the stage until it gets None.
+        """
+        while (executor := self.stage_queues[stage].get()) is not None:
+            stages = executor.get_stages()
+            next_stage_index = stages.index(stage) + 1
+            try:
+                if stage == TransformationStage.ACCELEO:
+                    executor.code_generation_project_path = self.code_generation_projects.get()
+                executor.execute_stage(stage)
+
+                finished = executor.transformation_failed or next_stage_index == len(stages)
+                if finished:
+                    with self.callback_lock:
+                        self.on_finished(executor)
+            except Exception as e:
+                finished = True
+                with self.callback_lock:
+                    self.on_error(executor, e)
+
+            if finished:
+                self.__finish(executor)
+            else:
+                self.stage_queues[stages[next_stage_index]].put(executor)
+
+    def __finish(self, executor: TransformationExecutor):
+        """
+        Releases the code generation project of a finished model and signals when all models are finished.
+        """
+        if executor.code_generation_project_path in self.code_generation_project_paths:
+            self.code_generation_projects.put(executor.code_generation_project_path)
+
+        with self.callback_lock:
+            self.n_unfinished -= 1
+            if self.n_unfinished == 0:
+                self.all_finished.set()
@@ -0,0 +1,124 @@
+#  Copyright (c) 2024.
+import os
+import shutil
+import tempfile
+import xml.etree.ElementTree as ElementTree
+
+from OntoUML2JavaTransformationExecution.StageOutput import StageOutput
+from OntoUML2JavaTransformationExecution.StageRunner import StageResult, StageRunner
+
+
+class ScratchWorkspace:
+    """
+    Scratch folder (by default in RAM, at /dev/shm) in which the intermediate models, the generated code and its class
+    files of the models of a run are stored, instead of in the projects of the Eclipse workspace.
+
+    Python creates and clears the folders itself, and the generated code is compiled with a javac task of a generated
+    ANT build file, so no ANT executions are needed for 'clear-source-files' and 'clean'. Only the requested artifacts
+    of a model are copied to persistent storage once the model is done.
+    """
+
+    XMI = 'xmi'
+    UML = 'uml'
+    SOURCE = 'src'
+    CLASSES = 'classes'
+    ARTIFACTS = (XMI, UML, SOURCE, CLASSES)
+
+    BUILD_FILE_NAME = 'scratch-compile.xml'
+
+    def __init__(self, scratch_location=None, artifact_location=None, kept_artifacts=(), classpath=()):
+        """
+        :param scratch_location: Folder in which the scratch folder of the run is created. Default is /dev/shm if
+            available (a RAM-backed file system on Linux), otherwise the temporary folder of the system.
+        :param artifact_location: Folder to which the kept artifacts are copied, in a sub-folder per model.
+        :param kept_artifacts: Which artifacts of every model to copy to 'artifact_location', any of ARTIFACTS.
+        :param classpath: Jars or folders with classes the generated code depends on.
+        """
+        if scratch_location is None:
+            scratch_location = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+        os.makedirs(scratch_location, exist_ok=True)
+        self.scratch_path = tempfile.mkdtemp(prefix='ontouml2java-', dir=scratch_location)
+
+        unknown_artifacts = set(kept_artifacts) - set(self.ARTIFACTS)
+        if unknown_artifacts:
+            raise ValueError(f"Unknown artifacts {unknown_artifacts}, expected any of {self.ARTIFACTS}")
+        if kept_artifacts and artifact_location is None:
+            raise ValueError("An artifact location is required to keep artifacts")
+        self.artifact_location = os.path.abspath(artifact_location) if artifact_location is not None else None
+        self.kept_artifacts = list(kept_artifacts)
+
+        self.build_file_path = os.path.join(self.scratch_path, self.BUILD_FILE_NAME)
+        self.__write_build_file([os.path.abspath(path) for path in classpath])
+
+    def __write_build_file(self, classpath):
+        project = ElementTree.Element('project', name='scratch-compile', default='compile')
+        target = ElementTree.SubElement(project, 'target', name='compile')
+        ElementTree.SubElement(target, 'mkdir', dir='${classes.dir}')
+        javac = ElementTree.SubElement(target, 'javac', srcdir='${src.dir}', destdir='${classes.dir}',
+                                       includeantruntime='false', encoding='UTF-8')
+        classpath_element = ElementTree.SubElement(javac, 'classpath')
+        for path in classpath:
+            ElementTree.SubElement(classpath_element, 'pathelement', location=path)
+        ElementTree.ElementTree(project).write(self.build_file_path, encoding='utf-8', xml_declaration=True)
+
+    def get_artifact_path(self, model_name, artifact):
+        """
+        :param model_name: Name of the model.
+        :param artifact: One of ARTIFACTS.
+        :return: Location of the artifact of the model in the scratch folder.
+        """
+        file_names = {self.XMI: f"{model_name}.xmi", self.UML: f"{model_name}.uml", self.SOURCE: 'src',
+                      self.CLASSES: 'classes'}
+        return os.path.join(self.scratch_path, model_name, file_names[artifact])
+
+    @staticmethod
+    def clear_folder(path):
+        """
+        Removes the contents of a folder, creating it if it does not exist.
+        """
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+    def compile(self, model_name, stage_runner: StageRunner, output: StageOutput = None, timeout=None) -> StageResult:
+        """
+        Compiles the generated code of a model from scratch.
+        :param model_name: Name of the model.
+        :param stage_runner: Runner executing the javac task.
+        :param output: Consumes the console output of the compilation.
+        :param timeout: Time limit in seconds, None for no limit.
+        :return: The result of the compilation.
+        """
+        classes_path = self.get_artifact_path(model_name, self.CLASSES)
+        self.clear_folder(classes_path)
+        return stage_runner.run([f"-Dsrc.dir={self.get_artifact_path(model_name, self.SOURCE)}",
+                                 f"-Dclasses.dir={classes_path}", '-f', self.build_file_path, 'compile'],
+                                cwd=self.scratch_path, output=output, timeout=timeout)
+
+    def save_artifacts(self, model_name):
+        """
+        Copies the kept artifacts of a model to the artifact location, and removes the scratch folder of the model.
+        :param model_name: Name of the model.
+        """
+        for artifact in self.kept_artifacts:
+            scratch_artifact_path = self.get_artifact_path(model_name, artifact)
+            if not os.path.exists(scratch_artifact_path):
+                continue
+            target_path = os.path.join(self.artifact_location, model_name, os.path.basename(scratch_artifact_path))
+            if os.path.isdir(scratch_artifact_path):
+                shutil.copytree(scratch_artifact_path, target_path, dirs_exist_ok=True)
+            else:
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                shutil.copyfile(scratch_artifact_path, target_path)
+        shutil.rmtree(os.path.join(self.scratch_path, model_name), ignore_errors=True)
+
+    def close(self):
+        """
+        Removes the scratch folder of the run.
+        """
+        shutil.rmtree(self.scratch_path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
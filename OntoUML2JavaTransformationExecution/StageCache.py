@@ -0,0 +1,140 @@
+#  Copyright (c) 2024.
+import hashlib
+import os
+import shutil
+import tempfile
+
+from OntoUML2JavaTransformationExecution.StageOutput import StageOutput
+from OntoUML2JavaTransformationExecution.StageRunner import StageResult
+from OntoUML2JavaTransformationExecution.TransformationStage import TransformationStage
+
+
+class StageCache:
+    """
+    Content-addressed cache for the outputs of the READ_ONTOUML, ATL and ACCELEO stages.
+
+    An entry is keyed by the hash of the input file of a stage and a fingerprint of the Eclipse project executing the
+    stage. When neither changed, the output of the stage (the XMI model, the UML model or the generated source folder)
+    and its console output are restored from the cache instead of executing the stage again. Byte-identical models
+    therefore also share their entries within a single run.
+    """
+
+    # Folders of the Eclipse projects that contain generated files, which are not part of the project fingerprint
+    IGNORED_PROJECT_FOLDERS = {'generated-models', 'bin', '.git', '.metadata', '.settings'}
+
+    OUTPUT_NAME = 'output'
+    STDOUT_NAME = 'stdout.txt'
+
+    def __init__(self, cache_location):
+        """
+        :param cache_location: Folder in which the cache entries are stored. Created if it does not exist.
+        """
+        self.cache_location = os.path.abspath(cache_location)
+        os.makedirs(self.cache_location, exist_ok=True)
+        self.project_fingerprints = {}
+
+    @staticmethod
+    def _hash_file(path, hasher=None):
+        hasher = hasher if hasher is not None else hashlib.sha256()
+        with open(path, 'rb') as f:
+            while chunk := f.read(1 << 20):
+                hasher.update(chunk)
+        return hasher
+
+    def get_project_fingerprint(self, project_path):
+        """
+        Hash of the contents of all (non-generated) files of an Eclipse project. Calculated once per project.
+        :param project_path: Path of the Eclipse project.
+        :return: Hex digest of the fingerprint.
+        """
+        project_path = os.path.abspath(project_path)
+        if project_path not in self.project_fingerprints:
+            hasher = hashlib.sha256()
+            for root, dirs, files in os.walk(project_path):
+                dirs[:] = sorted(d for d in dirs if d not in self.IGNORED_PROJECT_FOLDERS)
+                for file_name in sorted(files):
+                    file_path = os.path.join(root, file_name)
+                    hasher.update(os.path.relpath(file_path, project_path).replace(os.sep, '/').encode('utf-8'))
+                    hasher.update(self._hash_file(file_path).digest())
+            self.project_fingerprints[project_path] = hasher.hexdigest()
+        return self.project_fingerprints[project_path]
+
+    def get_key(self, stage: TransformationStage, input_path, project_path):
+        """
+        Cache key for executing a stage on an input file with an Eclipse project.
+        :param stage: The transformation stage.
+        :param input_path: Input file of the stage (OntoUML JSON, XMI or UML model).
+        :param project_path: Eclipse project that executes the stage.
+        :return: Hex digest of the key.
+        """
+        hasher = hashlib.sha256(stage.name.encode('utf-8'))
+        hasher.update(self.get_project_fingerprint(project_path).encode('utf-8'))
+        return self._hash_file(input_path, hasher).hexdigest()
+
+    def _entry_path(self, stage: TransformationStage, key):
+        return os.path.join(self.cache_location, stage.name, key)
+
+    def get_console_log_path(self):
+        """
+        :return: A new temporary file to write the console output of a stage to, to be handed to 'store'.
+        """
+        temp_folder = os.path.join(self.cache_location, 'tmp')
+        os.makedirs(temp_folder, exist_ok=True)
+        file_descriptor, log_path = tempfile.mkstemp(suffix='.log', dir=temp_folder)
+        os.close(file_descriptor)
+        return log_path
+
+    def restore(self, stage: TransformationStage, key, output_path, output: StageOutput) -> StageResult | None:
+        """
+        Restores the output of a cached stage execution.
+        :param stage: The transformation stage.
+        :param key: Key from 'get_key'.
+        :param output_path: Where the output file (or the contents of the output folder) should be restored.
+        :param output: Consumes the cached console output of the stage, as if the stage was executed.
+        :return: The result of the cached execution, or None if not in the cache.
+        """
+        entry_path = self._entry_path(stage, key)
+        if not os.path.isdir(entry_path):
+            return None
+
+        cached_output = os.path.join(entry_path, self.OUTPUT_NAME)
+        if os.path.isdir(cached_output):
+            shutil.copytree(cached_output, output_path, dirs_exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            shutil.copyfile(cached_output, output_path)
+
+        with open(os.path.join(entry_path, self.STDOUT_NAME), encoding='utf-8') as f:
+            output.feed_lines(f)
+        output.close()
+        return StageResult(['cache', stage.name, key], 0, output)
+
+    def store(self, stage: TransformationStage, key, output_path, result: StageResult, console_log_path):
+        """
+        Stores the output of a successful stage execution. Unsuccessful executions are not cached.
+        :param stage: The transformation stage.
+        :param key: Key from 'get_key'.
+        :param output_path: Output file or folder of the stage.
+        :param result: The result of the stage.
+        :param console_log_path: File with the complete console output of the stage (see 'get_console_log_path'). It is
+            moved into the cache or removed.
+        """
+        entry_path = self._entry_path(stage, key)
+        if result.returncode != 0 or not os.path.exists(output_path) or os.path.isdir(entry_path):
+            os.remove(console_log_path)
+            return
+
+        # Build the entry next to its final location and move it in place, so concurrent runs never see half an entry
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        temp_entry_path = tempfile.mkdtemp(dir=os.path.dirname(entry_path))
+        if os.path.isdir(output_path):
+            shutil.copytree(output_path, os.path.join(temp_entry_path, self.OUTPUT_NAME))
+        else:
+            shutil.copyfile(output_path, os.path.join(temp_entry_path, self.OUTPUT_NAME))
+        shutil.move(console_log_path, os.path.join(temp_entry_path, self.STDOUT_NAME))
+
+        try:
+            os.rename(temp_entry_path, entry_path)
+        except OSError:
+            # Stored in the meantime by another executor
+            shutil.rmtree(temp_entry_path, ignore_errors=True)
@@ -0,0 +1,152 @@
+#  Copyright (c) 2024.
+import re
+import time
+from collections import deque
+from typing import Callable, Iterable
+
+
+class StageOutput:
+    """
+    Console output of a stage, consumed line by line while the stage is running.
+
+    Only the start (the first 'head_limit' characters) and the end (the last 'tail_lines' lines) of the output are kept,
+    together with exact line and byte counts, so the memory used does not depend on the amount of output. Every line is
+    passed to the line handlers when it is consumed, which allows extracting information (e.g. warnings) from the
+    complete output in the same pass. Optionally, the complete output is also written to a log file.
+
+    The moments at which the first line is printed, ANT enters its first target and prints its footer ('BUILD
+    SUCCESSFUL/FAILED', 'Total time:') are recorded, to split the time of a stage into overhead (starting the shell and
+    JVM, bootstrapping ANT, and shutting down) and the time spent in the ANT targets themselves.
+    """
+
+    # ANT prints the name of a target followed by a colon when it enters the target
+    ANT_TARGET_REGEX = re.compile(r"[\w.\-]+:\s*$")
+    ANT_FOOTER_PREFIXES = ('BUILD SUCCESSFUL', 'BUILD FAILED', 'Total time:')
+
+    def __init__(self, head_limit=5000, tail_lines=100, line_handlers: Iterable[Callable[[str], None]] = (),
+                 log_path=None):
+        """
+        :param head_limit: Number of characters kept from the start of the output.
+        :param tail_lines: Number of lines kept from the end of the output.
+        :param line_handlers: Functions called with every line of the output (including its line ending).
+        :param log_path: Optional file to which the complete output is written.
+        """
+        self.head_limit = head_limit
+        self.line_handlers = list(line_handlers)
+
+        self.head_parts = []
+        self.n_head_chars = 0
+        self.n_head_newlines = 0
+        self.tail = deque(maxlen=tail_lines)
+
+        self.n_lines = 0
+        self.n_newlines = 0
+        self.n_bytes = 0
+
+        self.log_file = open(log_path, 'w', encoding='utf-8') if log_path is not None else None
+
+        # Monotonic timestamps, None until the moment occurred
+        self.start_time = None
+        self.first_line_time = None
+        self.first_target_time = None
+        self.footer_time = None
+        self.end_time = None
+
+    def mark_started(self):
+        """
+        To be called by the stage runner right before it starts the ANT target.
+        """
+        self.start_time = time.monotonic()
+
+    def feed(self, line: str):
+        """
+        Consume the next line of the output.
+        :param line: The line, including its line ending (the last line of the output may have none).
+        """
+        self.n_lines += 1
+        self.n_bytes += len(line.encode('utf-8'))
+        if line.endswith('\n'):
+            self.n_newlines += 1
+
+        if self.n_head_chars < self.head_limit:
+            head_part = line[:self.head_limit - self.n_head_chars]
+            self.head_parts.append(head_part)
+            self.n_head_chars += len(head_part)
+            self.n_head_newlines += head_part.count('\n')
+        self.tail.append(line)
+
+        if self.first_line_time is None:
+            self.first_line_time = time.monotonic()
+        if self.first_target_time is None and self.ANT_TARGET_REGEX.match(line):
+            self.first_target_time = time.monotonic()
+        if self.footer_time is None and line.startswith(self.ANT_FOOTER_PREFIXES):
+            self.footer_time = time.monotonic()
+
+        for line_handler in self.line_handlers:
+            line_handler(line)
+
+        if self.log_file is not None:
+            self.log_file.write(line)
+
+    def feed_lines(self, lines: Iterable[str]):
+        """
+        Consume multiple lines of output, e.g. from a file or pipe.
+        """
+        for line in lines:
+            self.feed(line)
+
+    def close(self):
+        """
+        To be called when the output is complete. Closes the log file, if any.
+        """
+        if self.end_time is None:
+            self.end_time = time.monotonic()
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+
+    def get_head(self):
+        """
+        :return: The first 'head_limit' characters of the output.
+        """
+        return ''.join(self.head_parts)
+
+    def get_tail(self):
+        """
+        :return: The last 'tail_lines' lines of the output.
+        """
+        return ''.join(self.tail)
+
+    def get_truncated_text(self):
+        """
+        :return: The first 'head_limit' characters of the output followed by the number of lines that are not shown.
+        """
+        return self.get_head() + f"\n [and {self.n_newlines - self.n_head_newlines} more lines]"
+
+    def get_time_breakdown(self):
+        """
+        Splits the time of the ANT execution into overhead and the time spent in the ANT targets. The overhead is the
+        time from the start until ANT entered its first target (shell, JVM and ANT start-up, parsing the build file) plus
+        the time from the footer of ANT until the output was complete (shutting down). Loading the Eclipse plugins
+        happens within the targets, so it counts as task time.
+        :return: Tuple of overhead seconds and task seconds, or (None, None) if the output was not produced by a
+            completed ANT execution (e.g. restored from the stage cache, or killed).
+        """
+        if None in (self.start_time, self.first_target_time, self.footer_time, self.end_time):
+            return None, None
+        overhead_s = (self.first_target_time - self.start_time) + (self.end_time - self.footer_time)
+        return overhead_s, self.footer_time - self.first_target_time
+
+    def get_overhead_breakdown(self):
+        """
+        Splits the overhead of get_time_breakdown into the start-up of the shell and JVM (from the start until the first
+        line, which ANT prints once it runs: 'Buildfile: ...'), the bootstrap of ANT (from the first line until ANT
+        entered its first target, i.e. loading ANT and parsing the build file) and the shut down (from the footer of
+        ANT until the output was complete).
+        :return: Tuple of start-up, bootstrap and shut down seconds, or (None, None, None) if the output was not
+            produced by a completed ANT execution.
+        """
+        if None in (self.start_time, self.first_line_time, self.first_target_time, self.footer_time, self.end_time):
+            return None, None, None
+        return (self.first_line_time - self.start_time, self.first_target_time - self.first_line_time,
+                self.end_time - self.footer_time)
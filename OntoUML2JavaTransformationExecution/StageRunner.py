@@ -0,0 +1,422 @@
+#  Copyright (c) 2024.
+import json
+import os
+import queue
+import signal
+import subprocess
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from OntoUML2JavaTransformationExecution.StageOutput import StageOutput
+
+
+class StageTimeoutError(subprocess.TimeoutExpired):
+    """
+    Raised when the ANT target of a stage did not finish within its time limit. The process tree of the target has
+    been killed by then.
+    """
+
+    def __init__(self, cmd, timeout, elapsed_s, output):
+        """
+        :param cmd: The executed command.
+        :param timeout: The time limit in seconds.
+        :param elapsed_s: Seconds passed before the process tree was killed.
+        :param output: The last part of the console output produced before the process tree was killed.
+        """
+        super().__init__(cmd, timeout, output=output)
+        self.elapsed_s = elapsed_s
+
+
+def get_remaining_time(timeout, start_time):
+    """
+    :param timeout: Time limit in seconds, None for no limit.
+    :param start_time: Value of time.monotonic() when the time limit started.
+    :return: Seconds left of the time limit (at least 0), or None if there is no limit.
+    """
+    return None if timeout is None else max(0.0, timeout - (time.monotonic() - start_time))
+
+
+def _new_process_group_kwargs():
+    """
+    Keyword arguments for Popen to start a process in its own process group, so it can be killed with its children.
+    """
+    if os.name == 'nt':
+        return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {'start_new_session': True}
+
+
+def kill_process_tree(process: subprocess.Popen):
+    """
+    Kills a process started with '_new_process_group_kwargs' and all processes it started (e.g. ANT and its JVM).
+    """
+    if os.name == 'nt':
+        subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)], stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+    else:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def _wait_with_resource_usage(process: subprocess.Popen):
+    """
+    Waits for a process to exit and gets the CPU time used by it and the processes it waited for (e.g. the JVM started
+    by ANT). Only supported on POSIX systems, elsewhere the resource usage is None.
+    The peak memory (ru_maxrss) of wait4 is not used: a forked child inherits the peak memory of its parent (this Python
+    process) and keeps it after exec, see ProcessTreeMemorySampler instead.
+    :return: Tuple of user CPU seconds and system CPU seconds.
+    """
+    if not hasattr(os, 'wait4'):
+        process.wait()
+        return None, None
+
+    _, wait_status, resource_usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(wait_status)
+    return resource_usage.ru_utime, resource_usage.ru_stime
+
+
+class ProcessTreeMemorySampler:
+    """
+    Measures the peak resident memory of the largest process of a process tree (e.g. ANT and the JVM it starts), by
+    sampling the peak resident memory (VmHWM) of every process of the tree from /proc while the tree runs. VmHWM only
+    counts the memory of the current program of a process, so unlike ru_maxrss it does not include the memory of the
+    Python process that started the tree. As VmHWM is a high-water mark, only the growth in the last sample interval
+    before a process exits is missed.
+
+    The tree is found by following the children of every process (/proc/<pid>/task/<tid>/children). Kernels without
+    these files (CONFIG_PROC_CHILDREN) require reading the parent of every process of the machine instead. To limit the
+    overhead, a tree is sampled less often once it has run for a while.
+
+    Only available on Linux; elsewhere the peak memory is None.
+    """
+
+    SAMPLE_INTERVAL_S = 0.05
+    # Time between two samples once the tree has run for LONG_RUNNING_AFTER_S seconds
+    LONG_RUNNING_SAMPLE_INTERVAL_S = 0.25
+    LONG_RUNNING_AFTER_S = 1.0
+
+    # Whether the kernel lists the children of every thread, see '_get_process_tree'
+    HAS_CHILDREN_FILES = os.path.isfile(f'/proc/self/task/{os.getpid()}/children')
+
+    def __init__(self, pid: int, sample_interval_s=SAMPLE_INTERVAL_S,
+                 long_running_sample_interval_s=LONG_RUNNING_SAMPLE_INTERVAL_S):
+        """
+        :param pid: Root process of the tree, which must already have started its program (as is the case once Popen
+            returns).
+        :param sample_interval_s: Time between two samples during the first LONG_RUNNING_AFTER_S seconds.
+        :param long_running_sample_interval_s: Time between two samples afterwards.
+        """
+        self.pid = pid
+        self.sample_interval_s = sample_interval_s
+        self.long_running_sample_interval_s = long_running_sample_interval_s
+        self.available = os.path.isfile(f'/proc/{pid}/status')
+        # Per process of the tree: the VmHWM (in KB) of its last sample, i.e. of the last program it executed
+        self.peak_rss_kb_per_pid = {}
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.__sample_until_stopped, daemon=True)
+
+    @staticmethod
+    def _read_peak_rss_kb(pid):
+        """
+        :return: VmHWM of a process in KB, or None if the process no longer exists or has exited (a zombie).
+        """
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1])
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            pass
+        return None
+
+    def _get_process_tree(self) -> list[int]:
+        """
+        :return: The pids of the root process and all its (running) descendants.
+        """
+        if self.HAS_CHILDREN_FILES:
+            return self._walk_process_tree()
+        return self._scan_process_tree()
+
+    def _walk_process_tree(self) -> list[int]:
+        """
+        Finds the descendants of the root process by following the children of the threads of every process in the tree.
+        """
+        tree = [self.pid]
+        for pid in tree:
+            try:
+                for thread_id in os.listdir(f'/proc/{pid}/task'):
+                    with open(f'/proc/{pid}/task/{thread_id}/children') as f:
+                        tree.extend(int(child_pid) for child_pid in f.read().split())
+            except (FileNotFoundError, ProcessLookupError, PermissionError):
+                continue
+        return tree
+
+    def _scan_process_tree(self) -> list[int]:
+        """
+        Finds the descendants of the root process from the parents of all processes of the machine.
+        """
+        children_per_pid = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    # The name of the program (in parentheses) may contain spaces, the parent pid is the second field
+                    # after it
+                    parent_pid = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (FileNotFoundError, ProcessLookupError, PermissionError, IndexError):
+                continue
+            children_per_pid.setdefault(parent_pid, []).append(int(entry))
+
+        tree = [self.pid]
+        for pid in tree:
+            tree.extend(children_per_pid.get(pid, []))
+        return tree
+
+    def sample(self):
+        """
+        Records the peak memory of the processes of the tree that are running.
+        """
+        for pid in self._get_process_tree():
+            if (peak_rss_kb := self._read_peak_rss_kb(pid)) is not None:
+                self.peak_rss_kb_per_pid[pid] = peak_rss_kb
+
+    def __sample_until_stopped(self):
+        start_time = time.monotonic()
+        while not self.stopped.is_set():
+            self.sample()
+            long_running = time.monotonic() - start_time >= self.LONG_RUNNING_AFTER_S
+            self.stopped.wait(self.long_running_sample_interval_s if long_running else self.sample_interval_s)
+
+    def start(self):
+        if self.available:
+            self.sample()
+            self.thread.start()
+
+    def stop(self):
+        """
+        Stops sampling.
+        :return: Peak resident memory in KB of the largest process of the tree, None if it could not be measured.
+        """
+        if not self.available:
+            return None
+        self.stopped.set()
+        self.thread.join()
+        return max(self.peak_rss_kb_per_pid.values(), default=None)
+
+
+class StageResult:
+    """
+    Result of executing the ANT target of a stage, including the resources it used.
+    """
+
+    def __init__(self, args: list[str], returncode: int, output: StageOutput | None, wall_time_s=None,
+                 user_cpu_s=None, sys_cpu_s=None, max_rss_kb=None):
+        """
+        :param args: The executed command.
+        :param returncode: Exit code of the target, 0 if successful.
+        :param output: The consumed console output, or None if it was not captured.
+        :param wall_time_s: Elapsed (monotonic) time of the target in seconds.
+        :param user_cpu_s: CPU time in user mode of the process tree executing the target, None if unknown.
+        :param sys_cpu_s: CPU time in kernel mode of the process tree executing the target, None if unknown.
+        :param max_rss_kb: Peak resident memory in KB of the largest process executing the target, None if unknown.
+        """
+        self.args = args
+        self.returncode = returncode
+        self.output = output
+        self.wall_time_s = wall_time_s
+        self.user_cpu_s = user_cpu_s
+        self.sys_cpu_s = sys_cpu_s
+        self.max_rss_kb = max_rss_kb
+
+
+class StageRunner(ABC):
+    """
+    Executes the ANT targets of the transformation stages (reading the OntoUML JSON, ATL, Acceleo, compiling).
+    Subclasses decide how the ANT target is executed.
+    """
+
+    @abstractmethod
+    def run(self, ant_args: list[str], cwd: str, output: StageOutput = None, timeout=None) -> StageResult:
+        """
+        Execute an ANT target.
+        :param ant_args: Arguments for ANT, i.e. the properties (-Dname=value) followed by the target.
+        :param cwd: Directory containing the ANT build file, i.e. the Eclipse project of the stage.
+        :param output: Consumes the console output line by line while the target runs, and is closed afterwards. If
+            None, the console output is printed instead.
+        :param timeout: Time limit in seconds, None for no limit. If exceeded, the process tree executing the target is
+            killed and a StageTimeoutError is raised.
+        :return: The result of the target.
+        """
+
+    def close(self):
+        """
+        Release the resources (e.g. processes) held by this runner.
+        """
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SubprocessStageRunner(StageRunner):
+    """
+    Starts a new ANT process (and therefore a new JVM) for every executed target.
+    """
+
+    def run(self, ant_args: list[str], cwd: str, output: StageOutput = None, timeout=None) -> StageResult:
+        command = ['ant', *ant_args]
+        start_time = time.monotonic()
+        # Only a process in its own process group can be killed together with its children. Without time limit, the
+        # process stays in our group, so it receives a Ctrl-C as well.
+        process_group_kwargs = _new_process_group_kwargs() if timeout is not None else {}
+        if output is not None:
+            output.mark_started()
+
+        # On Windows, ANT is a batch file that can only be started through the shell
+        with subprocess.Popen(command, shell=os.name == 'nt', cwd=cwd,
+                              stdout=subprocess.PIPE if output is not None else None, encoding='utf-8',
+                              errors='replace', **process_group_kwargs) as process:
+            timed_out = threading.Event()
+
+            def kill_on_timeout():
+                timed_out.set()
+                kill_process_tree(process)
+
+            watchdog = threading.Timer(timeout, kill_on_timeout) if timeout is not None else None
+            memory_sampler = ProcessTreeMemorySampler(process.pid)
+            try:
+                memory_sampler.start()
+                if watchdog is not None:
+                    watchdog.start()
+                if output is not None:
+                    output.feed_lines(process.stdout)
+                user_cpu_s, sys_cpu_s = _wait_with_resource_usage(process)
+            finally:
+                max_rss_kb = memory_sampler.stop()
+                if watchdog is not None:
+                    watchdog.cancel()
+                if output is not None:
+                    output.close()
+
+        if timed_out.is_set():
+            raise StageTimeoutError(command, timeout, time.monotonic() - start_time,
+                                    output.get_tail() if output is not None else None)
+        return StageResult(command, process.returncode, output, time.monotonic() - start_time, user_cpu_s, sys_cpu_s,
+                           max_rss_kb)
+
+
+class PersistentWorkerStageRunner(StageRunner):
+    """
+    Keeps a long-lived worker process per Eclipse project (i.e. per stage) and sends it the ANT targets to execute, so
+    the start-up of the JVM and the loading of the EMF/ATL/Acceleo classes is done once per run instead of once per
+    stage per model.
+
+    The worker is started with 'worker_command' in the directory of the project and communicates via stdin/stdout, with
+    one JSON object per line:
+        - request:  {"args": [<ANT arguments>], "cwd": <project directory>}
+        - response: zero or more {"line": <console output line>}, followed by {"returncode": <int>}
+    The final response may include the resources used for the target as "user_cpu_s", "sys_cpu_s" and "max_rss_kb",
+    since these cannot be measured from outside a worker that executes many targets.
+
+    A worker that exceeds the time limit of a target is killed and restarted for the next target.
+
+    'run' may be called from several threads (e.g. by the PipelineScheduler). A worker executes one target at a time,
+    so targets in the same project directory are executed one after another, while targets in different projects are
+    executed concurrently by their own workers.
+    """
+
+    def __init__(self, worker_command: list[str]):
+        """
+        :param worker_command: Command that starts a worker process, e.g. ['java', '-cp', ..., 'AntStageWorker'].
+        """
+        self.worker_command = worker_command
+        # Per project directory: the worker process and the queue of the response lines it wrote
+        self.workers: dict[str, tuple[subprocess.Popen, queue.Queue]] = {}
+        # Per project directory: the lock held while a target is executed by its worker
+        self.project_locks: dict[str, threading.Lock] = {}
+        # Guards 'workers' and 'project_locks'
+        self.workers_lock = threading.Lock()
+
+    @staticmethod
+    def _read_responses(worker: subprocess.Popen, responses: queue.Queue):
+        for response_line in worker.stdout:
+            responses.put(response_line)
+        responses.put(None)
+
+    def _get_worker(self, cwd: str) -> tuple[subprocess.Popen, queue.Queue]:
+        """
+        Get the worker for a project directory. (Re)starts the worker if it is not running.
+        """
+        with self.workers_lock:
+            if cwd not in self.workers or self.workers[cwd][0].poll() is not None:
+                worker = subprocess.Popen(self.worker_command, cwd=cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                          encoding='utf-8', bufsize=1, **_new_process_group_kwargs())
+                responses = queue.Queue()
+                threading.Thread(target=self._read_responses, args=(worker, responses), daemon=True).start()
+                self.workers[cwd] = (worker, responses)
+            return self.workers[cwd]
+
+    def _get_project_lock(self, cwd: str) -> threading.Lock:
+        with self.workers_lock:
+            return self.project_locks.setdefault(cwd, threading.Lock())
+
+    def run(self, ant_args: list[str], cwd: str, output: StageOutput = None, timeout=None) -> StageResult:
+        try:
+            # The worker of the project must not receive another request before it responded to this one
+            with self._get_project_lock(cwd):
+                return self.__run_on_worker(ant_args, cwd, output, timeout)
+        finally:
+            if output is not None:
+                output.close()
+
+    def __run_on_worker(self, ant_args: list[str], cwd: str, output: StageOutput, timeout) -> StageResult:
+        worker, responses = self._get_worker(cwd)
+        if output is not None:
+            output.mark_started()
+        worker.stdin.write(json.dumps({'args': ant_args, 'cwd': cwd}) + '\n')
+        worker.stdin.flush()
+
+        start_time = time.monotonic()
+        while True:
+            remaining_time = get_remaining_time(timeout, start_time)
+            try:
+                response_line = responses.get(timeout=remaining_time)
+            except queue.Empty:
+                kill_process_tree(worker)
+                worker.wait()
+                with self.workers_lock:
+                    del self.workers[cwd]
+                raise StageTimeoutError(['ant', *ant_args], timeout, time.monotonic() - start_time,
+                                        output.get_tail() if output is not None else None)
+
+            if response_line is None:
+                break
+            response = json.loads(response_line)
+            if 'returncode' in response:
+                return StageResult(['ant', *ant_args], response['returncode'], output, time.monotonic() - start_time,
+                                   response.get('user_cpu_s'), response.get('sys_cpu_s'), response.get('max_rss_kb'))
+
+            if output is not None:
+                output.feed(response['line'] + '\n')
+            else:
+                print(response['line'])
+
+        raise RuntimeError(f"Stage worker for {cwd} stopped before finishing ANT target {ant_args[-1:]} "
+                           f"(exit code {worker.wait()})")
+
+    def close(self):
+        with self.workers_lock:
+            workers, self.workers = self.workers, {}
+        for worker, _ in workers.values():
+            worker.stdin.close()
+            try:
+                worker.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                kill_process_tree(worker)
+                worker.wait()
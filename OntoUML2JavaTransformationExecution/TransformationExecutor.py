@@ -1,12 +1,18 @@
 #  Copyright (c) 2024.
 import re
-import subprocess
+import shutil
 import os
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
+from OntoUML2JavaTransformationExecution.IncrementalCompiler import IncrementalCompiler
+from OntoUML2JavaTransformationExecution.ScratchWorkspace import ScratchWorkspace
+from OntoUML2JavaTransformationExecution.StageCache import StageCache
+from OntoUML2JavaTransformationExecution.StageRunner import StageRunner, StageTimeoutError, SubprocessStageRunner, \
+    get_remaining_time
 from OntoUML2JavaTransformationExecution.TransformationResult import TransformationExecResult
-from OntoUML2JavaTransformationExecution.TransformationStage import TransformationStage
+from OntoUML2JavaTransformationExecution.TransformationStage import StageTimeLimit, TransformationStage
 
 
 class TransformationExecutor:
@@ -25,7 +31,13 @@ class TransformationExecutor:
 
     GENERATED_CODE_PROJECT = r"TestCodeGeneration"
 
-    def __init__(self, ontouml_json_path, java_generation_location=None, test_generated_code=False):
+    # Folder (relative to the Ecore model and ATL projects) in which the intermediate models are stored
+    MODEL_REPO_FOLDER = os.path.join("generated-models", "model-repo")
+
+    def __init__(self, ontouml_json_path, java_generation_location=None, test_generated_code=False,
+                 output_subfolder=None, stage_runner: StageRunner = None, stage_cache: StageCache = None,
+                 stage_time_limits: dict[TransformationStage, StageTimeLimit] = None,
+                 incremental_compiler: IncrementalCompiler = None, scratch_workspace: ScratchWorkspace = None):
         """
         Initializes an OntoUML2Java transformation executor.
 
@@ -34,11 +46,29 @@ class TransformationExecutor:
             workspace 'TestCodeGeneration' project. Default is None.
         :param test_generated_code: Whether to compile the generated code. Requires an ANT Build file to be present
             in the generated code location (which is present in the Eclipse workspace
+        :param output_subfolder: Optional name of a sub-folder of the 'generated-models/model-repo' folders in which the
+            intermediate XMI and UML models are stored. Allows multiple executors to run at the same time without
+            overwriting each other's models. Default is None (store directly in 'generated-models/model-repo').
+        :param stage_runner: How the ANT targets of the stages are executed. If None, a new ANT process is started for
+            every target (see SubprocessStageRunner). A runner can be shared by multiple executors.
+        :param stage_cache: Optional cache from which the outputs of the READ_ONTOUML, ATL and ACCELEO stages are
+            restored when neither their input nor their Eclipse project changed. Default is None (no caching).
+        :param stage_time_limits: Optional time limits per stage. A stage exceeding its limit is killed (including the
+            JVM it started) and recorded as timed out, and the transformation stops. Stages without limit can run
+            indefinitely. Default is None (no limits).
+        :param incremental_compiler: Optional compiler that keeps the generated code and class files of the previous
+            compile check of the model, and only recompiles what changed, instead of a 'clean' and 'build-project' of
+            the code generation project. Default is None (always a full build).
+        :param scratch_workspace: Optional scratch folder in which the intermediate models, the generated code and its
+            class files are stored instead of in the Eclipse projects. The generated code is then cleared by Python and
+            compiled with a javac task, and the artifacts to keep are copied to persistent storage by
+            'finalize_and_get_results'. Default is None (use the Eclipse projects).
         """
         self.__set_eclipse_workspace_path()
 
         self.ecore_model_project_path = os.path.join(self.ECLIPSE_WORKSPACE_PATH, self.ECORE_MODEL_PROJECT)
         self.atl_project_path = os.path.join(self.ECLIPSE_WORKSPACE_PATH, self.ATL_PROJECT)
+        self.acceleo_project_path = os.path.join(self.ECLIPSE_WORKSPACE_PATH, self.ACCELEO_PROJECT)
 
         if java_generation_location is None:
             self.code_generation_project_path = os.path.join(self.ECLIPSE_WORKSPACE_PATH, self.GENERATED_CODE_PROJECT)
@@ -47,7 +77,18 @@ class TransformationExecutor:
 
         self.test_generated_code = test_generated_code
 
+        self.stage_runner = stage_runner if stage_runner is not None else SubprocessStageRunner()
+        self.stage_cache = stage_cache
+        self.stage_time_limits = stage_time_limits or {}
+        self.incremental_compiler = incremental_compiler
+        self.scratch_workspace = scratch_workspace
+
+        self.model_repo_folder = self.MODEL_REPO_FOLDER
+        if output_subfolder is not None:
+            self.model_repo_folder = os.path.join(self.MODEL_REPO_FOLDER, output_subfolder)
+
         self.ontoUML_json_path = os.path.abspath(ontouml_json_path)
+        self.ontoUML_json_size = os.path.getsize(self.ontoUML_json_path)
         self.model_name = Path(ontouml_json_path).stem
 
         self.model_xmi_path = None
@@ -63,19 +104,106 @@ class TransformationExecutor:
         Sets the path to the Eclipse project containing the EMF OntoUML2Java project.
         Expected to be either included in the source code of this class, or as an environment variable.
         """
-        if self.ECLIPSE_WORKSPACE_PATH is None:
+        self.ECLIPSE_WORKSPACE_PATH = self.get_eclipse_workspace_path()
+
+    @classmethod
+    def get_eclipse_workspace_path(cls):
+        """
+        Gets the path to the Eclipse workspace, either from the source code of this class or from the environment variable
+        ECLIPSE_ONTOUML_2_JAVA_WORKSPACE.
+        :return: Path of the Eclipse OntoUML2Java workspace.
+        """
+        workspace_path = cls.ECLIPSE_WORKSPACE_PATH
+        if workspace_path is None:
             load_dotenv()
-            self.ECLIPSE_WORKSPACE_PATH = os.getenv("ECLIPSE_ONTOUML_2_JAVA_WORKSPACE")
+            workspace_path = os.getenv("ECLIPSE_ONTOUML_2_JAVA_WORKSPACE")
 
-        if self.ECLIPSE_WORKSPACE_PATH is None:
+        if workspace_path is None:
             raise ValueError("The path of the Eclipse OntoUML2Java workspace has not been set in either the code or "
                              "as an environment variable.")
+        return workspace_path
+
+    @classmethod
+    def create_isolated_code_generation_project(cls, project_name):
+        """
+        Creates a copy of the 'TestCodeGeneration' project (without its generated sources and class files) in the Eclipse
+        workspace. Code generated in such a copy, and the ANT tasks executed on it, do not interfere with other copies.
+        The copy is placed next to the original project, so relative paths in its ANT build file remain valid.
+        :param project_name: Name of the folder of the copy within the Eclipse workspace.
+        :return: Path of the created project, to be used as 'java_generation_location'.
+        """
+        workspace_path = cls.get_eclipse_workspace_path()
+        source_project_path = os.path.join(workspace_path, cls.GENERATED_CODE_PROJECT)
+        isolated_project_path = os.path.join(workspace_path, project_name)
+
+        if os.path.exists(isolated_project_path):
+            shutil.rmtree(isolated_project_path)
+        shutil.copytree(source_project_path, isolated_project_path, ignore=shutil.ignore_patterns('src', 'bin'))
+        os.makedirs(os.path.join(isolated_project_path, 'src'))
+        return isolated_project_path
+
+    @staticmethod
+    def remove_isolated_code_generation_project(project_path):
+        """
+        Removes a project created with 'create_isolated_code_generation_project'.
+        :param project_path: Path of the project to be removed.
+        """
+        shutil.rmtree(project_path, ignore_errors=True)
+
+    def __run_cached_stage(self, stage: TransformationStage, input_path, output_path, ant_args, cwd):
+        """
+        Executes the ANT target of a stage, unless its output can be restored from the stage cache.
+        :param stage: The transformation stage.
+        :param input_path: Input file of the stage.
+        :param output_path: Output file or folder of the stage.
+        :param ant_args: Arguments of the ANT target.
+        :param cwd: Eclipse project executing the ANT target.
+        :return: The (possibly cached) result of the stage.
+        """
+        timeout = self.__get_time_limit(stage)
+        if self.stage_cache is None:
+            return self.stage_runner.run(ant_args, cwd=cwd, output=self.transformation_result.create_stage_output(stage),
+                                         timeout=timeout)
+
+        cache_key = self.stage_cache.get_key(stage, input_path, cwd)
+        if (cached_result := self.stage_cache.restore(stage, cache_key, output_path,
+                                                      self.transformation_result.create_stage_output(stage))) is not None:
+            print(f"Restored output of {stage.name} from the stage cache")
+            self.transformation_result.mark_cache_hit(stage)
+            return cached_result
+
+        # The complete console output is needed for the cache entry
+        console_log_path = self.stage_cache.get_console_log_path()
+        result = None
+        try:
+            result = self.stage_runner.run(ant_args, cwd=cwd, output=self.transformation_result.create_stage_output(
+                stage, log_path=console_log_path), timeout=timeout)
+        finally:
+            # Without a result (e.g. the stage timed out or the runner failed), the log is not handed to the cache
+            if result is None:
+                os.remove(console_log_path)
+        self.stage_cache.store(stage, cache_key, output_path, result, console_log_path)
+        return result
+
+    def __get_time_limit(self, stage: TransformationStage):
+        """
+        :return: The time limit in seconds of a stage for this model, or None if the stage has no time limit.
+        """
+        if stage not in self.stage_time_limits:
+            return None
+        return self.stage_time_limits[stage].get_limit(self.ontoUML_json_size)
 
     def __handle_result(self, result):
         if result.returncode != 0:
             self.transformation_failed = True
         return result.returncode
 
+    def __handle_timeout(self, stage: TransformationStage, timeout_error: StageTimeoutError):
+        print(f"!! {stage.name} for {self.model_name} exceeded its time limit of {timeout_error.timeout:.1f} s")
+        self.transformation_result.mark_timeout(stage, timeout_error.elapsed_s, timeout_error.output)
+        self.transformation_failed = True
+        return -1
+
     def __ontouml_json_2_ontouml_ecore(self):
         """
         First step in the transformation: Read an OntoUML JSON into an EMF compatible XMI adhering to the OntoUML
@@ -83,17 +211,28 @@ class TransformationExecutor:
         :return: return code of the executed step.
         """
         # Path where the XMI model will be stored
-        self.model_xmi_path = os.path.join(self.ecore_model_project_path, 'generated-models', 'model-repo', self.model_name + ".xmi")
+        if self.scratch_workspace is not None:
+            self.model_xmi_path = self.scratch_workspace.get_artifact_path(self.model_name, ScratchWorkspace.XMI)
+        else:
+            self.model_xmi_path = os.path.join(self.ecore_model_project_path, self.model_repo_folder,
+                                               self.model_name + ".xmi")
+        os.makedirs(os.path.dirname(self.model_xmi_path), exist_ok=True)
 
         print(f"** Starting OntoUML JSON reading for {self.model_name}...")
         ant_prop_jsonPath = f"-DjsonPath={self.ontoUML_json_path}"
         ant_prop_outputXmiPath = f"-DoutputXmiPath={self.model_xmi_path}"
 
         self.transformation_result.mark_start_time()
-        resultReadJson = subprocess.run(["ant", ant_prop_jsonPath, ant_prop_outputXmiPath, "convertFromModelRepo"],
-                                        cwd=self.ecore_model_project_path, shell=True, stdout=subprocess.PIPE,
-                                        encoding='utf-8')
+        try:
+            resultReadJson = self.__run_cached_stage(TransformationStage.READ_ONTOUML, self.ontoUML_json_path,
+                                                     self.model_xmi_path,
+                                                     [ant_prop_jsonPath, ant_prop_outputXmiPath, "convertFromModelRepo"],
+                                                     cwd=self.ecore_model_project_path)
+        except StageTimeoutError as e:
+            self.transformation_result.mark_end_time(TransformationStage.READ_ONTOUML)
+            return self.__handle_timeout(TransformationStage.READ_ONTOUML, e)
         self.transformation_result.mark_end_time(TransformationStage.READ_ONTOUML)
+        self.transformation_result.record_step_resources('read_ontouml', resultReadJson)
         self.transformation_result.interpret_ontouml_read_result(resultReadJson)
         return self.__handle_result(resultReadJson)
 
@@ -102,8 +241,18 @@ class TransformationExecutor:
         Second step in the transformation. Call the ATL OntoUML to Implementation model transformation.
         :return: return code of the executed step.
         """
-        self.relative_output_uml_path = os.path.join("generated-models", "model-repo", self.model_name + ".uml")
-        self.absolute_output_uml_path = os.path.join(self.atl_project_path, self.relative_output_uml_path)
+        self.relative_output_uml_path = os.path.join(self.model_repo_folder, self.model_name + ".uml")
+        if self.scratch_workspace is not None:
+            # The ATL target expects a path relative to the ATL project. Not possible on another Windows drive.
+            try:
+                self.relative_output_uml_path = os.path.relpath(
+                    self.scratch_workspace.get_artifact_path(self.model_name, ScratchWorkspace.UML),
+                    self.atl_project_path)
+            except ValueError:
+                pass
+        self.absolute_output_uml_path = os.path.normpath(os.path.join(self.atl_project_path,
+                                                                      self.relative_output_uml_path))
+        os.makedirs(os.path.dirname(self.absolute_output_uml_path), exist_ok=True)
 
         print(f"** Starting ATL transformation for {self.model_name}...")
         if self.transformation_failed:
@@ -120,10 +269,15 @@ class TransformationExecutor:
         ant_prop_sourcePath = f"-DsourcePath={model_xmi_path_without_disk}"
 
         self.transformation_result.mark_start_time()
-        resultATLTransformation = subprocess.run(
-            ["ant", ant_prop_sourcePath, ant_prop_targetPath, "OntoUML2ImplementationModel"], shell=True,
-            cwd=self.atl_project_path, stdout=subprocess.PIPE, encoding='utf-8')
+        try:
+            resultATLTransformation = self.__run_cached_stage(
+                TransformationStage.ATL, self.model_xmi_path, self.absolute_output_uml_path,
+                [ant_prop_sourcePath, ant_prop_targetPath, "OntoUML2ImplementationModel"], cwd=self.atl_project_path)
+        except StageTimeoutError as e:
+            self.transformation_result.mark_end_time(TransformationStage.ATL)
+            return self.__handle_timeout(TransformationStage.ATL, e)
         self.transformation_result.mark_end_time(TransformationStage.ATL)
+        self.transformation_result.record_step_resources('atl', resultATLTransformation)
         self.transformation_result.interpret_atl_result(resultATLTransformation)
         return self.__handle_result(resultATLTransformation)
 
@@ -137,18 +291,28 @@ class TransformationExecutor:
             print("Not performing Acceleo transformation as previous step failed")
             return -1
 
-        self._clear_generated_code_source()
+        try:
+            self._clear_generated_code_source()
+        except StageTimeoutError as e:
+            return self.__handle_timeout(TransformationStage.ACCELEO, e)
 
-        uml2java_project_path = os.path.join(self.ECLIPSE_WORKSPACE_PATH, TransformationExecutor.ACCELEO_PROJECT)
+        generated_source_path = self.get_generated_source_path()
 
         ant_prop_sourceModel = f"-DsourceModel={self.absolute_output_uml_path}"
         # Generate code in source folder
-        ant_prop_targetFolder = f"-DtargetFolder={os.path.join(self.code_generation_project_path, 'src')}"
+        ant_prop_targetFolder = f"-DtargetFolder={generated_source_path}"
 
         self.transformation_result.mark_start_time()
-        resultAcceleo = subprocess.run(['ant', ant_prop_sourceModel, ant_prop_targetFolder, "Uml2java"], shell=True,
-                                       cwd=uml2java_project_path, stdout=subprocess.PIPE, encoding='utf-8')
+        try:
+            resultAcceleo = self.__run_cached_stage(TransformationStage.ACCELEO, self.absolute_output_uml_path,
+                                                    generated_source_path,
+                                                    [ant_prop_sourceModel, ant_prop_targetFolder, "Uml2java"],
+                                                    cwd=self.acceleo_project_path)
+        except StageTimeoutError as e:
+            self.transformation_result.mark_end_time(TransformationStage.ACCELEO)
+            return self.__handle_timeout(TransformationStage.ACCELEO, e)
         self.transformation_result.mark_end_time(TransformationStage.ACCELEO)
+        self.transformation_result.record_step_resources('acceleo', resultAcceleo)
         self.transformation_result.interpret_acceleo_result(resultAcceleo)
         return self.__handle_result(resultAcceleo)
 
@@ -159,8 +323,12 @@ class TransformationExecutor:
         :return:
         """
         print("Remove source files from other projects")
-        subprocess.run(['ant', 'clear-source-files'], shell=True, encoding='utf-8',
-                       cwd=self.code_generation_project_path)
+        if self.scratch_workspace is not None:
+            ScratchWorkspace.clear_folder(self.get_generated_source_path())
+            return
+        result = self.stage_runner.run(['clear-source-files'], cwd=self.code_generation_project_path,
+                                       timeout=self.__get_time_limit(TransformationStage.ACCELEO))
+        self.transformation_result.record_step_resources('clear_source', result)
 
     def __compile_check_generated_code(self):
         """
@@ -172,27 +340,114 @@ class TransformationExecutor:
             print("Not performing Compilation check as previous step failed")
             return -1
 
-        # Clean project
-        subprocess.run(['ant', 'clean'], shell=True, cwd=self.code_generation_project_path)
+        timeout = self.__get_time_limit(TransformationStage.COMPILE_CHECK)
+        self.transformation_result.mark_start_time()
+        if self.incremental_compiler is not None:
+            return self.__compile_check_incrementally(timeout)
+        if self.scratch_workspace is not None:
+            return self.__compile_check_in_scratch_workspace(timeout)
+        # The clean and the build together have to finish within the time limit of the stage
+        start_time = time.monotonic()
+        try:
+            # Clean project
+            clean_result = self.stage_runner.run(['clean'], cwd=self.code_generation_project_path, timeout=timeout)
+            self.transformation_result.record_step_resources('clean', clean_result)
+
+            # Compile and get result
+            compile_result = self.stage_runner.run(
+                ['build-project'], cwd=self.code_generation_project_path,
+                output=self.transformation_result.create_stage_output(TransformationStage.COMPILE_CHECK),
+                timeout=get_remaining_time(timeout, start_time))
+        except StageTimeoutError as e:
+            self.transformation_result.mark_end_time(TransformationStage.COMPILE_CHECK)
+            return self.__handle_timeout(TransformationStage.COMPILE_CHECK, e)
+        self.transformation_result.mark_end_time(TransformationStage.COMPILE_CHECK)
+        self.transformation_result.record_step_resources('build', compile_result)
+        self.transformation_result.interpret_compile_result(compile_result)
+        return self.__handle_result(compile_result)
+
+    def __compile_check_incrementally(self, timeout):
+        """
+        Compile check using the incremental compiler, recompiling only the code that changed since the previous compile
+        check of the model.
+        :return: return code of the compilation.
+        """
+        try:
+            # The code generation project verifies the compilation, unless the code is generated in a scratch folder
+            project_path = self.code_generation_project_path if self.scratch_workspace is None else None
+            compile_result = self.incremental_compiler.compile(
+                self.model_name, self.get_generated_source_path(),
+                lambda: self.transformation_result.create_stage_output(TransformationStage.COMPILE_CHECK), timeout,
+                project_path)
+        except StageTimeoutError as e:
+            self.transformation_result.mark_end_time(TransformationStage.COMPILE_CHECK)
+            return self.__handle_timeout(TransformationStage.COMPILE_CHECK, e)
+        self.transformation_result.mark_end_time(TransformationStage.COMPILE_CHECK)
+        self.transformation_result.record_step_resources('build', compile_result)
+        self.transformation_result.mark_incremental_compile(*self.incremental_compiler.get_outcome(self.model_name))
+        self.transformation_result.interpret_compile_result(compile_result)
+        return self.__handle_result(compile_result)
 
-        # Compile and get result
-        compile_result = subprocess.run(['ant', 'build-project'], shell=True, cwd=self.code_generation_project_path,
-                                        stdout=subprocess.PIPE, encoding='utf-8')
+    def __compile_check_in_scratch_workspace(self, timeout):
+        """
+        Compile check of the generated code in the scratch workspace, using its javac build file.
+        :return: return code of the compilation.
+        """
+        try:
+            compile_result = self.scratch_workspace.compile(
+                self.model_name, self.stage_runner,
+                self.transformation_result.create_stage_output(TransformationStage.COMPILE_CHECK), timeout)
+        except StageTimeoutError as e:
+            self.transformation_result.mark_end_time(TransformationStage.COMPILE_CHECK)
+            return self.__handle_timeout(TransformationStage.COMPILE_CHECK, e)
+        self.transformation_result.mark_end_time(TransformationStage.COMPILE_CHECK)
+        self.transformation_result.record_step_resources('build', compile_result)
         self.transformation_result.interpret_compile_result(compile_result)
         return self.__handle_result(compile_result)
 
-    def execute_entire_transformation_chain(self):
-        self.__ontouml_json_2_ontouml_ecore()
-        self.__onto_uml_ecore_2_implementation_model()
-        self.__implementation_model_2_java()
+    def get_generated_source_path(self):
+        """
+        :return: The folder in which the Java code of the model is generated.
+        """
+        if self.scratch_workspace is not None:
+            return self.scratch_workspace.get_artifact_path(self.model_name, ScratchWorkspace.SOURCE)
+        return os.path.join(self.code_generation_project_path, 'src')
 
+    def get_stages(self) -> list[TransformationStage]:
+        """
+        :return: The stages executed by this executor, in order of execution.
+        """
+        stages = [TransformationStage.READ_ONTOUML, TransformationStage.ATL, TransformationStage.ACCELEO]
         if self.test_generated_code:
-            self.__compile_check_generated_code()
+            stages.append(TransformationStage.COMPILE_CHECK)
+        return stages
+
+    def execute_stage(self, stage: TransformationStage):
+        """
+        Executes a single stage of the transformation chain. The stages are to be executed in the order given by
+        'get_stages'. A stage is not performed if a previous stage failed.
+        :param stage: The stage to execute.
+        :return: return code of the executed stage, -1 if not performed.
+        """
+        stage_steps = {
+            TransformationStage.READ_ONTOUML: self.__ontouml_json_2_ontouml_ecore,
+            TransformationStage.ATL: self.__onto_uml_ecore_2_implementation_model,
+            TransformationStage.ACCELEO: self.__implementation_model_2_java,
+            TransformationStage.COMPILE_CHECK: self.__compile_check_generated_code
+        }
+        return stage_steps[stage]()
+
+    def execute_entire_transformation_chain(self):
+        for stage in self.get_stages():
+            self.execute_stage(stage)
 
     def finalize_and_get_results(self) -> dict:
         """
-        Finalizes the transformation and gets the results.
+        Finalizes the transformation and gets the results. When using a scratch workspace, the artifacts to keep are
+        copied to persistent storage and the scratch folder of the model is removed.
         :return: Dict containing information about the executed transformation.
         """
+        if self.scratch_workspace is not None:
+            self.scratch_workspace.save_artifacts(self.model_name)
         self.transformation_result.finalize_results()
         return self.transformation_result.get_results_dicts()
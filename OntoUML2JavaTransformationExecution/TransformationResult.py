@@ -1,7 +1,9 @@
 #  Copyright (c) 2024.
+from OntoUML2JavaTransformationExecution.CompileLogParser import CompileLogParser
+from OntoUML2JavaTransformationExecution.StageOutput import StageOutput
+from OntoUML2JavaTransformationExecution.StageRunner import StageResult
 from OntoUML2JavaTransformationExecution.TransformationStage import TransformationStage
 
-import subprocess
 import time
 import re
 
@@ -24,14 +26,30 @@ class TransformationExecResult:
         self.generated_code_compilation_errors = None
         self.ontouml_read_errors = None
 
+        self.acceleo_warning_lines = []
+        self.compile_log_parser = None
+
         self.time_per_stage = dict()
+        self.resources_per_step = dict()
+        self.cached_stages = []
+
+        self.timed_out_stage = None
+        self.timeout_elapsed_s = None
+        self.timeout_output = None
+
+        self.compile_mode = None
+        self.n_compiled_files = None
+        self.compile_verified = None
+
+    # ANT targets executed by the transformation, for which the used resources are recorded
+    STEPS = ['read_ontouml', 'atl', 'clear_source', 'acceleo', 'clean', 'build']
 
     def mark_start_time(self):
         """
-        Record start time.
+        Record start time, using a monotonic clock.
         :return:
         """
-        self.start_time_ns = time.time_ns()
+        self.start_time_ns = time.perf_counter_ns()
 
     def mark_end_time(self, transformation_stage: TransformationStage):
         """
@@ -43,41 +61,127 @@ class TransformationExecResult:
         if self.start_time_ns is None:
             raise RuntimeError('Start time not marked before calculating endtime.')
         else:
-            end_time_ns = time.time_ns()
+            end_time_ns = time.perf_counter_ns()
             passed_time = end_time_ns - self.start_time_ns
-            self.total_time_ns += passed_time
+            # The compile check validates the transformation, it is not part of the transformation time
+            if transformation_stage != TransformationStage.COMPILE_CHECK:
+                self.total_time_ns += passed_time
             self.time_per_stage[transformation_stage] = passed_time / 1000000000
             self.start_time_ns = None
 
-    def interpret_ontouml_read_result(self, result: subprocess.CompletedProcess[str]):
+    def record_step_resources(self, step: str, result: StageResult):
+        """
+        Record the time, CPU time and peak memory used by an executed ANT target.
+        :param step: Which target was executed, one of STEPS.
+        :param result: The result of the target.
+        :return:
+        """
+        self.resources_per_step[step] = result
+
+    def mark_cache_hit(self, transformation_stage: TransformationStage):
+        """
+        Record that the output of a stage was restored from the stage cache instead of executing the stage.
+        :param transformation_stage: The stage that was restored from the cache.
+        :return:
+        """
+        self.cached_stages.append(transformation_stage)
+
+    def mark_timeout(self, transformation_stage: TransformationStage, elapsed_s, partial_output):
+        """
+        Record that a stage was killed because it exceeded its time limit.
+        :param transformation_stage: The stage that timed out.
+        :param elapsed_s: Seconds passed before the stage was killed.
+        :param partial_output: Console output of the stage until it was killed.
+        :return:
+        """
+        self.timed_out_stage = transformation_stage
+        self.timeout_elapsed_s = elapsed_s
+        if partial_output is not None:
+            self.timeout_output = partial_output[-5000:]
+        if transformation_stage == TransformationStage.COMPILE_CHECK:
+            self.generated_code_compilation_errors = f"Compilation timed out after {elapsed_s:.1f} s"
+
+    def mark_missing_compile_result(self, returncode, output_tail):
+        """
+        Record that the compile check was executed in a batch (see BatchCompiler), but no result of this model appeared
+        in its output, e.g. because ANT stopped before compiling it.
+        :param returncode: Exit code of the ANT run of the batch.
+        :param output_tail: The end of the console output of the batch.
+        :return:
+        """
+        self.generated_code_compiles = False
+        self.generated_code_compilation_errors = \
+            f"No compile result in the output of the batch (ANT exited with code {returncode}):\n{output_tail[-5000:]}"
+
+    def mark_incremental_compile(self, compile_mode, n_compiled_files, verified):
+        """
+        Record how the incremental compiler performed the compile check.
+        :param compile_mode: 'full', 'incremental' or 'up-to-date'.
+        :param n_compiled_files: Number of source files that were compiled.
+        :param verified: Whether the outcome matched a clean build, None if not verified.
+        :return:
+        """
+        self.compile_mode = compile_mode
+        self.n_compiled_files = n_compiled_files
+        self.compile_verified = verified
+
+    def create_stage_output(self, transformation_stage: TransformationStage, log_path=None) -> StageOutput:
+        """
+        Creates the object consuming the console output of a stage. The warnings of the ATL and ACCELEO stages, and the
+        diagnostics of the compile check, are extracted while the output is consumed.
+        :param transformation_stage: The stage of which the output is consumed.
+        :param log_path: Optional file to which the complete console output is written.
+        :return: The StageOutput to be handed to the stage runner.
+        """
+        line_handlers = []
+        if transformation_stage == TransformationStage.ATL:
+            self.atl_warnings = set()
+            line_handlers.append(self._extract_atl_warnings)
+        elif transformation_stage == TransformationStage.ACCELEO:
+            self.acceleo_warning_lines = []
+            line_handlers.append(self._extract_acceleo_warnings)
+        elif transformation_stage == TransformationStage.COMPILE_CHECK:
+            # A compile check may be repeated (e.g. a failed incremental compilation), only the last output counts
+            self.compile_log_parser = CompileLogParser()
+            line_handlers.append(self.compile_log_parser.feed)
+        return StageOutput(line_handlers=line_handlers, log_path=log_path)
+
+    def interpret_ontouml_read_result(self, result: StageResult):
         if result.returncode == 0:
             self.read_ontouml_json_success = True
         else:
             self.read_ontouml_json_success = False
-            self.ontouml_read_errors = result.stdout[:5000] + f"\n [and {result.stdout[5000:].count('\n')} more lines]"
+            self.ontouml_read_errors = result.output.get_truncated_text()
 
-    def interpret_atl_result(self, result: subprocess.CompletedProcess[str]):
+    def interpret_atl_result(self, result: StageResult):
         if result.returncode == 0:
             self.ontouml_2_im_success = True
         else:
             self.ontouml_2_im_success = False
 
-        self.atl_warnings = self._extract_atl_warnings(result.stdout)
-
-    def interpret_acceleo_result(self, result: subprocess.CompletedProcess[str]):
+    def interpret_acceleo_result(self, result: StageResult):
         if result.returncode == 0:
             self.im_2_java_success = True
         else:
             self.im_2_java_success = False
 
-        if (warn := self._extract_acceleo_warnings(result.stdout)) != "":
-            self.acceleo_warnings = warn
+        if self.acceleo_warning_lines:
+            self.acceleo_warnings = ''.join(line + "\n" for line in self.acceleo_warning_lines)
 
-    def interpret_compile_result(self, result: subprocess.CompletedProcess[str]):
+    def interpret_compile_result(self, result: StageResult):
         if result.returncode == 0:
             self.generated_code_compiles = True
         else:
-            self.generated_code_compilation_errors = result.stdout[:5000] + f"\n [and {result.stdout[5000:].count('\n')} more lines]"
+            self.generated_code_compilation_errors = result.output.get_truncated_text()
+
+    def get_compile_diagnostics(self) -> list[dict]:
+        """
+        :return: A dict per diagnostic in the complete output of the compile check (see CompileLogParser), extended with
+            the 'model'. Empty if the generated code was not compiled.
+        """
+        if self.compile_log_parser is None:
+            return []
+        return [{'model': self.ontouml_model} | diagnostic for diagnostic in self.compile_log_parser.get_diagnostics()]
 
     def finalize_results(self):
         """
@@ -99,32 +203,55 @@ class TransformationExecResult:
             print(f"\nOntoUML read errors:\n {self.ontouml_read_errors}")
         print(f"\n\n {'*' * 80} \n")
 
-    def _extract_atl_warnings(self, cons_log: str):
-        if cons_log is None:
-            print(f"{'!'*80}\n !!! Did not get STDOUT for ATL process !!!\n{'!'*80}")
-            return set()
-        regex = r"Warning:.*\n"
-        unique_warns = set()
-        for match in re.finditer(regex, cons_log):
-            unique_warns.add(match.group(0).strip())
-
-        return unique_warns
-
-    def _extract_acceleo_warnings(self, cons_log: str):
-        if cons_log is None:
-            print(f"{'!'*80}\n !!! Did not get STDOUT for ACCELEO process !!!\n{'!'*80}")
-            return None
-        regex = r"\[java\] (.*)\n"
-        result = ""
-        for match in re.finditer(regex, cons_log):
-            result += match.group(1) + "\n"
-        return result
+    ATL_WARNING_REGEX = re.compile(r"Warning:.*")
+    ACCELEO_OUTPUT_REGEX = re.compile(r"\[java\] (.*)")
+
+    def _extract_atl_warnings(self, line: str):
+        """
+        Line handler for the ATL console output, collecting the unique warnings.
+        """
+        if line.endswith('\n') and (match := self.ATL_WARNING_REGEX.search(line)):
+            self.atl_warnings.add(match.group(0).strip())
+
+    def _extract_acceleo_warnings(self, line: str):
+        """
+        Line handler for the ACCELEO console output, collecting the output of the Java generator.
+        """
+        if line.endswith('\n') and (match := self.ACCELEO_OUTPUT_REGEX.search(line)):
+            self.acceleo_warning_lines.append(match.group(1))
 
     def __get_stage_time(self, stage: TransformationStage):
         if stage in self.time_per_stage:
             return self.time_per_stage[stage]
         else:
-            return -1,
+            return -1
+
+    def __get_step_resource_columns(self) -> dict:
+        """
+        :return: Columns with the time, CPU time and peak memory per executed ANT target, and for the targets of which the
+            output is captured the split of their time into overhead (JVM and ANT start-up) and task time, and of the
+            overhead into JVM start-up and ANT bootstrap. None if the target was not executed or the resource could not
+            be measured (e.g. restored from the stage cache).
+        """
+        columns = dict()
+        for step in self.STEPS:
+            result = self.resources_per_step.get(step)
+            if step in ['clear_source', 'clean', 'build']:
+                columns[f'{step}_time_s'] = result.wall_time_s if result is not None else -1
+            columns[f'{step}_user_cpu_s'] = result.user_cpu_s if result is not None else None
+            columns[f'{step}_sys_cpu_s'] = result.sys_cpu_s if result is not None else None
+            columns[f'{step}_max_rss_mb'] = result.max_rss_kb / 1024 \
+                if result is not None and result.max_rss_kb is not None else None
+            if step in ['read_ontouml', 'atl', 'acceleo', 'build']:
+                overhead_s, task_s = result.output.get_time_breakdown() \
+                    if result is not None and result.output is not None else (None, None)
+                startup_s, bootstrap_s, _ = result.output.get_overhead_breakdown() \
+                    if result is not None and result.output is not None else (None, None, None)
+                columns[f'{step}_overhead_s'] = overhead_s
+                columns[f'{step}_task_s'] = task_s
+                columns[f'{step}_startup_s'] = startup_s
+                columns[f'{step}_bootstrap_s'] = bootstrap_s
+        return columns
 
     def get_results_dicts(self) -> dict:
         """
@@ -144,12 +271,23 @@ class TransformationExecResult:
             'compilation_errors': self.generated_code_compilation_errors,
             'read_ontouml_time_s': self.__get_stage_time(TransformationStage.READ_ONTOUML),
             'atl_time_s': self.__get_stage_time(TransformationStage.ATL),
-            'acceleo_time_s': self.__get_stage_time(TransformationStage.ACCELEO)
+            'acceleo_time_s': self.__get_stage_time(TransformationStage.ACCELEO),
+            'compile_check_time_s': self.__get_stage_time(TransformationStage.COMPILE_CHECK),
+            'cached_stages': ', '.join(stage.name for stage in self.cached_stages) or None,
+            'timed_out_stage': self.timed_out_stage.name if self.timed_out_stage is not None else None,
+            'timeout_elapsed_s': self.timeout_elapsed_s,
+            'timeout_output': self.timeout_output,
+            'compile_mode': self.compile_mode,
+            'n_compiled_files': self.n_compiled_files,
+            'compile_verified': self.compile_verified
         }
+        result.update(self.__get_step_resource_columns())
         return result
 
     def __transformation_failed_at_stage(self):
-        if not self.read_ontouml_json_success:
+        if self.timed_out_stage is not None and self.timed_out_stage != TransformationStage.COMPILE_CHECK:
+            return 'timeout'
+        elif not self.read_ontouml_json_success:
             return 'read_ontouml'
         elif not self.ontouml_2_im_success:
             return 'ontouml_2_im'
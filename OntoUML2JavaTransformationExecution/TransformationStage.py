@@ -6,3 +6,25 @@ class TransformationStage(Enum):
     ATL = 2,
     ACCELEO = 3,
     COMPILE_CHECK = 4
+
+
+class StageTimeLimit:
+    """
+    Time limit for executing a transformation stage, consisting of an absolute part and a part relative to the size of
+    the OntoUML JSON file of the model.
+    """
+
+    def __init__(self, seconds, seconds_per_mb=0.0):
+        """
+        :param seconds: Time limit in seconds for any model.
+        :param seconds_per_mb: Additional seconds per MB of the OntoUML JSON file of the model.
+        """
+        self.seconds = seconds
+        self.seconds_per_mb = seconds_per_mb
+
+    def get_limit(self, model_size_bytes):
+        """
+        :param model_size_bytes: Size of the OntoUML JSON file of the model.
+        :return: The time limit in seconds for the model.
+        """
+        return self.seconds + self.seconds_per_mb * model_size_bytes / 1_000_000
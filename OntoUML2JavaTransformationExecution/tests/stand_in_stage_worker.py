@@ -0,0 +1,28 @@
+#  Copyright (c) 2024.
+"""
+Stand-in for a persistent stage worker, used to test PersistentWorkerStageRunner without ANT or Eclipse.
+Reports its process id and the number of jobs it handled, and exits with the code given by an '-DexitCode=' argument.
+A '-Dsleep=' argument makes it hang for that many seconds after its first output line.
+"""
+import json
+import os
+import sys
+import time
+
+n_jobs = 0
+for request_line in sys.stdin:
+    request = json.loads(request_line)
+    n_jobs += 1
+
+    returncode = 0
+    sleep_s = 0
+    for arg in request['args']:
+        if arg.startswith('-DexitCode='):
+            returncode = int(arg.removeprefix('-DexitCode='))
+        if arg.startswith('-Dsleep='):
+            sleep_s = float(arg.removeprefix('-Dsleep='))
+
+    for line in [f"pid {os.getpid()}", f"job {n_jobs}", f"cwd {os.getcwd()}", f"target {request['args'][-1]}"]:
+        print(json.dumps({'line': line}), flush=True)
+        time.sleep(sleep_s)
+    print(json.dumps({'returncode': returncode}), flush=True)
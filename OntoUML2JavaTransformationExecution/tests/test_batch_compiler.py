@@ -0,0 +1,146 @@
+import os
+import xml.etree.ElementTree as ElementTree
+
+import pytest
+
+from OntoUML2JavaTransformationExecution.BatchCompiler import BatchCompiler
+from OntoUML2JavaTransformationExecution.StageRunner import StageResult, StageRunner
+from OntoUML2JavaTransformationExecution.TransformationExecutor import TransformationExecutor
+
+
+class FakeAntRunner(StageRunner):
+    """
+    Prints the output ANT would print for the batch build file, with the compilation of the given models failing.
+    """
+
+    def __init__(self, failing_models, abort_at_model=None):
+        """
+        :param abort_at_model: Index of the model during the compilation of which ANT stops, None to compile all.
+        """
+        self.failing_models = failing_models
+        self.abort_at_model = abort_at_model
+        self.build_files = []
+
+    def run(self, ant_args, cwd, output=None, timeout=None):
+        build_file = ElementTree.parse(ant_args[1]).getroot()
+        self.build_files.append(build_file)
+        output.feed(f"Buildfile: {ant_args[1]}\n")
+        for target in build_file.iter('target'):
+            output.feed_lines(["\n", f"{target.get('name')}:\n"])
+            if (javac := target.find('javac')) is not None:
+                model_index = int(target.get('name').removeprefix('compile-model-'))
+                output.feed(f"    [javac] Compiling 1 source file to {javac.get('destdir')}\n")
+                if model_index == self.abort_at_model:
+                    output.feed_lines(["#\n", "# A fatal error has been detected by the Java Runtime Environment\n"])
+                    output.close()
+                    return StageResult(['ant', *ant_args], 134, output)
+                failed = model_index in self.failing_models
+                if failed:
+                    output.feed(f"    [javac] Person.java:3: error: cannot find symbol\n")
+                output.feed(f"     [echo] batch-compile-result {model_index} "
+                            f"{'true' if failed else '${compile.failed.' + str(model_index) + '}'}\n")
+        output.feed_lines(["\n", "BUILD SUCCESSFUL\n", "Total time: 2 seconds\n"])
+        output.close()
+        return StageResult(['ant', *ant_args], 0, output)
+
+
+def make_executor(tmp_path, model_name, transformation_failed=False):
+    model_path = tmp_path / f"{model_name}.json"
+    model_path.write_text('{}')
+    project_path = tmp_path / 'workspace' / model_name
+    (project_path / 'src' / 'model').mkdir(parents=True)
+    (project_path / 'src' / 'model' / 'Person.java').write_text(f'package model; class Person {{}} // {model_name}')
+
+    executor = TransformationExecutor(str(model_path), java_generation_location=str(project_path))
+    executor.transformation_failed = transformation_failed
+    return executor
+
+
+class TestBatchCompiler:
+
+    @pytest.fixture(autouse=True)
+    def workspace(self, tmp_path, monkeypatch):
+        monkeypatch.setenv('ECLIPSE_ONTOUML_2_JAVA_WORKSPACE', str(tmp_path / 'workspace'))
+
+    def test_results_are_attributed_per_model(self, tmp_path):
+        executors = [make_executor(tmp_path, 'a'), make_executor(tmp_path, 'failed', transformation_failed=True),
+                     make_executor(tmp_path, 'b')]
+        runner = FakeAntRunner(failing_models={1})
+
+        with BatchCompiler(batch_size=3, batch_folder=tmp_path / 'batch', stage_runner=runner) as batch_compiler:
+            for executor in executors:
+                assert not batch_compiler.is_full()
+                batch_compiler.add(executor)
+            assert batch_compiler.is_full()
+            # The sources are copied when added, so the code generation project can be reused
+            assert (tmp_path / 'batch' / 'model-1' / 'src' / 'model' / 'Person.java').read_text().endswith('// b')
+
+            assert batch_compiler.compile() == executors
+            assert len(batch_compiler) == 0
+
+        # A javac task per successfully transformed model, each with its own source folder
+        assert [javac.get('srcdir') for javac in runner.build_files[0].iter('javac')] == \
+               [str(tmp_path / 'batch' / 'model-0' / 'src'), str(tmp_path / 'batch' / 'model-1' / 'src')]
+
+        result_a = executors[0].transformation_result
+        assert result_a.generated_code_compiles
+        assert not executors[0].transformation_failed
+        assert result_a.time_per_stage
+
+        result_b = executors[2].transformation_result
+        assert not result_b.generated_code_compiles
+        assert executors[2].transformation_failed
+        assert "Person.java:3: error" in result_b.generated_code_compilation_errors
+        assert "BUILD SUCCESSFUL" not in result_b.generated_code_compilation_errors
+        assert "batch-compile-result" not in result_b.generated_code_compilation_errors
+
+        assert executors[1].transformation_result.generated_code_compilation_errors is None
+        assert not (tmp_path / 'batch' / 'model-0').exists()
+
+    def test_models_added_while_a_taken_batch_is_compiled(self, tmp_path):
+        executors = [make_executor(tmp_path, name) for name in ['a', 'b']]
+        runner = FakeAntRunner(failing_models=set())
+
+        with BatchCompiler(batch_size=1, stage_runner=runner) as batch_compiler:
+            batch_compiler.add(executors[0])
+            batch = batch_compiler.take_batch()
+            assert len(batch_compiler) == 0
+            # The next model does not overwrite the sources of the taken batch
+            batch_compiler.add(executors[1])
+
+            assert batch_compiler.compile(batch) == [executors[0]]
+            assert batch_compiler.executors == [executors[1]]
+            assert batch_compiler.compile() == [executors[1]]
+
+        assert [javac.get('srcdir') for build_file in runner.build_files for javac in build_file.iter('javac')] == \
+               [os.path.join(batch_compiler.batch_folder, 'model-0', 'src'),
+                os.path.join(batch_compiler.batch_folder, 'model-1', 'src')]
+        assert all(executor.transformation_result.generated_code_compiles for executor in executors)
+
+    def test_batch_without_generated_code(self, tmp_path):
+        runner = FakeAntRunner(failing_models=set())
+        with BatchCompiler(stage_runner=runner) as batch_compiler:
+            executor = make_executor(tmp_path, 'failed', transformation_failed=True)
+            batch_compiler.add(executor)
+            assert batch_compiler.compile() == [executor]
+
+        assert runner.build_files == []
+
+    def test_batch_that_aborts_halfway(self, tmp_path):
+        executors = [make_executor(tmp_path, name) for name in ['a', 'b', 'c']]
+        runner = FakeAntRunner(failing_models=set(), abort_at_model=1)
+
+        with BatchCompiler(stage_runner=runner) as batch_compiler:
+            for executor in executors:
+                batch_compiler.add(executor)
+            batch_compiler.compile()
+
+        assert executors[0].transformation_result.generated_code_compiles
+        assert not executors[0].transformation_failed
+        # The model being compiled when ANT stopped, and the models after it, have no result
+        for executor in executors[1:]:
+            assert executor.transformation_failed
+            assert not executor.transformation_result.generated_code_compiles
+            errors = executor.transformation_result.generated_code_compilation_errors
+            assert errors.startswith("No compile result in the output of the batch (ANT exited with code 134)")
+            assert "A fatal error has been detected" in errors
@@ -0,0 +1,67 @@
+from OntoUML2JavaTransformationExecution.CompileLogParser import COMPILE_ERROR_CANNOT_OVERRIDE_FROM_SUPER, \
+    COMPILE_ERROR_MULTIPLE_INHERITENCE, COMPILE_ERROR_RESERVED_KEYWORD_NAME, COMPILE_ERROR_VARIABLE_ALREADY_DEFINED, \
+    NON_RESOLVED_COMPILE_ERROR_CATEGORY, CompileLogParser
+
+ANT_OUTPUT = """Buildfile: /workspace/TestCodeGeneration/build.xml
+
+build-project:
+    [javac] Compiling 4 source files to /workspace/TestCodeGeneration/bin
+    [javac] /workspace/TestCodeGeneration/src/model/Student.java:3: error: '{' expected
+    [javac] public class Student extends Person, Employee {
+    [javac]                                    ^
+    [javac] /workspace/TestCodeGeneration/src/model/Person.java:12: error: variable name is already defined in class Person
+    [javac] \tprivate String name;
+    [javac] \t               ^
+    [javac] /workspace/TestCodeGeneration/src/model/Enum.java:1: error: <identifier> expected
+    [javac] /workspace/TestCodeGeneration/src/model/Role.java:8: error: getName() in Role cannot override getName() in Person
+    [javac] \tpublic int getName() {
+    [javac] \t           ^
+    [javac]   return type int is not compatible with String
+    [javac] /workspace/TestCodeGeneration/src/model/Kind.java:5: warning: [deprecation] Date(int,int,int) in Date has been deprecated
+    [javac] 4 errors
+    [javac] 1 warning
+
+BUILD FAILED
+/workspace/TestCodeGeneration/build.xml:20: Compile failed; see the compiler error output for details.
+"""
+
+
+def parse(lines):
+    parser = CompileLogParser()
+    for line in lines:
+        parser.feed(line)
+    return parser.get_diagnostics()
+
+
+class TestCompileLogParser:
+
+    def test_diagnostics_of_ant_output(self):
+        diagnostics = parse(ANT_OUTPUT.splitlines(keepends=True))
+
+        assert [(diagnostic['file'].rsplit('/', 1)[-1], diagnostic['line'], diagnostic['kind'], diagnostic['category'],
+                 diagnostic['detail']) for diagnostic in diagnostics] == [
+            ('Student.java', 3, 'error', COMPILE_ERROR_MULTIPLE_INHERITENCE, 'Student'),
+            ('Person.java', 12, 'error', COMPILE_ERROR_VARIABLE_ALREADY_DEFINED, 'variable name in Person'),
+            ('Enum.java', 1, 'error', COMPILE_ERROR_RESERVED_KEYWORD_NAME, 'Enum'),
+            ('Role.java', 8, 'error', COMPILE_ERROR_CANNOT_OVERRIDE_FROM_SUPER,
+             'attribute getName in classes Role and Person'),
+            ('Kind.java', 5, 'warning', NON_RESOLVED_COMPILE_ERROR_CATEGORY, None),
+        ]
+        assert diagnostics[0]['file'] == '/workspace/TestCodeGeneration/src/model/Student.java'
+        assert diagnostics[0]['message'] == "'{' expected"
+
+    def test_diagnostics_of_plain_javac_output(self):
+        diagnostics = parse(["src/A.java:2: error: cannot find symbol\n", "  symbol:   class B\n",
+                             "src/A.java:9: error: method x() is already defined in class A\n", "2 errors\n"])
+
+        assert [(diagnostic['line'], diagnostic['category']) for diagnostic in diagnostics] == [
+            (2, NON_RESOLVED_COMPILE_ERROR_CATEGORY), (9, COMPILE_ERROR_VARIABLE_ALREADY_DEFINED)]
+
+    def test_keeps_only_the_first_lines_of_a_diagnostic(self):
+        parser = CompileLogParser()
+        parser.feed("    [javac] src/A.java:2: error: cannot find symbol\n")
+        for i in range(10000):
+            parser.feed(f"    [javac]   detail {i}\n")
+
+        assert len(parser.current_lines) == 1 + CompileLogParser.N_DETAIL_LINES
+        assert len(parser.get_diagnostics()) == 1
@@ -0,0 +1,155 @@
+import os
+import shutil
+
+import pytest
+
+from OntoUML2JavaTransformationExecution.IncrementalCompiler import IncrementalCompiler
+from OntoUML2JavaTransformationExecution.StageRunner import StageResult, StageRunner
+
+
+class FakeJavacRunner(StageRunner):
+    """
+    Behaves like the ANT javac task: compiles the sources without class file, and fails on sources containing 'ERROR'.
+    The 'class file' is a copy of the source. The 'clean' and 'build-project' targets of a project compile its 'src'
+    folder into its 'bin' folder, and also fail on sources containing 'PROJECT_ERROR' (like a project with other javac
+    settings).
+    """
+
+    def __init__(self):
+        self.compiled = []
+        self.project_targets = []
+
+    def run(self, ant_args, cwd, output=None, timeout=None):
+        error_tokens = ['ERROR']
+        if ant_args[-1] in ('clean', 'build-project'):
+            self.project_targets.append(ant_args[-1])
+            if ant_args[-1] == 'clean':
+                shutil.rmtree(os.path.join(cwd, 'bin'), ignore_errors=True)
+                output.close()
+                return StageResult(['ant', *ant_args], 0, output)
+            source_path, classes_path = os.path.join(cwd, 'src'), os.path.join(cwd, 'bin')
+            error_tokens.append('PROJECT_ERROR')
+        else:
+            properties = dict(arg.removeprefix('-D').split('=', 1) for arg in ant_args if arg.startswith('-D'))
+            source_path, classes_path = properties['src.dir'], properties['classes.dir']
+        compiled, returncode = [], 0
+        for root, _, files in os.walk(source_path):
+            for file_name in files:
+                relative_path = os.path.relpath(os.path.join(root, file_name), source_path)
+                class_path = os.path.join(classes_path, relative_path.removesuffix('.java') + '.class')
+                if os.path.exists(class_path):
+                    continue
+                compiled.append(relative_path)
+                with open(os.path.join(source_path, relative_path)) as f:
+                    content = f.read()
+                if any(error_token in content.split() for error_token in error_tokens):
+                    output.feed(f"    [javac] {relative_path}:1: error: ERROR\n")
+                    returncode = 1
+                    continue
+                os.makedirs(os.path.dirname(class_path), exist_ok=True)
+                with open(class_path, 'w') as f:
+                    f.write(content)
+        output.close()
+        self.compiled.append(sorted(compiled))
+        return StageResult(['ant', *ant_args], returncode, output)
+
+
+def write_sources(source_path, sources):
+    for relative_path, content in sources.items():
+        os.makedirs(os.path.dirname(source_path / relative_path), exist_ok=True)
+        (source_path / relative_path).write_text(content)
+
+
+SOURCES = {
+    os.path.join('model', 'Person.java'): 'package model; class Person {}',
+    os.path.join('model', 'Employee.java'): 'package model; class Employee extends Person {}',
+    os.path.join('model', 'Manager.java'): 'package model; class Manager extends Employee {}',
+    os.path.join('model', 'Car.java'): 'package model; class Car {}',
+}
+
+
+class TestIncrementalCompiler:
+
+    @pytest.fixture
+    def generated(self, tmp_path):
+        write_sources(tmp_path / 'src', SOURCES)
+        return tmp_path / 'src'
+
+    def test_recompiles_changed_files_and_dependents(self, tmp_path, generated):
+        runner = FakeJavacRunner()
+        compiler = IncrementalCompiler(tmp_path / 'store', stage_runner=runner)
+
+        assert compiler.compile('model', str(generated)).returncode == 0
+        assert compiler.get_outcome('model')[0] == IncrementalCompiler.FULL
+        assert len(runner.compiled[-1]) == 4
+
+        assert compiler.compile('model', str(generated)).returncode == 0
+        assert compiler.get_outcome('model')[0] == IncrementalCompiler.UP_TO_DATE
+        assert len(runner.compiled) == 1
+
+        write_sources(generated, {os.path.join('model', 'Person.java'): 'package model; class Person { int age; }'})
+        assert compiler.compile('model', str(generated)).returncode == 0
+        assert compiler.get_outcome('model')[0] == IncrementalCompiler.INCREMENTAL
+        # Manager only depends on Person via Employee
+        assert runner.compiled[-1] == [os.path.join('model', name) for name in
+                                       ['Employee.java', 'Manager.java', 'Person.java']]
+
+    def test_full_build_after_deletion(self, tmp_path, generated):
+        runner = FakeJavacRunner()
+        compiler = IncrementalCompiler(tmp_path / 'store', stage_runner=runner)
+        compiler.compile('model', str(generated))
+
+        os.remove(generated / 'model' / 'Car.java')
+        compiler.compile('model', str(generated))
+
+        assert compiler.get_outcome('model')[0] == IncrementalCompiler.FULL
+        assert not (tmp_path / 'store' / 'model' / 'classes' / 'model' / 'Car.class').exists()
+
+    def test_failed_incremental_compilation_is_repeated_as_full_build(self, tmp_path, generated):
+        runner = FakeJavacRunner()
+        compiler = IncrementalCompiler(tmp_path / 'store', stage_runner=runner, verify=True)
+        compiler.compile('model', str(generated))
+
+        write_sources(generated, {os.path.join('model', 'Car.java'): 'package model; class Car { ERROR }'})
+        result = compiler.compile('model', str(generated))
+
+        assert result.returncode == 1
+        assert compiler.get_outcome('model')[0] == IncrementalCompiler.FULL
+        assert "Car.java:1: error" in result.output.get_head()
+        assert compiler.get_outcome('model')[2]
+
+        # The previous compilation failed, so the next one is a full build again
+        write_sources(generated, {os.path.join('model', 'Car.java'): 'package model; class Car {}'})
+        assert compiler.compile('model', str(generated)).returncode == 0
+        assert compiler.get_outcome('model')[0] == IncrementalCompiler.FULL
+
+    def test_verification_against_clean_build(self, tmp_path, generated):
+        compiler = IncrementalCompiler(tmp_path / 'store', stage_runner=FakeJavacRunner(), verify=True)
+        compiler.compile('model', str(generated))
+
+        write_sources(generated, {os.path.join('model', 'Car.java'): 'package model; class Car { int wheels; }'})
+        compiler.compile('model', str(generated))
+        assert compiler.get_outcome('model')[0] == IncrementalCompiler.INCREMENTAL
+        assert compiler.get_outcome('model')[2]
+
+        # A stale class file makes the incremental result differ from a clean build
+        (tmp_path / 'store' / 'model' / 'classes' / 'model' / 'Stale.class').write_text('')
+        write_sources(generated, {os.path.join('model', 'Car.java'): 'package model; class Car {}'})
+        compiler.compile('model', str(generated))
+        assert compiler.get_outcome('model')[2] is False
+
+    def test_verification_against_project_build(self, tmp_path):
+        # The code is generated in the source folder of the project
+        project = tmp_path / 'TestCodeGeneration'
+        write_sources(project / 'src', SOURCES)
+        runner = FakeJavacRunner()
+        compiler = IncrementalCompiler(tmp_path / 'store', stage_runner=runner, verify=True)
+
+        assert compiler.compile('model', str(project / 'src'), project_path=str(project)).returncode == 0
+        assert runner.project_targets == ['clean', 'build-project']
+        assert compiler.get_outcome('model')[2]
+
+        # Compiles with the javac task of the compiler, but not with the settings of the project
+        write_sources(project / 'src', {os.path.join('model', 'Car.java'): 'package model; class Car { PROJECT_ERROR }'})
+        assert compiler.compile('model', str(project / 'src'), project_path=str(project)).returncode == 0
+        assert compiler.get_outcome('model')[2] is False
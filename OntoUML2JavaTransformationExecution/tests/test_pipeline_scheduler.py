@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+
+import pytest
+
+from OntoUML2JavaTransformationExecution.PipelineScheduler import PipelineScheduler
+from OntoUML2JavaTransformationExecution.StageRunner import StageResult, StageRunner
+from OntoUML2JavaTransformationExecution.TransformationExecutor import TransformationExecutor
+from OntoUML2JavaTransformationExecution.TransformationStage import TransformationStage
+
+# Per ANT target: the stage executing it and how long it takes
+TARGETS = {
+    'convertFromModelRepo': (TransformationStage.READ_ONTOUML, 0.01),
+    'OntoUML2ImplementationModel': (TransformationStage.ATL, 0.1),
+    'clear-source-files': (TransformationStage.ACCELEO, 0),
+    'Uml2java': (TransformationStage.ACCELEO, 0.02),
+    'clean': (TransformationStage.COMPILE_CHECK, 0),
+    'build-project': (TransformationStage.COMPILE_CHECK, 0.02)
+}
+
+
+class RecordingStageRunner(StageRunner):
+    """
+    Records the targets executed per model and the maximum number of concurrent executions per stage. The ATL target
+    fails for the models in 'failing_models' and raises an exception for the models in 'raising_models'.
+    """
+
+    def __init__(self, failing_models=(), raising_models=()):
+        self.failing_models = failing_models
+        self.raising_models = raising_models
+        self.lock = threading.Lock()
+        self.running = {stage: 0 for stage in TransformationStage}
+        self.max_running = {stage: 0 for stage in TransformationStage}
+        self.targets_per_cwd = {}
+        self.models_per_target = {target: [] for target in TARGETS}
+
+    def run(self, ant_args, cwd, output=None, timeout=None):
+        target = ant_args[-1]
+        stage, duration_s = TARGETS[target]
+        model_name = next((os.path.splitext(os.path.basename(arg))[0] for arg in ant_args[:-1]), None)
+        with self.lock:
+            self.running[stage] += 1
+            self.max_running[stage] = max(self.max_running[stage], self.running[stage])
+            self.models_per_target[target].append(model_name)
+            self.targets_per_cwd.setdefault(cwd, []).append(target)
+        try:
+            time.sleep(duration_s)
+            if target == 'OntoUML2ImplementationModel' and model_name in self.raising_models:
+                raise RuntimeError(f"ATL crashed for {model_name}")
+            failed = target == 'OntoUML2ImplementationModel' and model_name in self.failing_models
+            return StageResult(['ant', *ant_args], 1 if failed else 0, output)
+        finally:
+            if output is not None:
+                output.close()
+            with self.lock:
+                self.running[stage] -= 1
+
+
+class TestPipelineScheduler:
+
+    @pytest.fixture
+    def model_paths(self, tmp_path, monkeypatch):
+        workspace = tmp_path / 'workspace'
+        for project in [TransformationExecutor.ECORE_MODEL_PROJECT, TransformationExecutor.ATL_PROJECT,
+                        TransformationExecutor.ACCELEO_PROJECT, TransformationExecutor.GENERATED_CODE_PROJECT]:
+            (workspace / project).mkdir(parents=True)
+        monkeypatch.setenv('ECLIPSE_ONTOUML_2_JAVA_WORKSPACE', str(workspace))
+
+        model_paths = []
+        for model_index in range(8):
+            model_path = tmp_path / 'models' / f"model{model_index}.json"
+            model_path.parent.mkdir(exist_ok=True)
+            model_path.write_text('{}')
+            model_paths.append(str(model_path))
+        return model_paths
+
+    @staticmethod
+    def run_pipeline(scheduler, model_paths, runner):
+        finished = []
+        errors = []
+        executors = [TransformationExecutor(model_path, test_generated_code=True, stage_runner=runner)
+                     for model_path in model_paths]
+        # Run in a thread, so a scheduler that does not return fails the test instead of hanging it
+        thread = threading.Thread(target=scheduler.run, args=(executors, finished.append,
+                                                              lambda executor, e: errors.append((executor, e))))
+        thread.start()
+        thread.join(timeout=30)
+        assert not thread.is_alive()
+        return executors, finished, errors
+
+    def test_stage_concurrency_is_limited(self, model_paths):
+        stage_concurrency = {TransformationStage.READ_ONTOUML: 1, TransformationStage.ATL: 3,
+                             TransformationStage.ACCELEO: 1, TransformationStage.COMPILE_CHECK: 2}
+        runner = RecordingStageRunner()
+        scheduler = PipelineScheduler(stage_concurrency)
+
+        executors, finished, errors = self.run_pipeline(scheduler, model_paths, runner)
+
+        assert all(runner.max_running[stage] <= limit for stage, limit in stage_concurrency.items())
+        # ATL takes longest, so models wait for and run in all its workers
+        assert runner.max_running[TransformationStage.ATL] == 3
+        assert sorted(finished, key=executors.index) == executors
+        assert errors == []
+        assert all(executor.transformation_result.generated_code_compiles for executor in executors)
+
+    def test_code_generation_projects_are_returned_to_the_pool(self, model_paths):
+        runner = RecordingStageRunner()
+        scheduler = PipelineScheduler({TransformationStage.ACCELEO: 1, TransformationStage.COMPILE_CHECK: 1})
+
+        executors, _, _ = self.run_pipeline(scheduler, model_paths, runner)
+
+        # Every model generated and compiled its code in one of the two projects of the pool
+        project_paths = scheduler.code_generation_project_paths
+        assert len(project_paths) == 2
+        assert {executor.code_generation_project_path for executor in executors} <= project_paths
+        assert sum(runner.targets_per_cwd[project_path].count('build-project') for project_path in project_paths) == 8
+        assert scheduler.code_generation_projects.qsize() == 2
+        # The projects are removed once the pipeline is done
+        assert not any(os.path.exists(project_path) for project_path in project_paths)
+
+    def test_models_failing_or_raising_at_atl_stop(self, model_paths):
+        runner = RecordingStageRunner(failing_models={'model1'}, raising_models={'model2', 'model5'})
+        scheduler = PipelineScheduler()
+
+        executors, finished, errors = self.run_pipeline(scheduler, model_paths, runner)
+
+        assert 'model1' in runner.models_per_target['OntoUML2ImplementationModel']
+        assert not {'model1', 'model2', 'model5'} & set(runner.models_per_target['Uml2java'])
+        assert len(runner.models_per_target['Uml2java']) == 5
+        # The model that failed is finished, the models that raised are reported as errors
+        assert executors[1] in finished and executors[1].transformation_failed
+        assert sorted(executor.model_name for executor, _ in errors) == ['model2', 'model5']
+        assert all(isinstance(e, RuntimeError) for _, e in errors)
+        assert len(finished) + len(errors) == 8
+        assert scheduler.all_finished.is_set()
+        assert scheduler.code_generation_projects.qsize() == len(scheduler.code_generation_project_paths)
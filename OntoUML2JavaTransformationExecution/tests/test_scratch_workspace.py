@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from OntoUML2JavaTransformationExecution.ScratchWorkspace import ScratchWorkspace
+from OntoUML2JavaTransformationExecution.StageRunner import StageResult, StageRunner
+from OntoUML2JavaTransformationExecution.TransformationExecutor import TransformationExecutor
+
+
+class FakeStageRunner(StageRunner):
+    """
+    Writes the outputs the ANT targets of the stages would write, and records the executed targets.
+    """
+
+    def __init__(self):
+        self.targets = []
+
+    def run(self, ant_args, cwd, output=None, timeout=None):
+        self.targets.append(ant_args[-1])
+        properties = dict(arg.removeprefix('-D').split('=', 1) for arg in ant_args if arg.startswith('-D'))
+        if ant_args[-1] == 'convertFromModelRepo':
+            output_path = properties['outputXmiPath']
+        elif ant_args[-1] == 'OntoUML2ImplementationModel':
+            output_path = os.path.join(cwd, properties['targetPath'])
+        elif ant_args[-1] == 'Uml2java':
+            output_path = os.path.join(properties['targetFolder'], 'model', 'Person.java')
+        else:
+            output_path = os.path.join(properties['classes.dir'], 'model', 'Person.class')
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, 'w') as f:
+            f.write(ant_args[-1])
+        if output is not None:
+            output.close()
+        return StageResult(['ant', *ant_args], 0, output)
+
+
+class TestScratchWorkspace:
+
+    @pytest.fixture
+    def executor_options(self, tmp_path, monkeypatch):
+        workspace = tmp_path / 'workspace'
+        for project in [TransformationExecutor.ECORE_MODEL_PROJECT, TransformationExecutor.ATL_PROJECT,
+                        TransformationExecutor.ACCELEO_PROJECT, TransformationExecutor.GENERATED_CODE_PROJECT]:
+            (workspace / project).mkdir(parents=True)
+        monkeypatch.setenv('ECLIPSE_ONTOUML_2_JAVA_WORKSPACE', str(workspace))
+        (tmp_path / 'model.json').write_text('{}')
+        return {'ontouml_json_path': str(tmp_path / 'model.json'), 'test_generated_code': True}
+
+    def test_artifacts_stay_out_of_the_eclipse_workspace(self, tmp_path, executor_options):
+        runner = FakeStageRunner()
+        with ScratchWorkspace(tmp_path / 'scratch', tmp_path / 'artifacts',
+                              kept_artifacts=[ScratchWorkspace.UML, ScratchWorkspace.SOURCE]) as scratch_workspace:
+            executor = TransformationExecutor(**executor_options, stage_runner=runner,
+                                              scratch_workspace=scratch_workspace)
+            executor.execute_entire_transformation_chain()
+
+            assert not executor.transformation_failed
+            # No ANT executions to clear the generated sources and to clean the compiled classes
+            assert runner.targets == ['convertFromModelRepo', 'OntoUML2ImplementationModel', 'Uml2java', 'compile']
+            assert executor.transformation_result.generated_code_compiles
+            assert os.path.isfile(scratch_workspace.get_artifact_path('model', ScratchWorkspace.UML))
+
+            executor.finalize_and_get_results()
+            assert not os.path.exists(os.path.join(scratch_workspace.scratch_path, 'model'))
+
+        assert sorted(os.listdir(tmp_path / 'artifacts' / 'model')) == ['model.uml', 'src']
+        assert (tmp_path / 'artifacts' / 'model' / 'src' / 'model' / 'Person.java').read_text() == 'Uml2java'
+        assert not any(files for _, _, files in os.walk(tmp_path / 'workspace'))
+        assert not (tmp_path / 'scratch').exists() or not os.listdir(tmp_path / 'scratch')
+
+    def test_generated_sources_are_cleared(self, tmp_path, executor_options):
+        with ScratchWorkspace(tmp_path / 'scratch') as scratch_workspace:
+            stale_file = os.path.join(scratch_workspace.get_artifact_path('model', ScratchWorkspace.SOURCE), 'Old.java')
+            os.makedirs(os.path.dirname(stale_file))
+            open(stale_file, 'w').close()
+
+            TransformationExecutor(**executor_options, stage_runner=FakeStageRunner(),
+                                   scratch_workspace=scratch_workspace).execute_entire_transformation_chain()
+
+            assert not os.path.exists(stale_file)
+
+    def test_artifact_location_required_to_keep_artifacts(self, tmp_path):
+        with pytest.raises(ValueError):
+            ScratchWorkspace(tmp_path, kept_artifacts=[ScratchWorkspace.XMI])
@@ -0,0 +1,101 @@
+import pytest
+
+from OntoUML2JavaTransformationExecution.StageCache import StageCache
+from OntoUML2JavaTransformationExecution.StageOutput import StageOutput
+from OntoUML2JavaTransformationExecution.StageRunner import StageResult, StageRunner
+from OntoUML2JavaTransformationExecution.TransformationExecutor import TransformationExecutor
+from OntoUML2JavaTransformationExecution.TransformationStage import TransformationStage
+
+
+def make_project(path):
+    (path / 'generated-models').mkdir(parents=True)
+    (path / 'build.xml').write_text('<project/>')
+    return path
+
+
+def store(cache, stage, output_path, returncode, console_output):
+    console_log_path = cache.get_console_log_path()
+    with open(console_log_path, 'w', encoding='utf-8') as f:
+        f.write(console_output)
+    cache.store(stage, 'key', str(output_path), StageResult([], returncode, StageOutput()), console_log_path)
+
+
+class FailingStageRunner(StageRunner):
+    """
+    Writes a line of console output and fails, like a runner of which the worker crashed.
+    """
+
+    def run(self, ant_args, cwd, output=None, timeout=None):
+        output.feed("Buildfile: build.xml\n")
+        output.close()
+        raise OSError("worker crashed")
+
+
+class TestStageCache:
+
+    def test_key_depends_on_input_and_project(self, tmp_path):
+        project = make_project(tmp_path / 'project')
+        model_a = tmp_path / 'a.json'
+        model_b = tmp_path / 'b.json'
+        model_a.write_text('{"model": 1}')
+        model_b.write_text('{"model": 1}')
+
+        cache = StageCache(tmp_path / 'cache')
+        key_a = cache.get_key(TransformationStage.READ_ONTOUML, model_a, project)
+        assert key_a == cache.get_key(TransformationStage.READ_ONTOUML, model_b, project)
+        assert key_a != cache.get_key(TransformationStage.ATL, model_a, project)
+
+        # Generated files do not change the fingerprint, other project files do
+        (project / 'generated-models' / 'a.xmi').write_text('<xmi/>')
+        assert key_a == StageCache(tmp_path / 'cache').get_key(TransformationStage.READ_ONTOUML, model_a, project)
+        (project / 'build.xml').write_text('<project name="changed"/>')
+        assert key_a != StageCache(tmp_path / 'cache').get_key(TransformationStage.READ_ONTOUML, model_a, project)
+
+    def test_store_and_restore_file(self, tmp_path):
+        cache = StageCache(tmp_path / 'cache')
+        output = tmp_path / 'a.uml'
+        output.write_text('<uml/>')
+
+        assert cache.restore(TransformationStage.ATL, 'key', str(tmp_path / 'restored.uml'), StageOutput()) is None
+        store(cache, TransformationStage.ATL, output, 0, 'Warning: x\n')
+
+        restored = cache.restore(TransformationStage.ATL, 'key', str(tmp_path / 'restored' / 'b.uml'), StageOutput())
+        assert restored.returncode == 0
+        assert restored.output.get_head() == 'Warning: x\n'
+        assert (tmp_path / 'restored' / 'b.uml').read_text() == '<uml/>'
+
+    def test_store_and_restore_folder(self, tmp_path):
+        cache = StageCache(tmp_path / 'cache')
+        source = tmp_path / 'src'
+        (source / 'model').mkdir(parents=True)
+        (source / 'model' / 'Person.java').write_text('class Person {}')
+
+        store(cache, TransformationStage.ACCELEO, source, 0, '')
+        target = tmp_path / 'other-src'
+        target.mkdir()
+        cache.restore(TransformationStage.ACCELEO, 'key', str(target), StageOutput())
+
+        assert (target / 'model' / 'Person.java').read_text() == 'class Person {}'
+
+    def test_failed_stage_not_stored(self, tmp_path):
+        cache = StageCache(tmp_path / 'cache')
+        output = tmp_path / 'a.xmi'
+        output.write_text('')
+
+        store(cache, TransformationStage.READ_ONTOUML, output, 1, '')
+
+        assert cache.restore(TransformationStage.READ_ONTOUML, 'key', str(tmp_path / 'b.xmi'), StageOutput()) is None
+        assert not any((tmp_path / 'cache' / 'tmp').iterdir())
+
+    def test_console_log_removed_if_runner_fails(self, tmp_path, monkeypatch):
+        workspace = tmp_path / 'workspace'
+        make_project(workspace / TransformationExecutor.ECORE_MODEL_PROJECT)
+        monkeypatch.setenv('ECLIPSE_ONTOUML_2_JAVA_WORKSPACE', str(workspace))
+        (tmp_path / 'model.json').write_text('{}')
+        executor = TransformationExecutor(str(tmp_path / 'model.json'), stage_runner=FailingStageRunner(),
+                                          stage_cache=StageCache(tmp_path / 'cache'))
+
+        with pytest.raises(OSError):
+            executor.execute_stage(TransformationStage.READ_ONTOUML)
+
+        assert not any((tmp_path / 'cache' / 'tmp').iterdir())
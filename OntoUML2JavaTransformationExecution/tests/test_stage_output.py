@@ -0,0 +1,45 @@
+from OntoUML2JavaTransformationExecution.StageOutput import StageOutput
+
+
+class TestStageOutput:
+
+    def test_keeps_head_and_tail_only(self):
+        output = StageOutput(head_limit=10, tail_lines=2)
+        output.feed_lines(f"line {i}\n" for i in range(1000))
+        output.close()
+
+        assert output.get_head() == "line 0\nlin"
+        assert output.get_tail() == "line 998\nline 999\n"
+        assert output.get_truncated_text() == "line 0\nlin\n [and 999 more lines]"
+        assert output.n_lines == 1000
+        assert output.n_bytes == sum(len(f"line {i}\n") for i in range(1000))
+
+    def test_line_handlers_and_log(self, tmp_path):
+        seen = []
+        log_path = tmp_path / 'stage.log'
+        output = StageOutput(head_limit=0, line_handlers=[seen.append], log_path=log_path)
+        output.feed_lines(["Warning: a\n", "done"])
+        output.close()
+
+        assert seen == ["Warning: a\n", "done"]
+        assert log_path.read_text() == "Warning: a\ndone"
+        assert output.get_head() == ""
+
+    def test_time_breakdown_from_ant_output(self, monkeypatch):
+        clock = iter([0.0, 1.5, 2.0, 9.0, 9.5]).__next__
+        monkeypatch.setattr('OntoUML2JavaTransformationExecution.StageOutput.time.monotonic', clock)
+
+        output = StageOutput()
+        assert output.get_time_breakdown() == (None, None)
+        assert output.get_overhead_breakdown() == (None, None, None)
+        output.mark_started()  # 0.0
+        output.feed_lines(["Buildfile: /workspace/build.xml\n",  # 1.5
+                           "\n",
+                           "build-project:\n",  # 2.0
+                           "    [javac] Compiling 12 source files\n",
+                           "BUILD SUCCESSFUL\n",  # 9.0
+                           "Total time: 7 seconds\n"])
+        output.close()  # 9.5
+
+        assert output.get_time_breakdown() == (2.5, 7.0)
+        assert output.get_overhead_breakdown() == (1.5, 0.5, 0.5)
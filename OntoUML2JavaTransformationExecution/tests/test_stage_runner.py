@@ -0,0 +1,177 @@
+import os
+import stat
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from OntoUML2JavaTransformationExecution.StageOutput import StageOutput
+from OntoUML2JavaTransformationExecution.StageRunner import PersistentWorkerStageRunner, ProcessTreeMemorySampler, \
+    StageRunner, StageTimeoutError, SubprocessStageRunner, kill_process_tree
+
+STAND_IN_WORKER = os.path.join(os.path.dirname(__file__), 'stand_in_stage_worker.py')
+
+
+class TestStageRunner:
+
+    def test_runner_without_run_cannot_be_created(self):
+        class IncompleteStageRunner(StageRunner):
+            pass
+
+        with pytest.raises(TypeError):
+            IncompleteStageRunner()
+
+
+class TestPersistentWorkerStageRunner:
+
+    def test_worker_is_reused_per_project(self, tmp_path):
+        with PersistentWorkerStageRunner([sys.executable, STAND_IN_WORKER]) as runner:
+            first = runner.run(['-Da=b', 'convertFromModelRepo'], cwd=str(tmp_path), output=StageOutput())
+            second = runner.run(['OntoUML2ImplementationModel'], cwd=str(tmp_path), output=StageOutput())
+
+        assert first.returncode == 0
+        assert first.output.get_head().splitlines()[0] == second.output.get_head().splitlines()[0]  # same pid
+        assert "job 1\n" in first.output.get_head()
+        assert "job 2\n" in second.output.get_head()
+        assert second.output.get_tail().endswith("target OntoUML2ImplementationModel\n")
+
+    def test_separate_worker_per_project(self, tmp_path):
+        project_a = tmp_path / 'a'
+        project_b = tmp_path / 'b'
+        project_a.mkdir()
+        project_b.mkdir()
+
+        with PersistentWorkerStageRunner([sys.executable, STAND_IN_WORKER]) as runner:
+            result_a = runner.run(['Uml2java'], cwd=str(project_a), output=StageOutput())
+            result_b = runner.run(['Uml2java'], cwd=str(project_b), output=StageOutput())
+
+        assert result_a.output.get_head().splitlines()[0] != result_b.output.get_head().splitlines()[0]
+        assert f"cwd {project_b}" in result_b.output.get_head()
+
+    def test_returncode_and_uncaptured_output(self, tmp_path, capsys):
+        with PersistentWorkerStageRunner([sys.executable, STAND_IN_WORKER]) as runner:
+            failed = runner.run(['-DexitCode=1', 'build-project'], cwd=str(tmp_path), output=StageOutput())
+            not_captured = runner.run(['clean'], cwd=str(tmp_path))
+
+        assert failed.returncode == 1
+        assert not_captured.output is None
+        assert "target clean" in capsys.readouterr().out
+
+    def test_timeout_kills_and_restarts_worker(self, tmp_path):
+        with PersistentWorkerStageRunner([sys.executable, STAND_IN_WORKER]) as runner:
+            with pytest.raises(StageTimeoutError) as timeout_error:
+                runner.run(['-Dsleep=30', 'OntoUML2ImplementationModel'], cwd=str(tmp_path), output=StageOutput(),
+                           timeout=0.5)
+            after_timeout = runner.run(['OntoUML2ImplementationModel'], cwd=str(tmp_path), output=StageOutput(),
+                                       timeout=30)
+
+        assert 0.5 <= timeout_error.value.elapsed_s < 10
+        assert timeout_error.value.output.startswith("pid ")
+        assert "job 1\n" in after_timeout.output.get_head()
+
+    def test_concurrent_runs(self, tmp_path):
+        projects = [tmp_path / 'a', tmp_path / 'b']
+        for project in projects:
+            project.mkdir()
+
+        with PersistentWorkerStageRunner([sys.executable, STAND_IN_WORKER]) as runner:
+            with ThreadPoolExecutor(max_workers=6) as pool:
+                results = list(pool.map(
+                    lambda i: runner.run(['-Dsleep=0.02', f'target-{i}'], cwd=str(projects[i % 2]), output=StageOutput(),
+                                         timeout=30), range(6)))
+
+        for i, result in enumerate(results):
+            lines = result.output.get_head().splitlines()
+            assert result.returncode == 0
+            assert len(lines) == 4
+            assert lines[2:] == [f"cwd {projects[i % 2]}", f"target target-{i}"]
+        # Each worker executed the targets of its project one after another
+        for project_index in range(2):
+            assert sorted(results[i].output.get_head().splitlines()[1] for i in range(project_index, 6, 2)) == \
+                   ["job 1", "job 2", "job 3"]
+
+
+def is_running(pid):
+    # A killed process that has not been reaped yet (a zombie) is not running
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+
+def make_fake_ant(directory, script):
+    fake_ant = directory / 'ant'
+    fake_ant.write_text(script)
+    fake_ant.chmod(fake_ant.stat().st_mode | stat.S_IEXEC)
+    return fake_ant
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="Fake ANT is a shell script")
+class TestSubprocessStageRunner:
+
+    def test_runs_ant_in_project(self, tmp_path, monkeypatch):
+        make_fake_ant(tmp_path, '#!/bin/sh\necho "args $@"\npwd\nexit 3\n')
+        monkeypatch.setenv('PATH', f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+        result = SubprocessStageRunner().run(['-Dx=y', 'build-project'], cwd=str(tmp_path), output=StageOutput())
+
+        assert result.returncode == 3
+        assert result.output.get_head() == f"args -Dx=y build-project\n{tmp_path}\n"
+
+    @pytest.mark.skipif(not hasattr(os, 'wait4'), reason="Resource usage requires os.wait4")
+    def test_measures_resources_of_process_tree(self, tmp_path, monkeypatch):
+        # The CPU time and memory are used by a child process of the fake ANT, like the JVM
+        make_fake_ant(tmp_path, f'#!/bin/sh\n{sys.executable} -c "x = bytearray(50_000_000); sum(range(10**7))"\n')
+        monkeypatch.setenv('PATH', f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+        result = SubprocessStageRunner().run(['build-project'], cwd=str(tmp_path), output=StageOutput())
+
+        assert result.returncode == 0
+        assert 0 < result.user_cpu_s <= result.wall_time_s + 1
+        assert result.sys_cpu_s >= 0
+        assert result.max_rss_kb > 50_000
+
+    @pytest.mark.skipif(not os.path.isfile('/proc/self/status'), reason="Peak memory is sampled from /proc")
+    def test_peak_memory_excludes_parent(self, tmp_path, monkeypatch):
+        # A child forked by a large process inherits its ru_maxrss, which should not be reported as the peak memory
+        make_fake_ant(tmp_path, '#!/bin/sh\nsleep 0.3\n')
+        monkeypatch.setenv('PATH', f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+        large_parent_memory = bytearray(b'x') * 300_000_000
+
+        result = SubprocessStageRunner().run(['build-project'], cwd=str(tmp_path), output=StageOutput())
+
+        assert len(large_parent_memory) > 0
+        assert 0 < result.max_rss_kb < 50_000
+
+    @pytest.mark.parametrize('find_tree', [
+        ProcessTreeMemorySampler._scan_process_tree,
+        pytest.param(ProcessTreeMemorySampler._walk_process_tree, marks=pytest.mark.skipif(
+            not ProcessTreeMemorySampler.HAS_CHILDREN_FILES, reason="Kernel does not list the children of a thread"))])
+    @pytest.mark.skipif(not os.path.isfile('/proc/self/status'), reason="Process tree is read from /proc")
+    def test_process_tree(self, tmp_path, find_tree):
+        pid_file = tmp_path / 'grandchild.pid'
+        process = subprocess.Popen(['/bin/sh', '-c', f'sleep 30 & echo $! > {pid_file}; wait'], start_new_session=True)
+        try:
+            while not pid_file.is_file() or not pid_file.read_text().strip():
+                time.sleep(0.01)
+            assert find_tree(ProcessTreeMemorySampler(process.pid)) == [process.pid, int(pid_file.read_text())]
+        finally:
+            kill_process_tree(process)
+            process.wait()
+
+    def test_timeout_kills_process_tree(self, tmp_path, monkeypatch):
+        # The fake ANT starts a child process (like the JVM) that would outlive ANT if only ANT were killed
+        pid_file = tmp_path / 'child.pid'
+        make_fake_ant(tmp_path, f'#!/bin/sh\necho started\nsleep 30 &\necho $! > {pid_file}\nwait\n')
+        monkeypatch.setenv('PATH', f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+        start_time = time.monotonic()
+        with pytest.raises(StageTimeoutError) as timeout_error:
+            SubprocessStageRunner().run(['build-project'], cwd=str(tmp_path), output=StageOutput(), timeout=0.5)
+
+        assert time.monotonic() - start_time < 10
+        assert timeout_error.value.output == "started\n"
+        assert not is_running(int(pid_file.read_text()))
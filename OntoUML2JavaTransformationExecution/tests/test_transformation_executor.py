@@ -0,0 +1,39 @@
+import time
+
+from OntoUML2JavaTransformationExecution.StageRunner import StageResult, StageRunner
+from OntoUML2JavaTransformationExecution.TransformationExecutor import TransformationExecutor
+from OntoUML2JavaTransformationExecution.TransformationStage import StageTimeLimit, TransformationStage
+
+
+class SlowCleanStageRunner(StageRunner):
+    """
+    Takes 0.3 seconds for the 'clean' target, and records the time limit of every executed target.
+    """
+
+    def __init__(self):
+        self.timeouts = {}
+
+    def run(self, ant_args, cwd, output=None, timeout=None):
+        self.timeouts[ant_args[-1]] = timeout
+        if ant_args[-1] == 'clean':
+            time.sleep(0.3)
+        if output is not None:
+            output.close()
+        return StageResult(['ant', *ant_args], 0, output)
+
+
+class TestTransformationExecutor:
+
+    def test_clean_and_build_share_the_compile_check_time_limit(self, tmp_path, monkeypatch):
+        (tmp_path / 'workspace' / TransformationExecutor.GENERATED_CODE_PROJECT).mkdir(parents=True)
+        monkeypatch.setenv('ECLIPSE_ONTOUML_2_JAVA_WORKSPACE', str(tmp_path / 'workspace'))
+        (tmp_path / 'model.json').write_text('{}')
+        runner = SlowCleanStageRunner()
+        executor = TransformationExecutor(str(tmp_path / 'model.json'), test_generated_code=True, stage_runner=runner,
+                                          stage_time_limits={TransformationStage.COMPILE_CHECK: StageTimeLimit(1.0)})
+
+        assert executor.execute_stage(TransformationStage.COMPILE_CHECK) == 0
+
+        assert runner.timeouts['clean'] == 1.0
+        # The build gets the time the clean left of the limit
+        assert 0.5 < runner.timeouts['build-project'] <= 0.7
@@ -0,0 +1,243 @@
+"""\
+Batch validation of OntoUML JSON files against the OntoUML JSON Schema.
+
+The schema is loaded and checked once, and the validator built from it is reused for all files (once per worker process
+when validating in parallel). Verdicts are cached by the hash of the file contents, so unchanged files are not validated
+again, and all validation errors of a file are reported instead of only the first.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+from jsonschema import validators
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), 'ontouml-schema.yaml')
+
+# Messages of errors on large objects contain the complete object, which is cut off
+MAX_MESSAGE_LENGTH = 300
+
+# Per worker process: the validator it uses (see 'SchemaValidator.validate_files')
+_worker_context = {}
+
+
+def hash_file(path):
+    """
+    :return: Hex digest of the SHA-256 hash of the contents of a file.
+    """
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _is_type_mismatch(error) -> bool:
+    """
+    :return: Whether the error shows that the instance is a different kind of element than the (sub)schema describes,
+        i.e. its 'type' property has another value, or it does not match any alternative of a oneOf/anyOf for that
+        reason.
+    """
+    if error.validator in ('const', 'enum'):
+        return len(error.relative_path) > 0 and error.relative_path[-1] == 'type'
+    if error.validator in ('oneOf', 'anyOf') and error.context:
+        return all(any(_is_type_mismatch(sub_error) for sub_error in alternative_errors)
+                   for alternative_errors in _group_by_alternative(error))
+    return False
+
+
+def _group_by_alternative(error) -> list:
+    """
+    :return: The errors in the context of a oneOf/anyOf error, grouped per alternative of the oneOf/anyOf.
+    """
+    errors_per_alternative = {}
+    for sub_error in error.context:
+        errors_per_alternative.setdefault(sub_error.relative_schema_path[0], []).append(sub_error)
+    return list(errors_per_alternative.values())
+
+
+def _flatten_errors(errors) -> list:
+    """
+    The OntoUML JSON Schema consists of nested oneOfs over the kinds of elements, so a single error at the root
+    results from any invalid element. For a oneOf/anyOf error, the errors of the alternative describing the kind of the
+    element (the alternative without a type mismatch and with the fewest errors) are reported instead. If there is no
+    such single alternative (e.g. a name that is neither null nor a language string), the oneOf/anyOf error itself is
+    reported.
+    :param errors: Iterable over jsonschema ValidationErrors.
+    :return: List of the errors to report.
+    """
+    flattened = []
+    for error in errors:
+        if error.validator in ('oneOf', 'anyOf') and error.context:
+            scores = [(any(_is_type_mismatch(sub_error) for sub_error in alternative_errors), len(alternative_errors))
+                      for alternative_errors in _group_by_alternative(error)]
+            best_score = min(scores)
+            if scores.count(best_score) == 1:
+                flattened += _flatten_errors(_group_by_alternative(error)[scores.index(best_score)])
+                continue
+        flattened.append(error)
+    return flattened
+
+
+def _to_error_dict(error) -> dict:
+    """
+    :return: Dict with the location in the file ('path', as a JSON path), 'message', 'validator' (the failed schema
+        keyword) and location in the schema ('schema_path') of a jsonschema ValidationError.
+    """
+    message = error.message
+    if len(message) > MAX_MESSAGE_LENGTH:
+        message = message[:MAX_MESSAGE_LENGTH] + '...'
+    return {'path': error.json_path, 'message': message, 'validator': error.validator,
+            'schema_path': '/'.join(map(str, error.absolute_schema_path))}
+
+
+def load_validator(schema_path=SCHEMA_PATH):
+    """
+    Loads the schema, checks it against its metaschema and builds a validator for it.
+    :param schema_path: Location of the (YAML or JSON) schema.
+    :return: jsonschema validator of the schema.
+    """
+    with open(schema_path, encoding='utf-8') as f:
+        schema = yaml.safe_load(f)
+    validator_class = validators.validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+
+def validate_instance(validator, instance) -> list[dict]:
+    """
+    :param validator: See load_validator.
+    :param instance: Parsed JSON.
+    :return: All validation errors of the instance (see _to_error_dict), ordered by their location in the instance.
+    """
+    errors = _flatten_errors(validator.iter_errors(instance))
+    return [_to_error_dict(error) for error in sorted(errors, key=lambda error: [str(part) for part in error.path])]
+
+
+def _validate_file(validator, path) -> list[dict]:
+    """
+    :return: The validation errors of a JSON file, or a single error if it is no valid JSON.
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            instance = json.load(f)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        return [{'path': '$', 'message': f"Invalid JSON: {e}", 'validator': None, 'schema_path': ''}]
+    return validate_instance(validator, instance)
+
+
+def _init_worker(schema_path):
+    """
+    Initializer of a worker process, which builds the validator once.
+    """
+    _worker_context['validator'] = load_validator(schema_path)
+
+
+def _validate_file_in_worker(path):
+    return _validate_file(_worker_context['validator'], path)
+
+
+class SchemaValidator:
+    """
+    Validates OntoUML JSON files against the OntoUML JSON Schema, see the module documentation.
+    """
+
+    def __init__(self, schema_path=SCHEMA_PATH, cache_path=None):
+        """
+        :param schema_path: Location of the schema.
+        :param cache_path: JSON file in which the verdicts are cached between runs. None to only cache the verdicts in
+            memory. Cached verdicts are discarded when the schema changes.
+        """
+        self.schema_path = schema_path
+        self.schema_hash = hash_file(schema_path)
+        self.validator = load_validator(schema_path)
+        self.cache_path = cache_path
+        # Hash of the file contents -> validation errors
+        self.verdicts = {}
+        if cache_path is not None and os.path.isfile(cache_path):
+            with open(cache_path, encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get('schema_hash') == self.schema_hash:
+                self.verdicts = cache['verdicts']
+
+    def validate_file(self, path) -> list[dict]:
+        """
+        :param path: Location of a JSON file.
+        :return: All validation errors of the file (see _to_error_dict), an empty list if the file is valid.
+        """
+        return self.validate_files([path], n_workers=1)[path]
+
+    def validate_files(self, paths, n_workers=None) -> dict:
+        """
+        Validates JSON files. Files of which the verdict is cached are not validated again.
+        :param paths: Locations of the JSON files.
+        :param n_workers: Number of processes that validate files in parallel, by default the number of CPUs. With 1,
+            the files are validated in this process.
+        :return: Dict with path -> validation errors of the file (see validate_file), in the order of paths.
+        """
+        hashes = {path: hash_file(path) for path in paths}
+        to_validate = list({file_hash: path for path, file_hash in hashes.items()
+                            if file_hash not in self.verdicts}.values())
+        n_workers = min(n_workers or os.cpu_count() or 1, len(to_validate))
+
+        if n_workers > 1:
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                     initargs=(self.schema_path,)) as pool:
+                verdicts = pool.map(_validate_file_in_worker, to_validate)
+                for path, errors in zip(to_validate, verdicts):
+                    self.verdicts[hashes[path]] = errors
+        else:
+            for path in to_validate:
+                self.verdicts[hashes[path]] = _validate_file(self.validator, path)
+        return {path: self.verdicts[hashes[path]] for path in paths}
+
+    def save_cache(self):
+        """
+        Writes the cached verdicts to the cache file, if any.
+        """
+        if self.cache_path is None:
+            return
+        if os.path.dirname(self.cache_path):
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            json.dump({'schema_hash': self.schema_hash, 'verdicts': self.verdicts}, f)
+
+
+def get_json_paths(paths) -> list:
+    """
+    :param paths: JSON files and folders.
+    :return: The JSON files, and the JSON files in the folders (sorted by name).
+    """
+    json_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            json_paths += [os.path.join(path, file_name) for file_name in sorted(os.listdir(path))
+                           if file_name.endswith('.json')]
+        else:
+            json_paths.append(path)
+    return json_paths
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Validate OntoUML JSON files against the OntoUML JSON Schema.")
+    parser.add_argument('paths', nargs='+', metavar='PATH', help="JSON files, or folders with JSON files.")
+    parser.add_argument('--schema', default=SCHEMA_PATH, help="Location of the schema.")
+    parser.add_argument('--cache', metavar='FILE', help="JSON file in which the verdicts are cached between runs.")
+    parser.add_argument('--workers', type=int, help="Number of files validated in parallel, default is the number of "
+                                                    "CPUs.")
+    parser.add_argument('--max-errors', type=int, default=10,
+                        help="Maximum number of errors printed per file (all errors are counted).")
+    args = parser.parse_args()
+
+    schema_validator = SchemaValidator(args.schema, args.cache)
+    errors_per_file = schema_validator.validate_files(get_json_paths(args.paths), args.workers)
+    schema_validator.save_cache()
+
+    for path, errors in errors_per_file.items():
+        print(f"{path}: {'valid' if not errors else f'{len(errors)} errors'}")
+        for error in errors[:args.max_errors]:
+            print(f"    {error['path']}: {error['message']}")
+        if len(errors) > args.max_errors:
+            print(f"    ... {len(errors) - args.max_errors} more")
+    n_invalid = sum(1 for errors in errors_per_file.values() if errors)
+    print(f"{len(errors_per_file) - n_invalid} of {len(errors_per_file)} files are valid")
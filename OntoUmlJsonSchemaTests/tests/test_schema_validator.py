@@ -0,0 +1,75 @@
+import json
+import os
+
+import pytest
+
+from OntoUmlJsonSchemaTests import SchemaValidator as schema_validator_module
+from OntoUmlJsonSchemaTests.SchemaValidator import SchemaValidator
+
+FLOWER_PATH = os.path.join(os.path.dirname(schema_validator_module.SCHEMA_PATH), 'ontouml-flower.json')
+
+# Elements of two kinds, distinguished by their 'type' property
+SCHEMA = {
+    '$schema': 'http://json-schema.org/draft-07/schema#',
+    'oneOf': [
+        {'type': 'object', 'properties': {'type': {'const': 'Class'}, 'name': {'type': 'string'}},
+         'required': ['name', 'stereotype']},
+        {'type': 'object', 'properties': {'type': {'const': 'Relation'}, 'name': {'type': 'string'}},
+         'required': ['source', 'target']},
+    ]
+}
+
+
+@pytest.fixture
+def schema_path(tmp_path):
+    path = tmp_path / 'schema.json'
+    path.write_text(json.dumps(SCHEMA))
+    return str(path)
+
+
+def write_json(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(json.dumps(content))
+    return str(path)
+
+
+class TestSchemaValidator:
+
+    def test_reports_all_errors_of_the_matching_kind(self, tmp_path, schema_path):
+        valid = write_json(tmp_path, 'valid.json', {'type': 'Class', 'name': 'Person', 'stereotype': 'kind'})
+        invalid = write_json(tmp_path, 'invalid.json', {'type': 'Relation', 'name': 3})
+
+        errors_per_file = SchemaValidator(schema_path).validate_files([valid, invalid], n_workers=1)
+
+        assert errors_per_file[valid] == []
+        assert [(error['path'], error['validator']) for error in errors_per_file[invalid]] == \
+            [('$', 'required'), ('$', 'required'), ('$.name', 'type')]
+
+    def test_invalid_json(self, tmp_path, schema_path):
+        path = tmp_path / 'broken.json'
+        path.write_text('{"type": ')
+        assert SchemaValidator(schema_path).validate_file(str(path))[0]['message'].startswith('Invalid JSON')
+
+    def test_verdicts_are_cached_by_content(self, tmp_path, schema_path, monkeypatch):
+        cache_path = str(tmp_path / 'cache.json')
+        path = write_json(tmp_path, 'model.json', {'type': 'Class'})
+        validator = SchemaValidator(schema_path, cache_path)
+        errors = validator.validate_file(path)
+        validator.save_cache()
+
+        def fail(*args):
+            raise AssertionError("validated again")
+
+        monkeypatch.setattr(schema_validator_module, '_validate_file', fail)
+        copy = write_json(tmp_path, 'copy.json', {'type': 'Class'})
+        assert SchemaValidator(schema_path, cache_path).validate_files([path, copy]) == {path: errors, copy: errors}
+
+    def test_parallel_validation_of_the_ontouml_schema(self):
+        fixed_path = os.path.join(os.path.dirname(FLOWER_PATH), 'ontouml-flower language-string-fixed.json')
+        validator = SchemaValidator()
+        sequential = validator.validate_files([FLOWER_PATH, fixed_path], n_workers=1)
+
+        assert SchemaValidator().validate_files([FLOWER_PATH, fixed_path], n_workers=2) == sequential
+        # The JSON exported from the VP plugin does not pass the schema, see the readme
+        assert {'path': '$', 'message': "'created' is a required property", 'validator': 'required',
+                'schema_path': 'oneOf/0/allOf/0/required'} in sequential[FLOWER_PATH]
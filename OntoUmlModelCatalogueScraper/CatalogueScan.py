@@ -0,0 +1,226 @@
+"""\
+Scan engine for the stereotype occurrences within the OntoUML model catalogue.
+
+The OntoUML JSON file of every project is read in chunks by an incremental JSON tokenizer, and only the 'type' and
+'stereotype' fields of the elements in the contents of the model (and its packages) are kept. Memory use therefore does not
+depend on the size of the largest model. Projects are scanned in parallel by a pool of worker processes.
+
+The counts are identical (including their order) to those of util.get_contents_stereotype_frequencies applied to the
+loaded JSON file.
+"""
+
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from OntoUmlModelCatalogueScraper.util import recursive_dict_add_in_place
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1 << 16
+
+# A JSON token preceded by whitespace: a string, a structural character, or a number/true/false/null literal
+TOKEN_REGEX = re.compile(rb'\s*(?:("(?:[^"\\]|\\.)*")|([{}\[\]:,])|([^\s{}\[\]:,"]+))', re.DOTALL)
+# Everything up to and including the next bracket that is not within a string
+SKIP_REGEX = re.compile(rb'(?:[^"{}\[\]]++|"(?:[^"\\]|\\.)*+")*+([{}\[\]])', re.DOTALL)
+STRING, PUNCTUATION, LITERAL = 1, 2, 3
+
+# Roles of the JSON containers that are not skipped
+ROOT = 'root'
+CONTAINER = 'container'  # The model, or an element of a contents array (of which only Packages are containers)
+CONTENTS = 'contents'  # The contents array of a container
+
+types_without_stereotypes = set()
+
+
+class JsonTokenizer:
+    """
+    Incremental tokenizer of a JSON file, which only keeps the part of the file that is not tokenized yet in memory.
+    Works on bytes, as not all files in the catalogue are UTF-8 encoded.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        """
+        :param f: File opened in binary mode.
+        :param chunk_size: Number of bytes read at a time.
+        """
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = b''
+        self.position = 0
+        self.at_end = False
+
+    def __read_chunk(self):
+        if self.at_end:
+            raise ValueError(f"Invalid or incomplete JSON near {self.buffer[self.position:self.position + 50]}")
+        chunk = self.f.read(self.chunk_size)
+        self.at_end = not chunk
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+    def next_token(self):
+        """
+        :return: 2-tuple of the token type (STRING, PUNCTUATION or LITERAL) and the token as it occurs in the file (i.e.
+            strings including their quotes and escapes), or None at the end of the file.
+        """
+        while True:
+            match = TOKEN_REGEX.match(self.buffer, self.position)
+            # A token that ends at the end of the buffer may continue in the next chunk
+            if match is not None and (match.end() < len(self.buffer) or self.at_end):
+                self.position = match.end()
+                return match.lastindex, match.group(match.lastindex)
+            if self.at_end and not self.buffer[self.position:].strip():
+                return None
+            self.__read_chunk()
+
+    def skip_container(self):
+        """
+        Skips the rest of the object or array of which the opening bracket was the last token, without tokenizing it.
+        """
+        depth = 1
+        while depth > 0:
+            match = SKIP_REGEX.match(self.buffer, self.position)
+            if match is None:
+                self.__read_chunk()
+                continue
+            self.position = match.end()
+            depth += 1 if match.group(1) in b'{[' else -1
+
+
+def decode_string(token: bytes):
+    if b'\\' not in token:
+        return token[1:-1].decode('utf-8', errors='replace')
+    return json.loads(token.decode('utf-8', errors='replace'))
+
+
+def decode_value(token_type, token: bytes):
+    if token_type == STRING:
+        return decode_string(token)
+    return json.loads(token)
+
+
+class _Frame:
+    """
+    A JSON object or array that is being tokenized.
+    """
+    __slots__ = ['is_object', 'role', 'key', 'counts', 'type', 'stereotype', 'has_stereotype']
+
+    def __init__(self, is_object, role):
+        self.is_object = is_object
+        self.role = role
+        self.key = None
+        # For containers: Type -> Stereotype -> n_occurrences of the elements in its contents
+        self.counts = {} if role == CONTAINER else None
+        self.type = None
+        self.stereotype = None
+        self.has_stereotype = False
+
+
+def _add_element(counts, frame: _Frame):
+    """
+    Adds a completed element of a contents array to the counts of the container of the array.
+    """
+    if frame.type == 'Package':
+        # The counts of a Package are complete once it is closed, and keep the order in which the elements occur
+        recursive_dict_add_in_place(counts, frame.counts)
+        return
+    if not frame.has_stereotype:
+        if frame.type not in types_without_stereotypes:
+            logger.warning(f"Type {frame.type} has no stereotype field")
+            types_without_stereotypes.add(frame.type)
+        return
+    type_counts = counts.setdefault(frame.type, {})
+    type_counts[frame.stereotype] = type_counts.get(frame.stereotype, 0) + 1
+
+
+def scan_stereotype_frequencies(f, chunk_size=CHUNK_SIZE) -> dict:
+    """
+    Get the frequency of stereotypes for several types within the contents of the model of an OntoUML JSON file,
+    including those in (sub-)Packages, without loading the complete file.
+    :param f: OntoUML JSON file opened in binary mode.
+    :param chunk_size: Number of bytes read at a time.
+    :return: A dictionary with structure Type -> Stereotype -> n_occurrences
+    """
+    tokenizer = JsonTokenizer(f, chunk_size)
+    stack: list[_Frame] = []
+    model_counts = {}
+    expecting_key = False
+
+    while (next_token := tokenizer.next_token()) is not None:
+        token_type, token = next_token
+        frame = stack[-1] if stack else None
+        if token_type == PUNCTUATION:
+            if token == b'{' or token == b'[':
+                role = None
+                if frame is None:
+                    role = ROOT if token == b'{' else None
+                elif frame.role == ROOT and frame.key == 'model' and token == b'{':
+                    role = CONTAINER
+                elif frame.role == CONTAINER and frame.key == 'contents' and token == b'[':
+                    role = CONTENTS
+                elif frame.role == CONTENTS and token == b'{':
+                    role = CONTAINER
+                if role is None:
+                    # Nothing to count in it, such as the diagrams or the properties of a class
+                    tokenizer.skip_container()
+                    expecting_key = False
+                    continue
+                stack.append(_Frame(token == b'{', role))
+                expecting_key = token == b'{'
+            elif token == b'}' or token == b']':
+                stack.pop()
+                if frame.role == CONTAINER:
+                    if stack[-1].role == CONTENTS:
+                        # An element of a contents array, counted by the container of the array
+                        _add_element(stack[-2].counts, frame)
+                    else:
+                        model_counts = frame.counts
+                expecting_key = False
+            elif token == b',':
+                expecting_key = frame.is_object
+            # ':' needs no handling, as the key is stored when it is read
+            continue
+
+        if expecting_key:
+            frame.key = decode_string(token)
+            expecting_key = False
+        elif frame is not None and frame.role == CONTAINER:
+            if frame.key == 'type':
+                frame.type = decode_value(token_type, token)
+            elif frame.key == 'stereotype':
+                frame.stereotype = decode_value(token_type, token)
+                frame.has_stereotype = True
+    return model_counts
+
+
+def scan_project(json_path):
+    """
+    :param json_path: OntoUML JSON file of a project.
+    :return: A dictionary with structure Type -> Stereotype -> n_occurrences, or None if the file does not exist.
+    """
+    if not os.path.isfile(json_path):
+        return None
+    with open(json_path, 'rb') as f:
+        return scan_stereotype_frequencies(f)
+
+
+def scan_catalogue(repo_path, n_workers=None) -> dict:
+    """
+    Counts the stereotypes of the projects in the OntoUML model catalogue in parallel.
+    :param repo_path: Path to a local version of the OntoUML model catalogue.
+    :param n_workers: Number of worker processes, default is the number of processors.
+    :return: Dict with structure Project -> Type -> StereoType -> Count, for every project with an 'ontology.json' file.
+    """
+    projects = os.listdir(repo_path)
+    json_paths = [os.path.join(repo_path, project, "ontology.json") for project in projects]
+
+    type_stats = {}
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        for project, stereotype_frequencies in zip(projects, pool.map(scan_project, json_paths, chunksize=4)):
+            if stereotype_frequencies is None:
+                logger.error(f"JSON file does not exist for project {project}")
+                continue
+            type_stats[project] = stereotype_frequencies
+    return type_stats
@@ -1,17 +1,23 @@
 """
 A script for calculating values from the OntoUML model repository statistics file. This statistics file is
 generated from the RepoScraper.py script.
+
+The statistics are computed by the functions below (on the cached count matrix, see StatsMatrix.get_stats_matrix), so
+they can be used without side effects by other scripts. Running this script (or 'class-analysis' of RunAnalyses.py)
+prints them and stores them as csv files.
 """
 
-import json
+import functools
 import os.path
 
 import pandas as pd
 
-from OntoUmlModelCatalogueScraper.SupportedOntologiesPerTransformationSet import project_c_stereotype_presence
-from util import recursive_dict_sum
+from OntoUmlModelCatalogueScraper.StatsMatrix import REPO_STATS_PATH, get_cached_stereotype_counts, get_derived, \
+    get_project_occurrence_counts, get_projects_with_stereotype, get_stats_matrix, get_stereotype_counts, \
+    get_total_counts, rank
 
-CSV_STORAGE_LOCATION = r"analysis_stats"
+CSV_STORAGE_LOCATION = os.path.join(os.path.dirname(__file__), "analysis_stats")
+STEREOTYPE_GROUP_LOCATION = os.path.dirname(__file__)
 
 
 def store_csv(df, name, **kwargs):
@@ -48,90 +54,74 @@ def p_header(text):
 
 ####### Groups of stereotypes
 
-with open("class-stereotypes-readthedocs.txt") as f:
-    stereotypes_considered_valid_readthedocs = [line.strip() for line in f]
-
-with open("class-stereotypes-metamodel.txt") as f:
-    stereotypes_considered_valid_pi_metamodel = [line.strip() for line in f]
-
-with open("class-stereotypes-ufo-a.txt") as f:\
-    stereotypes_ufo_a = [line.strip() for line in f]
+@functools.cache
+def load_stereotype_group(name) -> tuple:
+    """
+    :param name: Name of the group, i.e. 'readthedocs', 'metamodel' or 'ufo-a'.
+    :return: The stereotypes listed in class-stereotypes-<name>.txt.
+    """
+    with open(os.path.join(STEREOTYPE_GROUP_LOCATION, f"class-stereotypes-{name}.txt")) as f:
+        return tuple(line.strip() for line in f)
 
 ################
 
-with open("repo_stats.json") as f:
-    stats: dict = json.load(f)
-
-    total_counts = recursive_dict_sum(*stats.values())
-    most_frequent_classes = dict(
-        sorted(total_counts['Class'].items(), key=lambda item: (-item[1], item[0].lower()), reverse=False))
-
-    p_header("Number of projects analysed:")
-    n_projects = len(stats)
-    print(n_projects)
 
-    p_header("Average number of classes per project:")
-    # INFO: In the current JSON structure, a class is limited to 1 stereotype, but this might not be the case in the
-    #   future.
-    print(color.YELLOW + "Warning, n_classes is based on the number of stereotypes. See in code documentation for "
-                         "more info." + color.END)
-    n_total_classes = sum(total_counts["Class"].values())
-    print(f"{n_total_classes / n_projects:.2f}  ( calculated by {n_total_classes} / {n_projects})")
+def get_most_frequent_classes(path=REPO_STATS_PATH) -> dict:
+    """
+    :return: Dict with per class stereotype its total number of occurrences, by decreasing number of occurrences.
+    """
+    return get_derived('most_frequent_classes',
+                       lambda matrix: rank(get_total_counts(get_stereotype_counts(matrix, 'Class'))).to_dict(), path)
 
-    p_header("Class stereotypes that do not appear in the repo:")
-    stereotypes_not_in_repo = list(set(stereotypes_considered_valid_pi_metamodel) - set(most_frequent_classes.keys()))
-    stereotypes_not_in_repo.sort(key=lambda item: item.lower())
-    print(stereotypes_not_in_repo)
 
-    p_header("Class stereotypes that do appear in the repo, but not the metamodel:")
-    stereotypes_not_in_metamodel = list(set(most_frequent_classes.keys()) - set(stereotypes_considered_valid_pi_metamodel))
-    stereotypes_not_in_metamodel.sort(key=lambda item: item.lower())
-    print(stereotypes_not_in_metamodel)
+def get_class_stereotype_occurrence_count(path=REPO_STATS_PATH) -> dict:
+    """
+    :return: Dict with per class stereotype the number of projects in which it occurs, by decreasing number of
+    projects.
+    """
+    return get_derived('class_stereotype_occurrence_count',
+                       lambda matrix: rank(get_project_occurrence_counts(
+                           get_stereotype_counts(matrix, 'Class'))).to_dict(), path)
 
-    p_header("Most frequent Class stereotypes:")
-    print(most_frequent_classes)
 
-    p_header("Most frequent Class stereotype appearance in projects:")
-    c_stereotype_occurrence_count = {}
-    for ontology_stats in stats.values():
-        c_stereotypes_in_ontology = ontology_stats['Class'].keys()
-        for stereotype in c_stereotypes_in_ontology:
-            if stereotype in c_stereotype_occurrence_count:
-                c_stereotype_occurrence_count[stereotype] += 1
-            else:
-                c_stereotype_occurrence_count[stereotype] = 1
+def get_stereotypes_not_in_repo(path=REPO_STATS_PATH) -> list:
+    """
+    :return: The class stereotypes of the metamodel that do not appear in the repo.
+    """
+    stereotypes_not_in_repo = list(set(load_stereotype_group('metamodel')) -
+                                   set(get_most_frequent_classes(path).keys()))
+    stereotypes_not_in_repo.sort(key=lambda item: item.lower())
+    return stereotypes_not_in_repo
 
-    c_stereotype_occurrence_count = dict(
-        sorted(c_stereotype_occurrence_count.items(), key=lambda item: (-item[1], item[0].lower()), reverse=False))
-    print(c_stereotype_occurrence_count)
 
-p_header("Projects containing relator but not role: ")
-print([project for project, stereotypes in project_c_stereotype_presence.items() if
-       'relator' in stereotypes and 'role' not in stereotypes])
+def get_stereotypes_not_in_metamodel(path=REPO_STATS_PATH) -> list:
+    """
+    :return: The class stereotypes that do appear in the repo, but not in the metamodel.
+    """
+    stereotypes_not_in_metamodel = list(set(get_most_frequent_classes(path).keys()) -
+                                        set(load_stereotype_group('metamodel')))
+    stereotypes_not_in_metamodel.sort(key=lambda item: item.lower())
+    return stereotypes_not_in_metamodel
 
-p_header("Projects containing role but not relator: ")
-print([project for project, stereotypes in project_c_stereotype_presence.items() if
-       'relator' not in stereotypes and 'role' in stereotypes])
 
-p_header("Projects containing event but not situation: ")
-print([project for project, stereotypes in project_c_stereotype_presence.items() if
-       'situation' not in stereotypes and 'event' in stereotypes])
+def get_projects_with_and_without(with_stereotype, without_stereotype, path=REPO_STATS_PATH):
+    """
+    :return: The projects containing class stereotype with_stereotype, but not class stereotype without_stereotype.
+    """
+    present = get_cached_stereotype_counts('Class', path) > 0
+    return present.index[present[with_stereotype] & ~present[without_stereotype]].to_list()
 
 
-def get_projects_with_stereotype(stereotype, print_result=False, not_in=False):
+def get_projects_with_class_stereotype(stereotype, print_result=False, not_in=False, path=REPO_STATS_PATH):
     """
     Returns a list of projects that contain a specific class stereotype (at least once).
     :param stereotype: Class stereotype to search for.
     :param print_result: Whether to print the found project to system out
     :param not_in: If set to true, all projects in which a Class stereotype does NOT appear will be provided.
+    :param path: Location of the repository statistics file.
     :return: A list of projects containing a specific class stereotype
     """
-    containing_projects = []
-    for project, stereotypes_present in project_c_stereotype_presence.items():
-        if stereotype in stereotypes_present and not not_in:
-            containing_projects.append(project)
-        elif stereotype not in stereotypes_present and not_in:
-            containing_projects.append(project)
+    containing_projects = get_projects_with_stereotype(get_cached_stereotype_counts('Class', path), stereotype, not_in)
 
     if print_result:
         if not not_in:
@@ -142,46 +132,107 @@ def get_projects_with_stereotype(stereotype, print_result=False, not_in=False):
     return containing_projects
 
 
-get_projects_with_stereotype("Goal", True, False)
-get_projects_with_stereotype("collective", True)
-get_projects_with_stereotype("quality", True)
+def get_stereotype_statistics(path=REPO_STATS_PATH) -> pd.DataFrame:
+    """
+    :return: DataFrame with per class stereotype (by decreasing total number of occurrences) the number of projects in
+    which it occurs, its total number of occurrences and whether it is in the groups of valid stereotypes.
+    """
+    most_frequent_classes = get_most_frequent_classes(path)
+    stereotypes_considered_valid_readthedocs = load_stereotype_group('readthedocs')
+    stereotypes_ufo_a = load_stereotype_group('ufo-a')
+
+    # Combine data per stereotype into dataframe
+    df = pd.DataFrame(index=list(most_frequent_classes.keys()))
+    df.insert(0, "class_stereotype_occurs_in_x_projects", pd.Series(get_class_stereotype_occurrence_count(path)))
+    df.insert(1, "class_stereotype_total_freq", pd.Series(most_frequent_classes))
+
+    is_valid_stereotype_series_pi_metamodel = pd.Series(
+        {stereotype: stereotype in stereotypes_considered_valid_readthedocs for stereotype in df.index.to_list()})
+    df.insert(2, "is_valid_stereotype_pi_metamodel", is_valid_stereotype_series_pi_metamodel)
+
+    is_valid_stereotype_series_readthedocs = pd.Series(
+        {stereotype: stereotype in stereotypes_considered_valid_readthedocs for stereotype in df.index.to_list()})
+    df.insert(3, "is_valid_stereotype_readthedocs", is_valid_stereotype_series_readthedocs)
+
+    is_ufo_a_stereotype = pd.Series(
+        {stereotype: stereotype in stereotypes_ufo_a for stereotype in df.index.to_list()})
+    df.insert(4, "is_ufo_a_stereotype", is_ufo_a_stereotype)
+    return df
 
-get_projects_with_stereotype("mode", True)
 
-# Combine data per stereotype into dataframe and write to csv
-df = pd.DataFrame(index=list(most_frequent_classes.keys()))
-df.insert(0, "class_stereotype_occurs_in_x_projects", pd.Series(c_stereotype_occurrence_count))
-df.insert(1, "class_stereotype_total_freq", pd.Series(most_frequent_classes))
+def store_stereotype_statistics(df: pd.DataFrame):
+    """
+    Stores the stereotype statistics, and several top 10s of them, as csv files.
+    :param df: See get_stereotype_statistics.
+    """
+    # CSV with all info
+    store_csv(df, "stereotype_statistics.csv", index_label="class_stereotype")
+
+    # Store top 10 based on project occurrence
+    #   Both all stereotypes and filtered on valid according to the pi metamodel and ufo-a types
+    df = df.sort_values(by="class_stereotype_occurs_in_x_projects", axis=0, ascending=False)
+    store_csv(df.head(10)['class_stereotype_occurs_in_x_projects'], 'top_10_stereotype_project_occurrence.csv',
+              index_label="class_stereotype")
+    store_csv(df.loc[df["is_valid_stereotype_pi_metamodel"] & df['is_ufo_a_stereotype'], 'class_stereotype_occurs_in_x_projects'].head(10),
+              'top_10_stereotype_project_occurrence_valid_pi_and_ufo_a.csv', index_label='class_stereotype')
+
+    # Store top 10 based on total occurrence
+    #   Both all stereotypes and filtered on valid according to the pi metamodel and ufo-a types
+    df = df.sort_values(by="class_stereotype_total_freq", axis=0, ascending=False)
+    store_csv(df.head(10)['class_stereotype_total_freq'], 'top_10_stereotype_total_occurrence.csv',
+              index_label="class_stereotype")
+    store_csv(df.loc[df["is_valid_stereotype_pi_metamodel"] & df['is_ufo_a_stereotype'], 'class_stereotype_total_freq'].head(10),
+              'top_10_stereotype_total_occurrence_valid_pi_and_ufo_a.csv', index_label='class_stereotype')
+
+
+def main(path=REPO_STATS_PATH):
+    """
+    Prints the class stereotype statistics and stores them as csv files.
+    :param path: Location of the repository statistics file.
+    """
+    most_frequent_classes = get_most_frequent_classes(path)
+
+    p_header("Number of projects analysed:")
+    n_projects = len(get_stats_matrix(path))
+    print(n_projects)
+
+    p_header("Average number of classes per project:")
+    # INFO: In the current JSON structure, a class is limited to 1 stereotype, but this might not be the case in the
+    #   future.
+    print(color.YELLOW + "Warning, n_classes is based on the number of stereotypes. See in code documentation for "
+                         "more info." + color.END)
+    n_total_classes = sum(most_frequent_classes.values())
+    print(f"{n_total_classes / n_projects:.2f}  ( calculated by {n_total_classes} / {n_projects})")
+
+    p_header("Class stereotypes that do not appear in the repo:")
+    print(get_stereotypes_not_in_repo(path))
+
+    p_header("Class stereotypes that do appear in the repo, but not the metamodel:")
+    print(get_stereotypes_not_in_metamodel(path))
+
+    p_header("Most frequent Class stereotypes:")
+    print(most_frequent_classes)
+
+    p_header("Most frequent Class stereotype appearance in projects:")
+    print(get_class_stereotype_occurrence_count(path))
 
-is_valid_stereotype_series_pi_metamodel = pd.Series(
-    {stereotype: stereotype in stereotypes_considered_valid_readthedocs for stereotype in df.index.to_list()})
-df.insert(2, "is_valid_stereotype_pi_metamodel", is_valid_stereotype_series_pi_metamodel)
+    p_header("Projects containing relator but not role: ")
+    print(get_projects_with_and_without('relator', 'role', path))
 
-is_valid_stereotype_series_readthedocs = pd.Series(
-    {stereotype: stereotype in stereotypes_considered_valid_readthedocs for stereotype in df.index.to_list()})
-df.insert(3, "is_valid_stereotype_readthedocs", is_valid_stereotype_series_readthedocs)
+    p_header("Projects containing role but not relator: ")
+    print(get_projects_with_and_without('role', 'relator', path))
 
-is_ufo_a_stereotype = pd.Series(
-    {stereotype: stereotype in stereotypes_ufo_a for stereotype in df.index.to_list()})
-df.insert(4, "is_ufo_a_stereotype", is_ufo_a_stereotype)
+    p_header("Projects containing event but not situation: ")
+    print(get_projects_with_and_without('event', 'situation', path))
 
+    get_projects_with_class_stereotype("Goal", True, False, path)
+    get_projects_with_class_stereotype("collective", True, path=path)
+    get_projects_with_class_stereotype("quality", True, path=path)
 
-# CSV with all info
-store_csv(df, "stereotype_statistics.csv", index_label="class_stereotype")
+    get_projects_with_class_stereotype("mode", True, path=path)
 
+    store_stereotype_statistics(get_stereotype_statistics(path))
 
-# Store top 10 based on project occurrence
-#   Both all stereotypes and filtered on valid according to the pi metamodel and ufo-a types
-df.sort_values(by="class_stereotype_occurs_in_x_projects", axis=0, ascending=False, inplace=True)
-store_csv(df.head(10)['class_stereotype_occurs_in_x_projects'], 'top_10_stereotype_project_occurrence.csv',
-          index_label="class_stereotype")
-store_csv(df.loc[df["is_valid_stereotype_pi_metamodel"] & df['is_ufo_a_stereotype'], 'class_stereotype_occurs_in_x_projects'].head(10),
-          'top_10_stereotype_project_occurrence_valid_pi_and_ufo_a.csv', index_label='class_stereotype')
 
-# Store top 10 based on total occurrence
-#   Both all stereotypes and filtered on valid according to the pi metamodel and ufo-a types
-df.sort_values(by="class_stereotype_total_freq", axis=0, ascending=False, inplace=True)
-store_csv(df.head(10)['class_stereotype_total_freq'], 'top_10_stereotype_total_occurrence.csv',
-          index_label="class_stereotype")
-store_csv(df.loc[df["is_valid_stereotype_pi_metamodel"] & df['is_ufo_a_stereotype'], 'class_stereotype_total_freq'].head(10),
-          'top_10_stereotype_total_occurrence_valid_pi_and_ufo_a.csv', index_label='class_stereotype')
+if __name__ == '__main__':
+    main()
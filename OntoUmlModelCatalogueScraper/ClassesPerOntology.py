@@ -2,12 +2,21 @@
 Get the total number of classes present per OntoUML model.
 
 """
-import json
+from OntoUmlModelCatalogueScraper.StatsMatrix import REPO_STATS_PATH, get_derived, get_stereotype_counts
 
 
-with open('repo_stats.json') as f:
-    stats: dict = json.load(f)
+def get_total_number_of_classes(path=REPO_STATS_PATH) -> dict:
+    """
+    :param path: Location of the repository statistics file.
+    :return: Dict with per project the number of classes (i.e. class stereotype occurrences).
+    """
+    return get_derived('total_number_of_classes',
+                       lambda matrix: get_stereotype_counts(matrix, 'Class').sum(axis=1).to_dict(), path)
 
-    total_number_of_classes = {model_name: sum(stat['Class'].values()) for model_name, stat in stats.items()}
 
-    print(total_number_of_classes)
+def main(path=REPO_STATS_PATH):
+    print(get_total_number_of_classes(path))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,17 @@
 """
 A script for calculating values from the OntoUML model repository statistics file. This statistics file is
 generated from the RepoScraper.py script.
+
+The statistics are computed by the functions below (on the cached count matrix, see StatsMatrix.get_stats_matrix), so
+they can be used without side effects by other scripts. Running this script (or 'relation-analysis' of RunAnalyses.py)
+prints them.
 """
 
-import json
 import os.path
 
-import pandas as pd
-from util import recursive_dict_sum
+from OntoUmlModelCatalogueScraper.StatsMatrix import REPO_STATS_PATH, get_cached_stereotype_counts, get_derived, \
+    get_project_occurrence_counts, get_projects_with_stereotype, get_stats_matrix, get_stereotype_counts, \
+    get_total_counts, rank
 
 CSV_STORAGE_LOCATION = r"csv_files"
 
@@ -44,57 +48,36 @@ def p_header(text):
     print(color.BLUE + text + color.END)
 
 
-with open("repo_stats.json") as f:
-    stats: dict = json.load(f)
-
-    for key, val in stats.items():
-        if 'Relation' not in val:
-            val['Relation'] = {}
-
-    total_counts = recursive_dict_sum(*stats.values())
-    most_frequent_relations = dict(
-        sorted(total_counts['Relation'].items(), key=lambda item: (-item[1], item[0].lower()), reverse=False))
-
-    p_header("Number of projects analysed:")
-    n_projects = len(stats)
-    print(n_projects)
-
-    p_header("Most frequent Relation stereotypes:")
-    print(most_frequent_relations)
-
-    p_header("Most frequent Relation stereotype appearance in projects:")
-    r_stereotype_occurrence_count = {}
-    for ontology_stats in stats.values():
-        r_stereotypes_in_ontology = ontology_stats['Relation'].keys()
-        for stereotype in r_stereotypes_in_ontology:
-            if stereotype in r_stereotype_occurrence_count:
-                r_stereotype_occurrence_count[stereotype] += 1
-            else:
-                r_stereotype_occurrence_count[stereotype] = 1
-
-    c_stereotype_occurrence_count = dict(
-        sorted(r_stereotype_occurrence_count.items(), key=lambda item: (-item[1], item[0].lower()), reverse=False))
-    print(c_stereotype_occurrence_count)
+def get_most_frequent_relations(path=REPO_STATS_PATH) -> dict:
+    """
+    :return: Dict with per relation stereotype its total number of occurrences, by decreasing number of occurrences.
+    """
+    # Projects without relations have no counts for any relation stereotype
+    return get_derived('most_frequent_relations',
+                       lambda matrix: rank(get_total_counts(get_stereotype_counts(matrix, 'Relation'))).to_dict(), path)
 
 
-# For each project, which relation stereotypes occurs in them
-project_r_stereotype_presence = {project: set(stats[project]['Relation'].keys()) for project in stats.keys()}
+def get_relation_stereotype_occurrence_count(path=REPO_STATS_PATH) -> dict:
+    """
+    :return: Dict with per relation stereotype the number of projects in which it occurs, by decreasing number of
+    projects.
+    """
+    return get_derived('relation_stereotype_occurrence_count',
+                       lambda matrix: rank(get_project_occurrence_counts(
+                           get_stereotype_counts(matrix, 'Relation'))).to_dict(), path)
 
 
-def get_projects_with_stereotype(stereotype, print_result=False, not_in=False):
+def get_projects_with_relation_stereotype(stereotype, print_result=False, not_in=False, path=REPO_STATS_PATH):
     """
-    Returns a list of projects that contain a specific class stereotype (at least once).
-    :param stereotype: Class stereotype to search for.
+    Returns a list of projects that contain a specific relation stereotype (at least once).
+    :param stereotype: Relation stereotype to search for.
     :param print_result: Whether to print the found project to system out
-    :param not_in: If set to true, all projects in which a Class stereotype does NOT appear will be provided.
-    :return: A list of projects containing a specific class stereotype
+    :param not_in: If set to true, all projects in which a Relation stereotype does NOT appear will be provided.
+    :param path: Location of the repository statistics file.
+    :return: A list of projects containing a specific relation stereotype
     """
-    containing_projects = []
-    for project, stereotypes_present in project_r_stereotype_presence.items():
-        if stereotype in stereotypes_present and not not_in:
-            containing_projects.append(project)
-        elif stereotype not in stereotypes_present and not_in:
-            containing_projects.append(project)
+    containing_projects = get_projects_with_stereotype(get_cached_stereotype_counts('Relation', path), stereotype,
+                                                       not_in)
 
     if print_result:
         if not not_in:
@@ -105,4 +88,23 @@ def get_projects_with_stereotype(stereotype, print_result=False, not_in=False):
     return containing_projects
 
 
-get_projects_with_stereotype("derivation", True, False)
+def main(path=REPO_STATS_PATH):
+    """
+    Prints the relation stereotype statistics.
+    :param path: Location of the repository statistics file.
+    """
+    p_header("Number of projects analysed:")
+    n_projects = len(get_stats_matrix(path))
+    print(n_projects)
+
+    p_header("Most frequent Relation stereotypes:")
+    print(get_most_frequent_relations(path))
+
+    p_header("Most frequent Relation stereotype appearance in projects:")
+    print(get_relation_stereotype_occurrence_count(path))
+
+    get_projects_with_relation_stereotype("derivation", True, False, path)
+
+
+if __name__ == '__main__':
+    main()
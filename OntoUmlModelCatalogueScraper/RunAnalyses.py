@@ -0,0 +1,70 @@
+"""\
+Command line entry point that runs selected analyses of the repository statistics file in a single process.
+
+The statistics file is parsed once (see StatsMatrix.get_stats_matrix) and shared by the analyses, and values derived
+from it (such as the bitmask index of the class stereotypes) are computed once. The modules of the analyses, and with
+them pandas, are only imported when an analysis is run.
+"""
+
+import argparse
+import importlib
+import os
+import time
+
+# Analysis -> (module with a main(path) function, description)
+ANALYSES = {
+    'class-analysis': ('OntoUmlModelCatalogueScraper.ClassAnalysis',
+                       "Statistics on the class stereotypes, also stored in analysis_stats."),
+    'relation-analysis': ('OntoUmlModelCatalogueScraper.RelationAnalysis',
+                          "Statistics on the relation stereotypes."),
+    'classes-per-ontology': ('OntoUmlModelCatalogueScraper.ClassesPerOntology',
+                             "Number of classes in each OntoUML model."),
+    'supported-ontologies': ('OntoUmlModelCatalogueScraper.SupportedOntologiesPerTransformationSet',
+                             "Number of supported models after each stereotype of the top 10 orderings."),
+    'support-curve': ('OntoUmlModelCatalogueScraper.StereotypeSetSolver',
+                      "Class stereotypes that support the most models, also stored in analysis_stats."),
+}
+
+# Same as StatsMatrix.REPO_STATS_PATH, which is not imported to keep the start-up fast
+DEFAULT_STATS_PATH = os.path.join(os.path.dirname(__file__), "repo_stats.json")
+
+
+def run_analyses(analyses, path=DEFAULT_STATS_PATH, use_snapshot=True, print_timing=False):
+    """
+    Runs analyses on the repository statistics, in the given order.
+    :param analyses: Names of the analyses, see ANALYSES.
+    :param path: Location of the repository statistics file.
+    :param use_snapshot: Whether to load the statistics from (and store them in) a binary snapshot, see
+    StatsMatrix.get_stats_matrix.
+    :param print_timing: Whether to print the time taken by loading the statistics and by each analysis.
+    """
+    start = time.perf_counter()
+    from OntoUmlModelCatalogueScraper.StatsMatrix import get_stats_matrix
+    get_stats_matrix(path, use_snapshot)
+    if print_timing:
+        print(f"Loaded the statistics in {time.perf_counter() - start:.3f} s")
+
+    for analysis in analyses:
+        module_name, _ = ANALYSES[analysis]
+        if len(analyses) > 1:
+            print(f"===== {analysis}")
+        start = time.perf_counter()
+        importlib.import_module(module_name).main(path=path)
+        if print_timing:
+            print(f"Ran {analysis} in {time.perf_counter() - start:.3f} s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Run analyses of the repository statistics file (generated by RepoScraper.py).",
+        epilog="Analyses: " + "; ".join(f"{name}: {description}" for name, (_, description) in ANALYSES.items()))
+    parser.add_argument('analyses', nargs='*', metavar='ANALYSIS', help="Analyses to run, default is all analyses.")
+    parser.add_argument('--stats', default=DEFAULT_STATS_PATH, help="Location of the repository statistics file.")
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help="Always parse the statistics file, instead of loading an up-to-date binary snapshot.")
+    parser.add_argument('--timing', action='store_true', help="Print the time taken by each analysis.")
+    args = parser.parse_args()
+    if unknown_analyses := [analysis for analysis in args.analyses if analysis not in ANALYSES]:
+        parser.error(f"unknown analyses {unknown_analyses}, choose from {list(ANALYSES)}")
+
+    run_analyses(args.analyses or list(ANALYSES), args.stats, not args.no_snapshot, args.timing)
@@ -0,0 +1,203 @@
+"""\
+Loads the repository statistics file (generated by RepoScraper.py) as a count matrix with a row per project and a column
+per (type, stereotype), on which the analysis scripts compute totals, presence counts and rankings with vectorised
+operations instead of loops over the nested dicts.
+
+get_stats_matrix caches the matrix (and values derived from it) per process, so several analyses in one process parse
+the statistics file only once. The cache is invalidated when the file changes. Optionally, the matrix is also stored as a
+binary snapshot next to the statistics file, which is much faster to load than the JSON file in a new process.
+"""
+
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+REPO_STATS_PATH = os.path.join(os.path.dirname(__file__), "repo_stats.json")
+SNAPSHOT_EXTENSION = ".pickle"
+
+# Absolute path of a statistics file -> (signature of the file, count matrix, name -> value derived from the matrix)
+_cache = {}
+
+
+def stats_to_matrix(stats: dict) -> pd.DataFrame:
+    """
+    Converts repository statistics to a count matrix.
+    :param stats: Dict with structure Project -> Type -> Stereotype -> Count.
+    :return: DataFrame with the projects as index (in the order of stats), a column per (type, stereotype) and the
+    counts as values (0 if a stereotype does not occur in a project). Types and the stereotypes of a type are ordered
+    by their first occurrence in stats, i.e. the same order as recursive_dict_sum(*stats.values()).
+    """
+    # Type -> Stereotype -> column index, in order of first occurrence
+    columns_per_type = {}
+    for project_stats in stats.values():
+        for type, stereotype_counts in project_stats.items():
+            type_columns = columns_per_type.setdefault(type, {})
+            for stereotype in stereotype_counts:
+                type_columns.setdefault(stereotype, None)
+    columns = [(type, stereotype) for type, type_columns in columns_per_type.items() for stereotype in type_columns]
+    column_indices = {column: index for index, column in enumerate(columns)}
+
+    rows, column_positions, values = [], [], []
+    for row, project_stats in enumerate(stats.values()):
+        for type, stereotype_counts in project_stats.items():
+            for stereotype, count in stereotype_counts.items():
+                rows.append(row)
+                column_positions.append(column_indices[(type, stereotype)])
+                values.append(count)
+
+    counts = np.zeros((len(stats), len(columns)), dtype=np.int64)
+    counts[rows, column_positions] = values
+    return pd.DataFrame(counts, index=pd.Index(list(stats.keys()), name='project'),
+                        columns=pd.MultiIndex.from_tuples(columns, names=['type', 'stereotype']))
+
+
+def load_stats_matrix(path=REPO_STATS_PATH) -> pd.DataFrame:
+    """
+    :param path: Location of the repository statistics file.
+    :return: The count matrix of the repository statistics, see stats_to_matrix.
+    """
+    with open(path) as f:
+        return stats_to_matrix(json.load(f))
+
+
+def _get_file_signature(path):
+    """
+    :return: Modification time and size of a file, which change when the file is rewritten.
+    """
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load_snapshot(snapshot_path, signature):
+    """
+    :return: The count matrix stored in the snapshot, or None if there is no snapshot of the current statistics file.
+    """
+    try:
+        with open(snapshot_path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if snapshot.get('signature') != signature:
+        return None
+    return pd.DataFrame(snapshot['counts'].astype(np.int64), index=pd.Index(snapshot['projects'], name='project'),
+                        columns=pd.MultiIndex.from_tuples(snapshot['columns'], names=['type', 'stereotype']))
+
+
+def _store_snapshot(snapshot_path, signature, matrix: pd.DataFrame):
+    """
+    Stores the count matrix as plain lists and an array of the smallest integer type that fits the counts.
+    """
+    counts = matrix.to_numpy()
+    snapshot = {'signature': signature, 'projects': matrix.index.to_list(), 'columns': matrix.columns.to_list(),
+                'counts': counts.astype(np.min_scalar_type(counts.max(initial=0)))}
+    with open(snapshot_path, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def get_stats_matrix(path=REPO_STATS_PATH, use_snapshot=False) -> pd.DataFrame:
+    """
+    Cached version of load_stats_matrix: the file is parsed once per process, and again only after it has changed. The
+    returned matrix is shared, so it should not be modified.
+    :param path: Location of the repository statistics file.
+    :param use_snapshot: Whether to load the matrix from a binary snapshot (next to the statistics file, with extension
+    SNAPSHOT_EXTENSION) if it is up-to-date, and to (re)write the snapshot otherwise.
+    :return: The count matrix of the repository statistics, see stats_to_matrix.
+    """
+    path = os.path.abspath(path)
+    signature = _get_file_signature(path)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    matrix = None
+    snapshot_path = os.path.splitext(path)[0] + SNAPSHOT_EXTENSION
+    if use_snapshot:
+        matrix = _load_snapshot(snapshot_path, signature)
+    if matrix is None:
+        matrix = load_stats_matrix(path)
+        if use_snapshot:
+            _store_snapshot(snapshot_path, signature, matrix)
+
+    _cache[path] = (signature, matrix, {})
+    return matrix
+
+
+def get_derived(name, compute, path=REPO_STATS_PATH, use_snapshot=False):
+    """
+    Computes a value from the count matrix once, and returns the cached value afterwards (until the statistics file
+    changes).
+    :param name: Name under which the value is cached.
+    :param compute: Function that computes the value from the count matrix.
+    :param path: Location of the repository statistics file.
+    :param use_snapshot: See get_stats_matrix.
+    :return: The (cached) value.
+    """
+    matrix = get_stats_matrix(path, use_snapshot)
+    derived = _cache[os.path.abspath(path)][2]
+    if name not in derived:
+        derived[name] = compute(matrix)
+    return derived[name]
+
+
+def get_cached_stereotype_counts(type: str, path=REPO_STATS_PATH) -> pd.DataFrame:
+    """
+    :return: get_stereotype_counts of the cached count matrix of the statistics file at path.
+    """
+    return get_derived(('stereotype_counts', type), lambda matrix: get_stereotype_counts(matrix, type), path)
+
+
+def get_stereotype_counts(matrix: pd.DataFrame, type: str) -> pd.DataFrame:
+    """
+    :param matrix: Count matrix, see stats_to_matrix.
+    :param type: OntoUML type, e.g. 'Class' or 'Relation'.
+    :return: DataFrame with a row per project and a column per stereotype of the type (no columns if the type does not
+    occur).
+    """
+    if type not in matrix.columns.get_level_values('type'):
+        return pd.DataFrame(index=matrix.index, columns=pd.Index([], name='stereotype'), dtype=np.int64)
+    return matrix[type]
+
+
+def get_total_counts(stereotype_counts: pd.DataFrame) -> pd.Series:
+    """
+    :param stereotype_counts: See get_stereotype_counts.
+    :return: Series with per stereotype its total number of occurrences in all projects.
+    """
+    return stereotype_counts.sum(axis=0)
+
+
+def get_project_occurrence_counts(stereotype_counts: pd.DataFrame) -> pd.Series:
+    """
+    :param stereotype_counts: See get_stereotype_counts.
+    :return: Series with per stereotype the number of projects in which it occurs.
+    """
+    return (stereotype_counts > 0).sum(axis=0)
+
+
+def rank(series: pd.Series) -> pd.Series:
+    """
+    Sorts a series of counts by decreasing count, and by name (case-insensitive) for equal counts. Ties that remain keep
+    their original order.
+    :param series: Series with stereotypes as index and counts as values.
+    :return: The sorted series.
+    """
+    order = np.lexsort((series.index.str.lower().to_numpy(), -series.to_numpy()))
+    return series.iloc[order]
+
+
+def get_projects_with_stereotype(stereotype_counts: pd.DataFrame, stereotype, not_in=False) -> list:
+    """
+    :param stereotype_counts: See get_stereotype_counts.
+    :param stereotype: Stereotype to search for.
+    :param not_in: If set to true, the projects in which the stereotype does NOT appear are returned.
+    :return: A list of the projects containing the stereotype (at least once), in the order of the matrix.
+    """
+    if stereotype in stereotype_counts.columns:
+        present = stereotype_counts[stereotype].to_numpy() > 0
+    else:
+        present = np.zeros(len(stereotype_counts), dtype=bool)
+    return stereotype_counts.index[present != not_in].to_list()
+
@@ -0,0 +1,102 @@
+"""\
+Index of the stereotypes present in each project as bitmasks, for fast subset queries over all projects at once.
+"""
+
+import numpy as np
+import pandas as pd
+
+from OntoUmlModelCatalogueScraper.StatsMatrix import REPO_STATS_PATH, get_derived, get_stereotype_counts
+
+WORD_SIZE = 64
+
+
+class StereotypeBitmaskIndex:
+    """
+    Encodes the stereotypes present in each project as a bitmask, with a bit per stereotype. A bitmask is stored as a
+    row of 64-bit words, so any number of stereotypes is supported.
+
+    A project is supported by a set of stereotypes if it contains no stereotype outside the set, i.e. if its bitmask
+    without the bits of the set is zero.
+    """
+
+    def __init__(self, stereotype_counts: pd.DataFrame):
+        """
+        :param stereotype_counts: DataFrame with a row per project and a column per stereotype, with the number of
+        occurrences as values (see StatsMatrix.get_stereotype_counts).
+        """
+        self.projects = stereotype_counts.index
+        self.stereotypes = list(stereotype_counts.columns)
+        self.stereotype_positions = {stereotype: position for position, stereotype in enumerate(self.stereotypes)}
+        self.n_words = max(1, -(-len(self.stereotypes) // WORD_SIZE))
+
+        # The presence of the stereotypes padded to whole words, so the bits of a word can be packed at once
+        present = np.zeros((len(self.projects), self.n_words * WORD_SIZE), dtype=np.uint64)
+        present[:, :len(self.stereotypes)] = stereotype_counts.to_numpy() > 0
+        bit_values = np.left_shift(np.uint64(1), np.arange(WORD_SIZE, dtype=np.uint64))
+        # Project x word x bit -> project x word
+        self.project_masks = (present.reshape(len(self.projects), self.n_words, WORD_SIZE) * bit_values).sum(
+            axis=2, dtype=np.uint64)
+
+    def get_mask(self, stereotypes) -> np.ndarray:
+        """
+        :param stereotypes: Stereotypes to include in the mask. Stereotypes that are not in the index are ignored, as
+        no project contains them.
+        :return: Bitmask (array of words) of the stereotypes.
+        """
+        mask = np.zeros(self.n_words, dtype=np.uint64)
+        for stereotype in stereotypes:
+            if (position := self.stereotype_positions.get(stereotype)) is not None:
+                mask[position // WORD_SIZE] |= np.uint64(1) << np.uint64(position % WORD_SIZE)
+        return mask
+
+    def get_supported(self, stereotypes) -> np.ndarray:
+        """
+        :param stereotypes: Set (or list) of stereotypes.
+        :return: Boolean array with per project whether all of its stereotypes are in stereotypes.
+        """
+        return ~(self.project_masks & ~self.get_mask(stereotypes)).any(axis=1)
+
+    def get_supported_projects(self, stereotypes) -> list:
+        """
+        :param stereotypes: Set (or list) of stereotypes.
+        :return: The projects of which all stereotypes are in stereotypes, in the order of the index.
+        """
+        return self.projects[self.get_supported(stereotypes)].to_list()
+
+    def get_cumulative_support(self, ordering) -> list[int]:
+        """
+        Computes the number of supported projects for each prefix of an ordering of stereotypes, i.e. when the
+        stereotypes are supported one by one in that order. The prefix mask is extended by one stereotype at a time,
+        and only the word of that stereotype is updated.
+        :param ordering: List of stereotypes.
+        :return: List with for each prefix of the ordering the number of supported projects.
+        """
+        # Per project, the bits of its stereotypes that are not supported yet, and the number of words with such bits
+        missing = self.project_masks.copy()
+        n_missing_words = np.count_nonzero(missing, axis=1)
+        n_supported = int(np.count_nonzero(n_missing_words == 0))
+
+        cumulative_support = []
+        for stereotype in ordering:
+            position = self.stereotype_positions.get(stereotype)
+            if position is not None:
+                word = position // WORD_SIZE
+                bit = np.uint64(1) << np.uint64(position % WORD_SIZE)
+                # Projects for which this stereotype was the last missing one of the word
+                completes_word = missing[:, word] == bit
+                missing[:, word] &= ~bit
+                n_missing_words[completes_word] -= 1
+                n_supported += int(np.count_nonzero(n_missing_words[completes_word] == 0))
+            cumulative_support.append(n_supported)
+        return cumulative_support
+
+
+def get_cached_stereotype_index(type: str, path=REPO_STATS_PATH) -> StereotypeBitmaskIndex:
+    """
+    :param type: OntoUML type, e.g. 'Class' or 'Relation'.
+    :param path: Location of the repository statistics file.
+    :return: Index of the stereotypes of the type, built once from the cached count matrix (see
+    StatsMatrix.get_derived).
+    """
+    return get_derived(('stereotype_index', type),
+                       lambda matrix: StereotypeBitmaskIndex(get_stereotype_counts(matrix, type)), path)
@@ -0,0 +1,212 @@
+"""\
+Searches for the set of k stereotypes that supports the most projects, i.e. the k stereotypes a transformation should
+support to be able to transform as many projects as possible, and the order in which to implement them.
+"""
+
+import argparse
+import os
+
+import pandas as pd
+
+from OntoUmlModelCatalogueScraper.StatsMatrix import REPO_STATS_PATH, get_stats_matrix
+from OntoUmlModelCatalogueScraper.StereotypeBitmaskIndex import StereotypeBitmaskIndex, WORD_SIZE, \
+    get_cached_stereotype_index
+
+SUPPORT_CURVE_PATH = os.path.join(os.path.dirname(__file__), 'analysis_stats', 'stereotype_support_curve.csv')
+
+class StereotypeSetSolver:
+    """
+    Solves: given a budget k, which k stereotypes support the most projects (a project is supported if all of its
+    stereotypes are supported)? Adding a single stereotype often supports no additional project by itself, as projects
+    need several stereotypes, so the number of supported projects is not submodular: a greedy search on the gain of
+    single stereotypes stalls, and lazy (CELF-style) evaluation of such gains is not valid.
+
+    The greedy search therefore looks at the stereotypes missing for each unsupported project (its 'bundle'): it picks
+    the bundle that supports the most projects per missing stereotype, and adds the stereotype of that bundle which
+    occurs in the most unsupported projects. The exact search is a branch and bound over the stereotypes, for small k.
+    """
+
+    def __init__(self, index: StereotypeBitmaskIndex):
+        """
+        :param index: Index of the stereotypes present in each project.
+        """
+        self.index = index
+        self.stereotypes = index.stereotypes
+        # Per project, its bitmask as a single (arbitrary precision) integer
+        self.project_masks = [sum(int(word) << (WORD_SIZE * position) for position, word in enumerate(words))
+                              for words in index.project_masks]
+
+    @staticmethod
+    def __get_positions(mask):
+        """
+        :return: The positions of the bits set in mask, from low to high.
+        """
+        positions = []
+        while mask:
+            lowest_bit = mask & -mask
+            positions.append(lowest_bit.bit_length() - 1)
+            mask ^= lowest_bit
+        return positions
+
+    def solve_greedy(self, k=None) -> list:
+        """
+        Greedily adds stereotypes, see the class documentation.
+        :param k: Number of stereotypes to select, None to continue until all projects are supported.
+        :return: The selected stereotypes, in the order in which they were selected. The first k' stereotypes are the
+        greedy solution for budget k'.
+        """
+        k = len(self.stereotypes) if k is None else min(k, len(self.stereotypes))
+        # Projects with the same stereotypes are evaluated once
+        n_projects_per_mask = {}
+        for mask in self.project_masks:
+            n_projects_per_mask[mask] = n_projects_per_mask.get(mask, 0) + 1
+
+        selected_mask = 0
+        ordering = []
+        while len(ordering) < k:
+            unsupported = [(mask, n_projects) for mask, n_projects in n_projects_per_mask.items()
+                           if mask & ~selected_mask]
+            if not unsupported:
+                break
+            best_bundle, best_score = None, None
+            for bundle_mask, _ in unsupported:
+                supported_mask = selected_mask | bundle_mask
+                gain = sum(n_projects for mask, n_projects in unsupported if mask & ~supported_mask == 0)
+                n_missing = (bundle_mask & ~selected_mask).bit_count()
+                # Exact comparison of gain / n_missing, then the largest gain; the mask makes ties deterministic
+                score = (gain / n_missing, gain, -bundle_mask)
+                if best_score is None or score > best_score:
+                    best_bundle, best_score = bundle_mask, score
+
+            def get_n_unsupported_projects_with(position):
+                return sum(n_projects for mask, n_projects in unsupported if mask >> position & 1)
+
+            position = max(self.__get_positions(best_bundle & ~selected_mask),
+                           key=lambda position: (get_n_unsupported_projects_with(position), -position))
+            selected_mask |= 1 << position
+            ordering.append(self.stereotypes[position])
+        return ordering
+
+    def solve_exact(self, k) -> tuple[list, int]:
+        """
+        Finds the k stereotypes that support the most projects with a branch and bound over the stereotypes. The
+        stereotypes are branched on in order of the number of projects containing them (include first). A branch is
+        pruned if it cannot beat the best solution so far, by the smallest of two upper bounds on the number of projects
+        it can support:
+        - the projects that contain no excluded stereotype and miss at most the remaining budget of stereotypes;
+        - the supported projects plus, as each of the other such projects needs its rarest missing stereotype, the sum
+          of the largest remaining budget number of counts of projects per rarest missing stereotype.
+        :param k: Number of stereotypes to select. The search time grows quickly with k.
+        :return: Tuple of the selected stereotypes (ordered as in the index, possibly fewer than k if more are not
+        needed) and the number of supported projects.
+        """
+        # Projects with more than k stereotypes can never be supported
+        always_supported = sum(1 for mask in self.project_masks if mask == 0)
+        eligible_masks = [mask for mask in self.project_masks if 0 < mask.bit_count() <= k]
+        n_projects_per_position = {}
+        for mask in eligible_masks:
+            for position in self.__get_positions(mask):
+                n_projects_per_position[position] = n_projects_per_position.get(position, 0) + 1
+        candidates = sorted(n_projects_per_position,
+                            key=lambda position: (-n_projects_per_position[position], position))
+        # The search works on masks with bit i for candidates[i], so the highest missing bit is the rarest stereotype
+        candidate_indices = {position: index for index, position in enumerate(candidates)}
+        projects = [sum(1 << candidate_indices[position] for position in self.__get_positions(mask))
+                    for mask in eligible_masks]
+
+        # The greedy solution is the initial lower bound
+        best_mask = 0
+        for stereotype in self.solve_greedy(k):
+            if (position := self.index.stereotype_positions[stereotype]) in candidate_indices:
+                best_mask |= 1 << candidate_indices[position]
+        best_n_supported = sum(1 for mask in projects if mask & ~best_mask == 0)
+
+        def search(candidate_index, selected_mask, n_selected, excluded_mask):
+            nonlocal best_mask, best_n_supported
+            remaining_budget = k - n_selected
+            n_supported = 0
+            n_supportable = 0
+            n_projects_per_rarest_missing = {}
+            for mask in projects:
+                if mask & excluded_mask:
+                    continue
+                missing = mask & ~selected_mask
+                if missing == 0:
+                    n_supported += 1
+                elif missing.bit_count() <= remaining_budget:
+                    n_supportable += 1
+                    rarest_missing = missing.bit_length()
+                    n_projects_per_rarest_missing[rarest_missing] = \
+                        n_projects_per_rarest_missing.get(rarest_missing, 0) + 1
+            if n_supported > best_n_supported:
+                best_mask, best_n_supported = selected_mask, n_supported
+            if remaining_budget == 0 or candidate_index == len(candidates) or n_supportable == 0:
+                return
+            bound = n_supported + min(n_supportable, sum(
+                sorted(n_projects_per_rarest_missing.values(), reverse=True)[:remaining_budget]))
+            if bound <= best_n_supported:
+                return
+            bit = 1 << candidate_index
+            search(candidate_index + 1, selected_mask | bit, n_selected + 1, excluded_mask)
+            search(candidate_index + 1, selected_mask, n_selected, excluded_mask | bit)
+
+        search(0, 0, 0, 0)
+        selected = sorted(candidates[index] for index in self.__get_positions(best_mask))
+        return [self.stereotypes[position] for position in selected], best_n_supported + always_supported
+
+    def get_support_curve(self, max_k=None, exact_up_to_k=0) -> pd.DataFrame:
+        """
+        Computes the number of supported projects for every budget k, by the greedy implementation order and, for small
+        k, by the exact search.
+        :param max_k: Largest budget, None for all stereotypes.
+        :param exact_up_to_k: Largest budget for which the exact search is performed.
+        :return: DataFrame indexed by k with the stereotype added by the greedy order, the number of projects supported
+        by the first k stereotypes of that order, and (up to exact_up_to_k) the optimal number of supported projects and
+        an optimal set of stereotypes.
+        """
+        ordering = self.solve_greedy(max_k)
+        curve = pd.DataFrame({'greedy_stereotype': ordering,
+                              'greedy_n_supported': self.index.get_cumulative_support(ordering)},
+                             index=pd.RangeIndex(1, len(ordering) + 1, name='k'))
+        if exact_up_to_k > 0:
+            curve['optimal_n_supported'] = None
+            curve['optimal_stereotypes'] = None
+            for k in range(1, min(exact_up_to_k, len(ordering)) + 1):
+                selected, n_supported = self.solve_exact(k)
+                curve.loc[k, 'optimal_n_supported'] = n_supported
+                curve.loc[k, 'optimal_stereotypes'] = ', '.join(map(str, selected))
+        return curve
+
+
+def main(max_k=None, exact_up_to=35, include_relations=False, output=SUPPORT_CURVE_PATH, path=REPO_STATS_PATH):
+    """
+    Prints the support curve of the stereotypes (see StereotypeSetSolver.get_support_curve) and stores it as a csv
+    file. See the command line arguments below for the parameters.
+    """
+    if include_relations:
+        stats_matrix = get_stats_matrix(path)
+        index = StereotypeBitmaskIndex(
+            stats_matrix.loc[:, stats_matrix.columns.get_level_values('type').isin(['Class', 'Relation'])])
+    else:
+        index = get_cached_stereotype_index('Class', path)
+
+    support_curve = StereotypeSetSolver(index).get_support_curve(max_k, exact_up_to)
+    with pd.option_context('display.max_rows', None, 'display.width', 200, 'display.max_colwidth', 80):
+        print(support_curve)
+    support_curve.to_csv(output)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Search for the stereotypes that support the most projects.")
+    parser.add_argument('--max-k', type=int, help="Largest number of stereotypes, default is all stereotypes.")
+    parser.add_argument('--exact-up-to', type=int, default=35, metavar='K',
+                        help="Largest number of stereotypes for which the optimal set is searched exactly. For the "
+                             "class stereotypes of the catalogue this takes milliseconds per k up to k=35, but up to "
+                             "seconds per k beyond.")
+    parser.add_argument('--include-relations', action='store_true',
+                        help="Select relation stereotypes as well, i.e. a project is only supported if all of its "
+                             "class and relation stereotypes are supported.")
+    parser.add_argument('--output', default=SUPPORT_CURVE_PATH, help="CSV file to write the curve to.")
+    args = parser.parse_args()
+
+    main(args.max_k, args.exact_up_to, args.include_relations, args.output)
@@ -1,5 +1,6 @@
 #  Copyright (c) 2024.
-import json
+from OntoUmlModelCatalogueScraper.StatsMatrix import REPO_STATS_PATH
+from OntoUmlModelCatalogueScraper.StereotypeBitmaskIndex import get_cached_stereotype_index
 
 
 class color:
@@ -27,36 +28,27 @@ def p_header(text):
     print(color.BLUE + text + color.END)
 
 
-with open("repo_stats.json") as f:
-    stats: dict = json.load(f)
-
-# For each project, which class stereotypes occurs in them
-project_c_stereotype_presence = {project: set(stats[project]['Class'].keys()) for project in stats.keys()}
-
-
-def project_stereotypes_is_subset(stereotype_set: set | list, print_result=False):
+def project_stereotypes_is_subset(stereotype_set: set | list, print_result=False, path=REPO_STATS_PATH):
     """
     Returns a list of projects of which the stereotypes are a subset of the set provided.
     I.e., all projects containing the same or fewer stereotypes as stereotype_set.
     :param stereotype_set:
     :param print_result:
+    :param path: Location of the repository statistics file.
     :return:
     """
-    matching_projects = []
-    for project, stereotypes_present in project_c_stereotype_presence.items():
-        if stereotypes_present <= set(stereotype_set):
-            matching_projects.append(project)
+    # For each project, which class stereotypes occurs in them
+    matching_projects = get_cached_stereotype_index('Class', path).get_supported_projects(stereotype_set)
     if print_result:
         p_header(f"Projects that contain no more than the stereotypes [{stereotype_set}]:")
         print(f"Projects found = {len(matching_projects)}, namely: ")
         print(matching_projects)
     return matching_projects
 
-def get_sequence_of_num_supported(types_ordered: list, print_result=False):
-    cumulative_supported_models = dict()
-    for i in range(len(types_ordered)):
-        num_supported_models = len(project_stereotypes_is_subset(types_ordered[:i + 1]))
-        cumulative_supported_models[types_ordered[i]] = num_supported_models
+def get_sequence_of_num_supported(types_ordered: list, print_result=False, path=REPO_STATS_PATH):
+    cumulative_supported_models = dict(zip(types_ordered,
+                                           get_cached_stereotype_index('Class', path).get_cumulative_support(
+                                               types_ordered)))
 
     print(cumulative_supported_models)
 
@@ -66,5 +58,11 @@ top_10_occurrence_project = ['kind', 'relator', 'role', 'subkind', 'category', '
 top_10_total_occurrence = ['subkind', 'role', 'kind', 'relator', 'category', 'roleMixin', 'mode', 'phase', 'quality',
                            'collective']
 
-get_sequence_of_num_supported(top_10_occurrence_project)
-get_sequence_of_num_supported(top_10_total_occurrence)
+
+def main(path=REPO_STATS_PATH):
+    get_sequence_of_num_supported(top_10_occurrence_project, path=path)
+    get_sequence_of_num_supported(top_10_total_occurrence, path=path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import io
+import json
+import os
+
+from OntoUmlModelCatalogueScraper.CatalogueScan import JsonTokenizer, scan_catalogue, scan_stereotype_frequencies
+from OntoUmlModelCatalogueScraper.util import get_contents_stereotype_frequencies
+
+MODEL_JSONS_PATH = os.path.join(os.path.dirname(__file__), '..', 'modelJsons')
+
+
+class TestCatalogueScan:
+
+    def test_same_counts_as_loading_the_json(self):
+        for file_name in os.listdir(MODEL_JSONS_PATH):
+            with open(os.path.join(MODEL_JSONS_PATH, file_name), 'rb') as f:
+                content = f.read()
+            # Not all files are UTF-8 encoded
+            expected = get_contents_stereotype_frequencies(json.loads(content.decode('latin-1'))['model']['contents'])
+
+            # Small chunks, so tokens are split over chunks
+            result = scan_stereotype_frequencies(io.BytesIO(content), chunk_size=7)
+
+            # Including the order of the keys
+            assert json.dumps(result) == json.dumps(expected), file_name
+
+    def test_only_counts_contents_of_model_and_packages(self):
+        ontology = {
+            'diagrams': [{'contents': [{'type': 'ClassView', 'stereotype': 'kind'}]}],
+            'model': {'type': 'Package', 'contents': [
+                {'type': 'Class', 'stereotype': 'kind', 'properties': [{'type': 'Property', 'stereotype': 'begin'}]},
+                {'type': 'Package', 'contents': [{'type': 'Class', 'stereotype': 'role'},
+                                                 {'type': 'Relation', 'stereotype': None}]},
+                {'stereotype': 'kind', 'type': 'Class', 'name': 'Key order "does not" matter [{'},
+                {'type': 'Generalization'}
+            ]}
+        }
+
+        result = scan_stereotype_frequencies(io.BytesIO(json.dumps(ontology).encode()), chunk_size=5)
+
+        assert result == {'Class': {'kind': 2, 'role': 1}, 'Relation': {None: 1}}
+
+    def test_tokenizer_skips_strings_with_brackets(self):
+        tokenizer = JsonTokenizer(io.BytesIO(b'{"a": ["]", {"b": "}\\""}], "c": 1}'), chunk_size=3)
+        tokenizer.next_token()
+        tokenizer.next_token()
+        tokenizer.next_token()
+        assert tokenizer.next_token()[1] == b'['
+
+        tokenizer.skip_container()
+
+        assert [tokenizer.next_token()[1] for _ in range(5)] == [b',', b'"c"', b':', b'1', b'}']
+        assert tokenizer.next_token() is None
+
+    def test_scan_catalogue(self, tmp_path):
+        for project in ['aguiar2019ooco', 'bank-model']:
+            os.makedirs(tmp_path / project)
+            with open(os.path.join(MODEL_JSONS_PATH, f"{project}.json"), 'rb') as source, \
+                    open(tmp_path / project / 'ontology.json', 'wb') as target:
+                target.write(source.read())
+        os.makedirs(tmp_path / 'no-json')
+
+        result = scan_catalogue(tmp_path, n_workers=2)
+
+        assert set(result) == {'aguiar2019ooco', 'bank-model'}
+        assert result['aguiar2019ooco']['Class']['kind'] > 0
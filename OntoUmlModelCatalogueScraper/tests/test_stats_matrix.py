@@ -0,0 +1,88 @@
+import json
+import os
+
+import pandas as pd
+
+from OntoUmlModelCatalogueScraper import StatsMatrix
+from OntoUmlModelCatalogueScraper.StatsMatrix import get_derived, get_project_occurrence_counts, \
+    get_projects_with_stereotype, get_stats_matrix, get_stereotype_counts, get_total_counts, rank, stats_to_matrix
+from OntoUmlModelCatalogueScraper.util import recursive_dict_sum
+
+REPO_STATS_PATH = os.path.join(os.path.dirname(__file__), '..', 'repo_stats.json')
+
+STATS = {
+    'p1': {'Class': {'kind': 2, 'role': 1}},
+    'p2': {'Class': {'Role': 3, 'kind': 1}, 'Relation': {'material': 1}},
+    'p3': {'Class': {'subkind': 1}}
+}
+
+
+class TestStatsMatrix:
+
+    def test_totals_equal_recursive_dict_sum(self):
+        with open(REPO_STATS_PATH) as f:
+            stats = json.load(f)
+        matrix = stats_to_matrix(stats)
+        expected = recursive_dict_sum(*stats.values())
+
+        for type, stereotype_counts in expected.items():
+            # Including the order of the stereotypes
+            assert get_total_counts(get_stereotype_counts(matrix, type)).to_dict() == stereotype_counts
+
+    def test_rank_by_count_then_case_insensitive_name(self):
+        class_counts = get_stereotype_counts(stats_to_matrix(STATS), 'Class')
+
+        assert list(rank(get_total_counts(class_counts)).items()) == [('kind', 3), ('Role', 3), ('role', 1),
+                                                                      ('subkind', 1)]
+        assert list(rank(get_project_occurrence_counts(class_counts)).items()) == [('kind', 2), ('role', 1),
+                                                                                   ('Role', 1), ('subkind', 1)]
+
+    def test_project_queries(self):
+        matrix = stats_to_matrix(STATS)
+        class_counts = get_stereotype_counts(matrix, 'Class')
+
+        assert get_projects_with_stereotype(class_counts, 'kind') == ['p1', 'p2']
+        assert get_projects_with_stereotype(class_counts, 'kind', not_in=True) == ['p3']
+        assert get_projects_with_stereotype(class_counts, 'mode') == []
+        assert get_stereotype_counts(matrix, 'Relation')['material'].to_list() == [0, 1, 0]
+        assert get_stereotype_counts(matrix, 'Generalization').shape == (3, 0)
+
+
+def write_stats(path, stats, mtime_ns):
+    with open(path, 'w') as f:
+        json.dump(stats, f)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestCachedStatsMatrix:
+
+    def test_parsed_once_until_changed(self, tmp_path, monkeypatch):
+        path = tmp_path / 'repo_stats.json'
+        write_stats(path, STATS, 10 ** 18)
+        n_parses = []
+        load_stats_matrix = StatsMatrix.load_stats_matrix
+        monkeypatch.setattr(StatsMatrix, 'load_stats_matrix',
+                            lambda path: n_parses.append(path) or load_stats_matrix(path))
+
+        matrix = get_stats_matrix(path)
+        n_computations = []
+        for _ in range(2):
+            assert get_stats_matrix(path) is matrix
+            assert get_derived('n_projects', lambda matrix: n_computations.append(1) or len(matrix), path) == 3
+        assert len(n_parses) == 1 and len(n_computations) == 1
+
+        write_stats(path, {'p1': STATS['p1']}, 2 * 10 ** 18)
+        assert len(get_stats_matrix(path)) == 1
+        assert get_derived('n_projects', len, path) == 1
+        assert len(n_parses) == 2
+
+    def test_snapshot(self, tmp_path, monkeypatch):
+        path = tmp_path / 'repo_stats.json'
+        write_stats(path, STATS, 10 ** 18)
+        expected = get_stats_matrix(path, use_snapshot=True)
+        assert (tmp_path / 'repo_stats.pickle').exists()
+
+        # A new process has an empty cache, and should not parse the statistics file
+        monkeypatch.setattr(StatsMatrix, '_cache', {})
+        monkeypatch.setattr(StatsMatrix, 'load_stats_matrix', None)
+        pd.testing.assert_frame_equal(get_stats_matrix(path, use_snapshot=True), expected)
@@ -0,0 +1,43 @@
+import random
+
+import pandas as pd
+
+from OntoUmlModelCatalogueScraper.StereotypeBitmaskIndex import StereotypeBitmaskIndex
+
+
+def create_stereotype_counts(n_projects=200, n_stereotypes=150, seed=1):
+    """
+    Random counts of more stereotypes than fit in a single 64-bit word.
+    """
+    rng = random.Random(seed)
+    stereotypes = [f"s{i}" for i in range(n_stereotypes)]
+    # Most projects use a few common stereotypes, some use rare ones
+    weights = [1 / (i + 1) for i in range(n_stereotypes)]
+    rows = {}
+    for project in range(n_projects):
+        present = set(rng.choices(stereotypes, weights, k=rng.randint(0, 8)))
+        rows[f"p{project}"] = [rng.randint(1, 5) if stereotype in present else 0 for stereotype in stereotypes]
+    return pd.DataFrame.from_dict(rows, orient='index', columns=stereotypes)
+
+
+class TestStereotypeBitmaskIndex:
+
+    def test_subset_query_equals_set_comparison(self):
+        counts = create_stereotype_counts()
+        index = StereotypeBitmaskIndex(counts)
+        present_per_project = {project: set(counts.columns[row > 0]) for project, row in counts.iterrows()}
+
+        for stereotype_set in [set(), {'s0', 's1', 's2'}, {f"s{i}" for i in range(0, 150, 2)},
+                               {'s0', 's70', 's149', 'unknown'}]:
+            expected = [project for project, present in present_per_project.items() if present <= stereotype_set]
+            assert index.get_supported_projects(stereotype_set) == expected
+
+    def test_cumulative_support_equals_subset_query_per_prefix(self):
+        index = StereotypeBitmaskIndex(create_stereotype_counts())
+        ordering = [f"s{i}" for i in random.Random(2).sample(range(150), 150)]
+        ordering.insert(3, 'unknown')
+
+        expected = [int(index.get_supported(ordering[:length]).sum()) for length in range(1, len(ordering) + 1)]
+
+        assert index.get_cumulative_support(ordering) == expected
+        assert expected[-1] == 200
@@ -0,0 +1,54 @@
+import itertools
+import random
+
+import pandas as pd
+
+from OntoUmlModelCatalogueScraper.StereotypeBitmaskIndex import StereotypeBitmaskIndex
+from OntoUmlModelCatalogueScraper.StereotypeSetSolver import StereotypeSetSolver
+
+
+def create_stereotype_counts(n_projects=60, n_stereotypes=12, seed=3):
+    rng = random.Random(seed)
+    stereotypes = [f"s{i}" for i in range(n_stereotypes)]
+    weights = [1 / (i + 1) for i in range(n_stereotypes)]
+    rows = {}
+    for project in range(n_projects):
+        present = set(rng.choices(stereotypes, weights, k=rng.randint(0, 5)))
+        rows[f"p{project}"] = [1 if stereotype in present else 0 for stereotype in stereotypes]
+    return pd.DataFrame.from_dict(rows, orient='index', columns=stereotypes)
+
+
+def brute_force(index, k):
+    return max(int(index.get_supported(selection).sum()) for selection in itertools.combinations(index.stereotypes, k))
+
+
+class TestStereotypeSetSolver:
+
+    def test_exact_equals_brute_force(self):
+        index = StereotypeBitmaskIndex(create_stereotype_counts())
+        solver = StereotypeSetSolver(index)
+
+        for k in range(1, len(index.stereotypes) + 1):
+            selected, n_supported = solver.solve_exact(k)
+            assert len(selected) <= k
+            assert n_supported == index.get_supported(selected).sum() == brute_force(index, k)
+
+    def test_greedy_is_feasible_and_not_better_than_exact(self):
+        index = StereotypeBitmaskIndex(create_stereotype_counts(seed=4))
+        curve = StereotypeSetSolver(index).get_support_curve(exact_up_to_k=len(index.stereotypes))
+
+        assert curve['greedy_stereotype'].is_unique
+        assert (curve['greedy_n_supported'] <= curve['optimal_n_supported']).all()
+        assert curve['greedy_n_supported'].iloc[-1] == len(index.projects)
+
+    def test_greedy_selects_bundles(self):
+        # No single stereotype supports a project, but two pairs together support most projects
+        counts = pd.DataFrame.from_dict({'p0': [1, 1, 0, 0, 0], 'p1': [1, 1, 0, 0, 0], 'p2': [1, 1, 0, 0, 0],
+                                         'p3': [0, 0, 1, 1, 0], 'p4': [0, 0, 1, 0, 1]},
+                                        orient='index', columns=['a', 'b', 'c', 'd', 'e'])
+        index = StereotypeBitmaskIndex(counts)
+
+        ordering = StereotypeSetSolver(index).solve_greedy()
+
+        assert set(ordering[:2]) == {'a', 'b'}
+        assert index.get_cumulative_support(ordering) == [0, 3, 3, 4, 5]
@@ -1,4 +1,5 @@
-from OntoUmlModelCatalogueScraper.util import recursive_dict_add, recursive_dict_sum
+from OntoUmlModelCatalogueScraper.util import get_contents_stereotype_frequencies, iter_contents_elements, \
+    recursive_dict_add, recursive_dict_add_in_place, recursive_dict_sum
 
 class TestUtils:
 
@@ -50,4 +51,29 @@ class TestUtils:
 
         expected = {"X": 5, "A": {"X": 7}}
         assert result == expected
-        assert result2 == expected
\ No newline at end of file
+        assert result2 == expected
+
+    def test_add_in_place_does_not_share_dicts(self):
+        total = {}
+        d1 = {"X": {"a": 1}}
+
+        recursive_dict_add_in_place(total, d1)
+        recursive_dict_add_in_place(total, {"X": {"a": 2, "b": 1}})
+
+        assert total == {"X": {"a": 3, "b": 1}}
+        assert d1 == {"X": {"a": 1}}
+
+    def test_iter_contents_elements_in_document_order(self):
+        contents = [{"type": "Class", "id": 1},
+                    {"type": "Package", "id": 2, "contents": [{"type": "Package", "id": 3, "contents": None},
+                                                              {"type": "Relation", "id": 4}]},
+                    {"type": "Class", "id": 5}]
+
+        assert [element["id"] for element in iter_contents_elements(contents)] == [1, 2, 3, 4, 5]
+
+    def test_deeply_nested_packages(self):
+        contents = [{"type": "Class", "stereotype": "kind"}]
+        for _ in range(5000):
+            contents = [{"type": "Package", "contents": contents}]
+
+        assert get_contents_stereotype_frequencies(contents) == {"Class": {"kind": 1}}
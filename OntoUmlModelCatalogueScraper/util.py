@@ -5,6 +5,53 @@ logger = logging.getLogger(__name__)
 types_without_stereotypes = []
 
 
+def iter_contents_elements(contents_list: list[dict, ...]):
+    """
+    Iterates over the elements within the contents of an OntoUML Package, including those within sub-Packages (and
+    the sub-Packages themselves). Uses an explicit stack instead of recursion, so deeply nested Packages are no problem.
+    :param contents_list: A list of OntoUML elements according to the OntoUML metamodel, or None.
+    :return: Generator of the elements, in the order in which they occur in the JSON file (i.e. the elements within a
+    Package directly follow the Package).
+    """
+    stack = [iter(contents_list or [])]
+    while stack:
+        element = next(stack[-1], None)
+        if element is None:
+            stack.pop()
+            continue
+        yield element
+        if element["type"] == "Package":
+            stack.append(iter(element['contents'] or []))
+
+
+def _copy_nested_dict(value):
+    if type(value) is not dict:
+        return value
+    return {key: _copy_nested_dict(inner_value) for key, inner_value in value.items()}
+
+
+def recursive_dict_add_in_place(target: dict, source: dict) -> dict:
+    """
+    Adds the values of source to the values with the same key in target, like recursive_dict_add, but modifies target
+    instead of creating a new dictionary. Dicts of source that are added to target are copied, so source is never
+    modified by later additions to target.
+    :param target: Dictionary with either numbers or other dicts as values, which is updated.
+    :param source: Dictionary with either numbers or other dicts as values.
+    :return: target
+    """
+    stack = [(target, source)]
+    while stack:
+        target_dict, source_dict = stack.pop()
+        for key, value in source_dict.items():
+            if key not in target_dict:
+                target_dict[key] = _copy_nested_dict(value)
+            elif type(target_dict[key]) is dict and type(value) is dict:
+                stack.append((target_dict[key], value))
+            else:
+                target_dict[key] = target_dict[key] + value
+    return target
+
+
 def recursive_dict_add(dict1, dict2):
     """
     Adds the values within a dict that have the same key. Resulting in merging the dictionaries without overwriting one
@@ -19,61 +66,49 @@ def recursive_dict_add(dict1, dict2):
     """
     if type(dict1) is not dict or type(dict2) is not dict:
         return dict1 + dict2
-
-    new_dict = dict1.copy()
-    for key in dict2.keys():
-        if key in dict1.keys():
-            new_dict[key] = recursive_dict_add(dict1[key], dict2[key])
-        else:
-            new_dict[key] = dict2[key]
-    return new_dict
+    return recursive_dict_add_in_place(_copy_nested_dict(dict1), dict2)
 
 
 def recursive_dict_sum(*dicts):
     """
-    Adds multiple dicts together using the recursive_dict_add function.
+    Adds multiple dicts together, like the recursive_dict_add function. The dicts are added to a single result in
+    place, so the time is linear in the total size of the dicts.
     :param dicts: multiple dicts to be added.
     :return: One dictionary with all keys present of dicts where the values are added for the same keys.
     """
     result = {}
     for d in dicts:
-        result = recursive_dict_add(result, d)
+        recursive_dict_add_in_place(result, d)
     return result
 
 
+def add_element_stereotype(stereotype_count: dict, element: dict):
+    """
+    Counts the stereotype of a single OntoUML element (not a Package) in place.
+    :param stereotype_count: A dictionary with structure Type -> Stereotype -> n_occurrences, which is updated.
+    :param element: An OntoUML element according to the OntoUML metamodel.
+    """
+    type = element["type"]
+    if "stereotype" not in element.keys():
+        if type not in types_without_stereotypes:
+            logger.warning(f"Type {type} has no stereotype field")
+            types_without_stereotypes.append(type)
+        return
+
+    type_count = stereotype_count.setdefault(type, {})
+    stereotype = element["stereotype"]
+    type_count[stereotype] = type_count.get(stereotype, 0) + 1
+
+
 def get_contents_stereotype_frequencies(contents_list: list[dict, ...]) -> dict:
     """
     Get the frequency of stereotypes for several types within the contents of an OntoUML Package.
-    This is done recursively for sub-Packages.
+    Includes the elements of sub-Packages.
     :param contents_list: A list of OntoUML elements according to the OntoUML metamodel.
     :return: A dictionary with structure Type -> Stereotype -> n_occurrences
     """
-    if contents_list is None:
-        return {}
-
     stereotype_count = {}
-
-    for element in contents_list:
-        type = element["type"]
-        if type == "Package":
-            counts_to_add = get_contents_stereotype_frequencies(element['contents'])
-            stereotype_count = recursive_dict_add(stereotype_count, counts_to_add)
-            continue
-
-        if "stereotype" not in element.keys():
-            if type not in types_without_stereotypes:
-                logger.warning(f"Type {type} has no stereotype field")
-                types_without_stereotypes.append(type)
-            continue
-
-        stereotype = element["stereotype"]
-
-        if type in stereotype_count.keys():
-            if stereotype in stereotype_count[type]:
-                stereotype_count[type][stereotype] += 1
-            else:
-                stereotype_count[type][stereotype] = 1
-        else:
-            stereotype_count[type] = {stereotype: 1}
-
+    for element in iter_contents_elements(contents_list):
+        if element["type"] != "Package":
+            add_element_stereotype(stereotype_count, element)
     return stereotype_count